@@ -0,0 +1,87 @@
+"""
+Benchmark name suggestions from the in-memory autocomplete index against the search endpoint's name filter.
+
+Loads the index from the database in DB_URL, then types random organization names one character at a time, asking
+the index for suggestions and `OrganizationService.find_organizations` for a page of 10 organizations filtered by
+name at each keystroke, and reports p50/p95/p99 latencies besides the time and memory the index takes:
+
+    python benchmarks/autocomplete.py --names 50
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import typer
+from sqlalchemy import func, select
+
+from run import ROOT
+
+sys.path.insert(0, str(ROOT / "src"))
+
+from core.services import OrganizationService  # noqa: E402
+from infrastructure.autocomplete import AutocompleteIndex  # noqa: E402
+from infrastructure.di.container import Container  # noqa: E402
+from infrastructure.persistence.db.repositories import OrganizationRepositoryImpl  # noqa: E402
+from infrastructure.persistence.db.schema import Organization  # noqa: E402
+
+
+def _summary(timings: list[float]) -> str:
+    percentiles = statistics.quantiles(timings, n=100, method="inclusive") if len(timings) > 1 else timings * 99
+    p95, p99 = percentiles[94], percentiles[98]
+    return (
+        f"p50 {statistics.median(timings) * 1000:8.3f} ms  p95 {p95 * 1000:8.3f} ms  p99 {p99 * 1000:8.3f} ms  "
+        f"({len(timings)} keystrokes)"
+    )
+
+
+async def run_benchmark(*, names: int, max_length: int, search: bool) -> None:
+    container = Container()
+    session_factory = container.async_session_factory()
+    index = AutocompleteIndex(session_factory=session_factory)
+
+    started = time.perf_counter()
+    await index.reload()
+    stats = index.stats()
+    typer.echo(
+        f"Index of {stats.organizations} organizations and {stats.industries} industries ({stats.keys} keys) "
+        f"loaded in {time.perf_counter() - started:.2f} s, {stats.memory_bytes / 2**20:.1f} MiB"
+    )
+
+    async with session_factory() as session:
+        typed = (await session.scalars(select(Organization.name).order_by(func.random()).limit(names))).all()
+    keystrokes = [name[:length] for name in typed for length in range(1, min(len(name), max_length) + 1)]
+
+    try:
+        timings = []
+        for text in keystrokes:
+            started = time.perf_counter()
+            index.suggest_organizations(text)
+            index.suggest_industries(text)
+            timings.append(time.perf_counter() - started)
+        typer.echo(f"{'index':<7} {_summary(timings)}")
+
+        if search:
+            timings = []
+            for text in keystrokes:
+                async with session_factory() as session:
+                    service = OrganizationService(organization_repository=OrganizationRepositoryImpl(session))
+                    started = time.perf_counter()
+                    await service.find_organizations(organization_name=text, page=1, items_per_page=10)
+                    timings.append(time.perf_counter() - started)
+            typer.echo(f"{'search':<7} {_summary(timings)}")
+    finally:
+        await container.db_engine().dispose()
+
+
+def main(
+    names: int = typer.Option(20, min=1, help="Organization names typed"),
+    max_length: int = typer.Option(12, min=1, help="Characters typed of each name"),
+    search: bool = typer.Option(True, help="Also time the search endpoint's name filter"),
+):
+    asyncio.run(run_benchmark(names=names, max_length=max_length, search=search))
+
+
+if __name__ == "__main__":
+    typer.run(main)
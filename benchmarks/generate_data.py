@@ -0,0 +1,234 @@
+"""
+Generate a synthetic directory in the shape of `seed_test_data.sql`, scaled to any size.
+
+Writes a psql script that replaces the directory contents using COPY: an industry tree, buildings clustered around
+a few city centers, organizations linked to 1-3 industries and their phones. Output is deterministic for a seed.
+
+    python benchmarks/generate_data.py --organizations 100000 | psql "$DATABASE_URL"
+"""
+
+import random
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TextIO
+
+import typer
+
+# Root industry -> second level industry -> third level industries
+TAXONOMY: dict[str, dict[str, list[str]]] = {
+    "Food": {
+        "Restaurants": ["Sushi", "Pizza", "Burgers", "Coffee Shops", "Bakeries"],
+        "Groceries": ["Supermarkets", "Farmers Markets", "Organic Stores"],
+        "Catering": ["Event Catering", "Corporate Catering"],
+    },
+    "Technology": {
+        "Software": ["AI Development", "Web Development", "Mobile Apps", "Cybersecurity"],
+        "Hardware": ["Electronics Repair", "Computer Stores"],
+        "Telecom": ["Internet Providers", "Mobile Operators"],
+    },
+    "Healthcare": {
+        "Clinics": ["Dentistry", "Pediatrics", "Cardiology"],
+        "Pharmacies": [],
+        "Laboratories": ["Blood Tests", "Diagnostics"],
+    },
+    "Automotive": {
+        "Car Dealers": ["New Cars", "Used Cars"],
+        "Car Repair": ["Tire Service", "Body Shops"],
+        "Car Wash": [],
+    },
+    "Retail": {
+        "Clothing": ["Shoes", "Sportswear", "Kids Clothing"],
+        "Home Goods": ["Furniture", "Kitchenware"],
+        "Books": [],
+    },
+    "Education": {
+        "Schools": [],
+        "Universities": [],
+        "Courses": ["Language Courses", "Programming Courses", "Driving Schools"],
+    },
+    "Finance": {
+        "Banks": [],
+        "Insurance": ["Car Insurance", "Health Insurance"],
+        "Accounting": [],
+    },
+    "Construction": {
+        "Building Materials": ["Lumber", "Tiles"],
+        "Contractors": ["Plumbing", "Electrical", "Roofing"],
+    },
+}
+
+
+@dataclass(frozen=True)
+class City:
+    name: str
+    lat: float
+    lon: float
+    # Share of the buildings located in the city
+    weight: float
+
+
+CITIES = (
+    City("New York", 40.730610, -73.935242, 0.35),
+    City("Chicago", 41.878113, -87.629799, 0.2),
+    City("Los Angeles", 34.052235, -118.243683, 0.25),
+    City("Austin", 30.267153, -97.743057, 0.1),
+    City("Seattle", 47.606209, -122.332069, 0.1),
+)
+
+# Standard deviation of building coordinates around their city center, in degrees (about 3 km)
+CITY_SPREAD_DEGREES = 0.03
+
+STREETS = (
+    "Main", "Oak", "Pine", "Maple", "Cedar", "Elm", "Washington", "Lake", "Hill", "Park",
+    "Market", "Tech", "Health", "Food", "River", "Sunset", "Broadway", "Church", "Mill", "Spring",
+)  # fmt: skip
+STREET_SUFFIXES = ("St", "Ave", "Blvd", "Rd", "Ln", "Way")
+NAME_ADJECTIVES = (
+    "Blue", "Golden", "Fresh", "Green", "Bright", "Urban", "Royal", "Silver", "Smart", "Happy",
+    "Prime", "Grand", "Little", "Modern", "Classic", "North", "Rapid", "Global", "Sunny", "Quiet",
+)  # fmt: skip
+NAME_NOUNS = (
+    "Harbor", "Oak", "Star", "River", "Bridge", "Garden", "Peak", "Valley", "Lantern", "Anchor",
+    "Falcon", "Maple", "Stone", "Summit", "Meadow", "Beacon", "Crown", "Forest", "Orbit", "Pixel",
+)  # fmt: skip
+
+
+@dataclass(frozen=True)
+class Industry:
+    id: int
+    name: str
+    parent_id: int | None
+
+
+def build_industries() -> list[Industry]:
+    """Build the industry tree in breadth-first order, so that parents always come before their children."""
+    industries = []
+    levels = [(None, name, children) for name, children in TAXONOMY.items()]
+    while levels:
+        next_levels = []
+        for parent_id, name, children in levels:
+            industry = Industry(id=len(industries) + 1, name=name, parent_id=parent_id)
+            industries.append(industry)
+            if isinstance(children, dict):
+                next_levels.extend((industry.id, child, grandchildren) for child, grandchildren in children.items())
+            elif children:
+                next_levels.extend((industry.id, child, None) for child in children)
+        levels = next_levels
+    return industries
+
+
+def _escape(value) -> str:
+    """Render a value in the COPY text format."""
+    if value is None:
+        return r"\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _copy(out: TextIO, table: str, columns: Iterable[str], rows: Iterable[tuple]) -> None:
+    out.write(f"COPY {table} ({', '.join(columns)}) FROM stdin;\n")
+    for row in rows:
+        out.write("\t".join(_escape(value) for value in row))
+        out.write("\n")
+    out.write("\\.\n\n")
+
+
+class DirectoryGenerator:
+    def __init__(self, *, organizations: int, buildings: int, seed: int):
+        self.organizations = organizations
+        self.buildings = buildings
+        self.industries = build_industries()
+        self._seed = seed
+        self._timestamp = datetime.now(UTC).replace(tzinfo=None).isoformat(sep=" ")
+        children = {industry.id: [] for industry in self.industries}
+        for industry in self.industries:
+            if industry.parent_id is not None:
+                children[industry.parent_id].append(industry)
+        # Organizations are mostly linked to the most specific industries
+        self._industry_weights = [1 if children[industry.id] else 6 for industry in self.industries]
+
+    def write(self, out: TextIO) -> None:
+        out.write("-- Generated by benchmarks/generate_data.py\n")
+        out.write("BEGIN;\n\n")
+        out.write(
+            "TRUNCATE TABLE phones, organization_industries, organizations, buildings, industries, industry_closure "
+            "RESTART IDENTITY CASCADE;\n\n"
+        )
+        _copy(
+            out,
+            "industries",
+            ("id", "name", "parent_id", "created_at", "updated_at"),
+            ((i.id, i.name, i.parent_id, self._timestamp, self._timestamp) for i in self.industries),
+        )
+        _copy(out, "buildings", ("id", "address", "coordinates", "created_at", "updated_at"), self._buildings())
+
+        links, phones = [], []
+        _copy(
+            out,
+            "organizations",
+            ("id", "name", "building_id", "created_at", "updated_at"),
+            self._organizations(links, phones),
+        )
+        _copy(out, "organization_industries", ("organization_id", "industry_id", "created_at"), links)
+        _copy(
+            out,
+            "phones",
+            ("id", "organization_id", "phone_number", "created_at", "updated_at"),
+            (
+                (n, organization_id, phone, self._timestamp, self._timestamp)
+                for n, (organization_id, phone) in enumerate(phones, 1)
+            ),
+        )
+
+        for table in ("industries", "buildings", "organizations", "phones"):
+            out.write(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}));\n")  # noqa: S608
+        out.write("\nCOMMIT;\n\nANALYZE;\n")
+
+    def _buildings(self) -> Iterator[tuple]:
+        rng = random.Random(f"{self._seed}:buildings")
+        weights = [city.weight for city in CITIES]
+        for building_id in range(1, self.buildings + 1):
+            city = rng.choices(CITIES, weights)[0]
+            lat = rng.gauss(city.lat, CITY_SPREAD_DEGREES)
+            lon = rng.gauss(city.lon, CITY_SPREAD_DEGREES)
+            address = f"{rng.randint(1, 9999)} {rng.choice(STREETS)} {rng.choice(STREET_SUFFIXES)}, {city.name}"
+            yield building_id, address, f"SRID=4326;POINT({lon:.6f} {lat:.6f})", self._timestamp, self._timestamp
+
+    def _organizations(self, links: list, phones: list) -> Iterator[tuple]:
+        """Organization rows; their industry links and phones are collected into `links` and `phones`."""
+        rng = random.Random(f"{self._seed}:organizations")
+        names = set()
+        for organization_id in range(1, self.organizations + 1):
+            industries = {
+                industry.id: industry
+                for industry in rng.choices(self.industries, self._industry_weights, k=rng.randint(1, 3))
+            }
+            main_industry = next(iter(industries.values()))
+            name = f"{rng.choice(NAME_ADJECTIVES)} {rng.choice(NAME_NOUNS)} {main_industry.name}"
+            if name in names:
+                name = f"{name} {organization_id}"
+            names.add(name)
+
+            links.extend((organization_id, industry_id, self._timestamp) for industry_id in industries)
+            phones.extend(
+                (organization_id, f"+1-{rng.randint(200, 999)}-555-{rng.randint(0, 9999):04d}")
+                for _ in range(rng.randint(1, 3))
+            )
+            building_id = rng.randint(1, self.buildings)
+            yield organization_id, name, building_id, self._timestamp, self._timestamp
+
+
+def main(
+    organizations: int = typer.Option(10_000, min=1, help="Number of organizations"),
+    buildings: int | None = typer.Option(None, min=1, help="Number of buildings (default: organizations / 5)"),
+    seed: int = typer.Option(42, help="Random seed"),
+    output: typer.FileTextWrite = typer.Option("-", help="Output file, stdout by default"),
+):
+    generator = DirectoryGenerator(
+        organizations=organizations, buildings=buildings or max(1, organizations // 5), seed=seed
+    )
+    generator.write(output)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,159 @@
+"""
+Benchmark the organization search query builder against the JOIN + DISTINCT builder it replaced.
+
+The legacy builder joined `organization_industries`/`industries` (and up to three parent industries for name
+searches) and removed the duplicate rows with DISTINCT over whole organization rows, without any ORDER BY.
+The current builder (`OrganizationRepositoryImpl._organizations_statement`) filters industries with semi-joins
+through the closure table, joins `buildings` only for building filters and orders by a unique sort key.
+
+Both are run for every filtered scenario of `run.py`, at the first page and at a deep OFFSET, directly on a
+connection (without loading relations), and the median and p95 execution times are reported:
+
+    python benchmarks/query_builder.py --runs 20
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import typer
+
+from run import ROOT, SCENARIOS
+
+sys.path.insert(0, str(ROOT / "src"))
+
+from sqlalchemy import Select, func, or_, select  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine  # noqa: E402
+from sqlalchemy.orm import aliased  # noqa: E402
+
+from api.v1.dto import OrganizationFilterParams  # noqa: E402
+from config.settings import settings  # noqa: E402
+from core.services.organization_service import DEFAULT_RADIUS_M, OrganizationService  # noqa: E402
+from infrastructure.persistence.db.repositories import OrganizationRepositoryImpl  # noqa: E402
+from infrastructure.persistence.db.repositories.organization_repository import _geography  # noqa: E402
+from infrastructure.persistence.db.schema import Building, Industry, Organization, industry_closure  # noqa: E402
+
+PAGE_SIZE = 20
+DEEP_OFFSET = 2000
+
+
+def legacy_statement(
+    *,
+    building_id=None,
+    industry_id=None,
+    include_subindustries=False,
+    organization_name=None,
+    industry_name=None,
+    address=None,
+    point_wkt=None,
+    radius_m=None,
+    polygon_wkt=None,
+) -> Select:
+    """Build the statement of the legacy builder, with today's geographic predicates so only the query shape differs."""
+    stmt = select(Organization)
+    if any([address, point_wkt, polygon_wkt]):
+        stmt = stmt.join(Organization.building)
+    if any([industry_id, industry_name]):
+        stmt = stmt.join(Organization.industries)
+
+    if industry_name:
+        parent1, parent2, parent3 = aliased(Industry), aliased(Industry), aliased(Industry)
+        stmt = (
+            stmt.outerjoin(parent1, Industry.parent_id == parent1.id)
+            .outerjoin(parent2, parent1.parent_id == parent2.id)
+            .outerjoin(parent3, parent2.parent_id == parent3.id)
+            .filter(
+                or_(
+                    Industry.name.ilike(f"%{industry_name}%"),
+                    parent1.name.ilike(f"%{industry_name}%"),
+                    parent2.name.ilike(f"%{industry_name}%"),
+                    parent3.name.ilike(f"%{industry_name}%"),
+                )
+            )
+        )
+    if industry_id and include_subindustries:
+        stmt = stmt.filter(
+            Industry.id.in_(
+                select(industry_closure.c.descendant_id).filter(industry_closure.c.ancestor_id == industry_id)
+            )
+        )
+    elif industry_id:
+        stmt = stmt.filter(Industry.id == industry_id)
+    if building_id:
+        stmt = stmt.filter(Organization.building_id == building_id)
+    if organization_name:
+        stmt = stmt.filter(Organization.name.ilike(f"%{organization_name}%"))
+    if address:
+        stmt = stmt.filter(Building.address.ilike(f"%{address}%"))
+    if point_wkt:
+        stmt = stmt.filter(func.ST_DWithin(_geography(Building.coordinates), _geography(point_wkt), radius_m))
+    if polygon_wkt:
+        stmt = stmt.filter(func.ST_Contains(polygon_wkt, Building.coordinates))
+    return stmt.distinct()
+
+
+def current_statement(*, order_by: str, **filters) -> Select:
+    return OrganizationRepositoryImpl(session=None)._organizations_statement(**filters, order_by=order_by)
+
+
+def repository_filters(params: dict) -> tuple[dict, str]:
+    """Repository filters and ordering of a `run.py` scenario, empty when it filters nothing."""
+    query = OrganizationFilterParams.model_validate(
+        {key: value for key, value in params.items() if key not in ("page", "items_per_page", "fields")}
+    )
+    filters = OrganizationService(organization_repository=None)._repository_filters(
+        **query.model_dump(exclude={"order_by", "radius_m"}), radius_m=query.radius_m or DEFAULT_RADIUS_M
+    )
+    return filters, query.order_by
+
+
+async def _time(connection: AsyncConnection, stmt: Select, runs: int) -> tuple[list[float], int]:
+    timings, rows = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = len((await connection.execute(stmt)).all())
+        timings.append(time.perf_counter() - started)
+    return timings, rows
+
+
+def _summary(timings: list[float]) -> str:
+    p95 = statistics.quantiles(timings, n=20, method="inclusive")[18] if len(timings) > 1 else timings[0]
+    return f"p50 {statistics.median(timings) * 1000:8.2f} ms  p95 {p95 * 1000:8.2f} ms"
+
+
+async def run_benchmark(*, runs: int, warmup: int, scenarios: list[str]) -> None:
+    engine = create_async_engine(settings.db_url.get_secret_value())
+    try:
+        async with engine.connect() as connection:
+            for name in scenarios:
+                filters, order_by = repository_filters(SCENARIOS[name])
+                if not filters:
+                    continue
+                for page, offset in (("first page", 0), ("deep page", DEEP_OFFSET)):
+                    builders = {
+                        "legacy": legacy_statement(**filters),
+                        "current": current_statement(**filters, order_by=order_by),
+                    }
+                    for builder, unpaged in builders.items():
+                        stmt = unpaged.limit(PAGE_SIZE + 1).offset(offset)
+                        await _time(connection, stmt, warmup)
+                        timings, rows = await _time(connection, stmt, runs)
+                        typer.echo(f"{name:<28} {page:<11} {builder:<8} {_summary(timings)}  rows {rows}")
+    finally:
+        await engine.dispose()
+
+
+def main(
+    runs: int = typer.Option(10, min=1, help="Measured executions per query"),
+    warmup: int = typer.Option(2, min=0, help="Unmeasured executions per query"),
+    scenario: list[str] = typer.Option(list(SCENARIOS), help="Scenarios of run.py to run (repeatable)"),
+):
+    unknown = set(scenario) - set(SCENARIOS)
+    if unknown:
+        raise typer.BadParameter(f"Unknown scenarios: {', '.join(sorted(unknown))}", param_hint="--scenario")
+    asyncio.run(run_benchmark(runs=runs, warmup=warmup, scenarios=scenario))
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,235 @@
+"""
+Benchmark the organization search API with a fixed mix of filter combinations.
+
+Runs every scenario against the app in-process (ASGI, using the configured DB_URL) or against a running server
+(`--base-url`), and reports p50/p95/p99 latency, throughput and, in-process, SQL statements per request.
+Results are stored as JSON, named after the current commit, and can be compared with an earlier run:
+
+    python benchmarks/run.py --compare benchmarks/results/<commit>.json
+"""
+
+import asyncio
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+
+import httpx
+import typer
+
+from generate_data import CITIES
+
+ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+_new_york, _chicago, _los_angeles = CITIES[0], CITIES[1], CITIES[2]
+
+# Name -> query parameters of GET /v1/organizations, matching data from generate_data.py
+SCENARIOS: dict[str, dict] = {
+    "all_first_page": {},
+    "all_deep_page": {"page": 200},
+    "building": {"building_id": 1},
+    "name": {"organization_name": "harbor"},
+    "name_by_relevance": {"organization_name": "golden sushi", "order_by": "relevance"},
+    "address": {"address": "Main St"},
+    "industry_id": {"industry_id": 9},
+    "industry_subtree": {"industry_id": 1, "include_subindustries": True},
+    "industry_name": {"industry_name": "Restaurants"},
+    "point_radius": {"lat": _new_york.lat, "lon": _new_york.lon, "radius_m": 1000},
+    "point_nearest": {"lat": _chicago.lat, "lon": _chicago.lon, "radius_m": 5000, "order_by": "distance"},
+    "polygon": {
+        "polygon": [
+            f"{_los_angeles.lat - 0.02},{_los_angeles.lon - 0.02}",
+            f"{_los_angeles.lat - 0.02},{_los_angeles.lon + 0.02}",
+            f"{_los_angeles.lat + 0.02},{_los_angeles.lon + 0.02}",
+            f"{_los_angeles.lat + 0.02},{_los_angeles.lon - 0.02}",
+        ]
+    },
+    "industry_name_and_point": {
+        "industry_name": "Food",
+        "lat": _new_york.lat,
+        "lon": _new_york.lon,
+        "radius_m": 3000,
+    },
+    "name_and_industry_subtree": {"organization_name": "star", "industry_id": 2, "include_subindustries": True},
+    "map_markers": {
+        "lat": _new_york.lat,
+        "lon": _new_york.lon,
+        "radius_m": 2000,
+        "items_per_page": 500,
+        "fields": "name,building",
+    },
+}
+
+
+@dataclass
+class ScenarioResult:
+    requests: int
+    errors: int
+    throughput_rps: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    latency_p99_ms: float
+    latency_mean_ms: float
+    queries_per_request: float | None
+
+
+class StatementCounter:
+    """Counts SQL statements executed by the app's engine, for in-process runs."""
+
+    def __init__(self, engine):
+        from sqlalchemy import event
+
+        self.count = 0
+        event.listen(engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args) -> None:
+        self.count += 1
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient, params: dict, *, requests: int, concurrency: int
+) -> tuple[list[float], int, float]:
+    """Send `requests` requests with `concurrency` in flight, returning their latencies, errors and wall time."""
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            response = await client.get("/v1/organizations", params=params)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def _percentile(latencies: list[float], percent: int) -> float:
+    if len(latencies) == 1:
+        return latencies[0] * 1000
+    return statistics.quantiles(latencies, n=100, method="inclusive")[percent - 1] * 1000
+
+
+async def run_benchmark(
+    *, base_url: str | None, requests: int, concurrency: int, warmup: int, scenarios: list[str]
+) -> dict[str, ScenarioResult]:
+    counter = None
+    if base_url is None:
+        sys.path.insert(0, str(ROOT / "src"))
+        from main import app, container
+
+        counter = StatementCounter(container.db_engine())
+        client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, raise_app_exceptions=False), base_url="http://benchmark"
+        )
+    else:
+        client = httpx.AsyncClient(base_url=base_url)
+
+    results = {}
+    async with client:
+        for name in scenarios:
+            params = SCENARIOS[name]
+            await _run_scenario(client, params, requests=warmup, concurrency=1)
+
+            statements_before = counter.count if counter else 0
+            latencies, errors, elapsed = await _run_scenario(client, params, requests=requests, concurrency=concurrency)
+            results[name] = ScenarioResult(
+                requests=requests,
+                errors=errors,
+                throughput_rps=round(requests / elapsed, 1),
+                latency_p50_ms=round(_percentile(latencies, 50), 2),
+                latency_p95_ms=round(_percentile(latencies, 95), 2),
+                latency_p99_ms=round(_percentile(latencies, 99), 2),
+                latency_mean_ms=round(statistics.fmean(latencies) * 1000, 2),
+                queries_per_request=round((counter.count - statements_before) / requests, 2) if counter else None,
+            )
+            typer.echo(f"{name:<28} {_format(results[name])}", err=True)
+    return results
+
+
+def _format(result: ScenarioResult) -> str:
+    queries = "-" if result.queries_per_request is None else f"{result.queries_per_request:g}"
+    return (
+        f"p50 {result.latency_p50_ms:8.2f} ms  p95 {result.latency_p95_ms:8.2f} ms  "
+        f"p99 {result.latency_p99_ms:8.2f} ms  {result.throughput_rps:8.1f} req/s  "
+        f"queries {queries:>5}  errors {result.errors}"
+    )
+
+
+def _git_commit() -> str:
+    """Short hash of the checked out commit, suffixed with -dirty when tracked files have changes."""
+    git = shutil.which("git")
+    if git is None:
+        return "unknown"
+    try:
+        commit = _git(git, "rev-parse", "--short", "HEAD")
+        dirty = _git(git, "status", "--porcelain", "--untracked-files=no")
+    except subprocess.CalledProcessError:
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def _git(git: str, *args: str) -> str:
+    return subprocess.run([git, *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()  # noqa: S603
+
+
+def compare(previous: dict, current: dict) -> None:
+    """Print the change of every metric between two stored runs."""
+    typer.echo(f"\n{'scenario':<28} {'metric':<16} {previous['commit']:>14} {current['commit']:>14} {'change':>8}")
+    for name, result in current["scenarios"].items():
+        before = previous["scenarios"].get(name)
+        if before is None:
+            continue
+        for metric in ("latency_p50_ms", "latency_p95_ms", "latency_p99_ms", "throughput_rps", "queries_per_request"):
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            change = f"{(new - old) / old * 100:+.1f}%" if old else "-"
+            typer.echo(f"{name:<28} {metric:<16} {old:>14g} {new:>14g} {change:>8}")
+
+
+def main(
+    base_url: str | None = typer.Option(None, help="URL of a running server; the app is run in-process if omitted"),
+    requests: int = typer.Option(200, min=1, help="Measured requests per scenario"),
+    concurrency: int = typer.Option(8, min=1, help="Requests in flight"),
+    warmup: int = typer.Option(10, min=0, help="Unmeasured requests per scenario"),
+    scenario: list[str] = typer.Option(list(SCENARIOS), help="Scenarios to run (repeatable), all by default"),
+    output: Path | None = typer.Option(None, help="Result file (default: benchmarks/results/<commit>.json)"),
+    compare_with: Path | None = typer.Option(None, "--compare", exists=True, help="Earlier result file to compare"),
+):
+    unknown = set(scenario) - set(SCENARIOS)
+    if unknown:
+        raise typer.BadParameter(f"Unknown scenarios: {', '.join(sorted(unknown))}", param_hint="--scenario")
+
+    results = asyncio.run(
+        run_benchmark(base_url=base_url, requests=requests, concurrency=concurrency, warmup=warmup, scenarios=scenario)
+    )
+    run = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(UTC).isoformat(),
+        "mode": "http" if base_url else "in-process",
+        "requests": requests,
+        "concurrency": concurrency,
+        "scenarios": {name: asdict(result) for name, result in results.items()},
+    }
+
+    output = output or RESULTS_DIR / f"{run['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(run, indent=2) + "\n")
+    typer.echo(f"Results written to {output}", err=True)
+
+    if compare_with is not None:
+        compare(json.loads(compare_with.read_text()), run)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,113 @@
+"""
+Benchmark the serialization of organization search pages.
+
+Encodes pages of generated `core.entities.Organization` entities the way `/v1/organizations` does (orjson straight
+from the entities) and the way it used to (entities mapped to `OrganizationDTO`, dumped with `model_dump()` and
+encoded by `JSONResponse` with the standard library), and reports the CPU time per page:
+
+    python benchmarks/serialization.py --items 1000
+"""
+
+import random
+import statistics
+import sys
+import time
+
+import typer
+
+from generate_data import CITIES
+from run import ROOT
+
+sys.path.insert(0, str(ROOT / "src"))
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+
+from api.v1.dto import BuildingDTO, OrganizationDTO, PaginatedResource, PointDTO  # noqa: E402
+from api.v1.mappers import map_organization_to_content  # noqa: E402
+from core.entities import Building, Organization, Point  # noqa: E402
+
+
+def generate_page(items: int, seed: int) -> list[Organization]:
+    rng = random.Random(seed)
+    page = []
+    for organization_id in range(1, items + 1):
+        city = rng.choice(CITIES)
+        building = Building(
+            id=rng.randrange(1, 100_000),
+            address=f"{rng.randrange(1, 999)} Main St, {city.name}",
+            coordinates=Point(lat=city.lat + rng.uniform(-0.05, 0.05), lon=city.lon + rng.uniform(-0.05, 0.05)),
+        )
+        page.append(
+            Organization(
+                id=organization_id,
+                name=f"Organization {organization_id}",
+                phones=[f"+1-555-{rng.randrange(1000, 9999)}" for _ in range(rng.randrange(1, 4))],
+                building=building,
+                industries=rng.sample(["Food", "Restaurants", "Sushi", "Retail", "Auto", "Health"], 2),
+                distance=rng.uniform(0, 5000),
+            )
+        )
+    return page
+
+
+def encode_with_dtos(page: list[Organization]) -> bytes:
+    """Encode a page like the routes did before: entity -> DTO -> dict -> stdlib JSON."""
+    dtos = [
+        OrganizationDTO(
+            id=org.id,
+            name=org.name,
+            phones=org.phones,
+            building=BuildingDTO(
+                id=org.building.id,
+                address=org.building.address,
+                coordinates=PointDTO(lat=org.building.coordinates["lat"], lon=org.building.coordinates["lon"]),
+            ),
+            industries=org.industries,
+            distance=org.distance,
+        )
+        for org in page
+    ]
+    paginated = PaginatedResource(items=dtos, page=1, page_items=len(dtos), has_more=True, next_cursor=None)
+    return JSONResponse(content=paginated.model_dump()).body
+
+
+def encode_with_orjson(page: list[Organization]) -> bytes:
+    """Encode a page like the routes do: entities straight to bytes with orjson."""
+    content = {
+        "items": [map_organization_to_content(org) for org in page],
+        "page": 1,
+        "page_items": len(page),
+        "has_more": True,
+        "next_cursor": None,
+    }
+    return ORJSONResponse(content=content).body
+
+
+ENCODERS = {"dto_stdlib_json": encode_with_dtos, "orjson_entities": encode_with_orjson}
+
+
+def main(
+    items: int = typer.Option(1000, min=1, help="Organizations per page"),
+    runs: int = typer.Option(50, min=1, help="Measured encodings per encoder"),
+    seed: int = typer.Option(42, help="Random seed of the generated page"),
+):
+    page = generate_page(items, seed)
+    if encode_with_dtos(page) != encode_with_orjson(page):
+        typer.echo("The encoders produce different JSON", err=True)
+        raise typer.Exit(code=1)
+
+    baseline = None
+    for name, encode in ENCODERS.items():
+        encode(page)
+        timings = []
+        for _ in range(runs):
+            started = time.process_time()
+            encode(page)
+            timings.append(time.process_time() - started)
+        median = statistics.median(timings) * 1000
+        baseline = baseline or median
+        typer.echo(f"{name:<18} {median:8.2f} ms CPU per {items}-item page  ({median / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,81 @@
+"""
+Benchmark searches answered by the in-memory directory snapshot against the SQL repository.
+
+Builds the snapshot from the database in DB_URL, then runs the scenarios of `run.py` through
+`OrganizationService.find_organizations` with both repositories, and reports p50/p95 latencies, besides the time and
+memory the snapshot takes:
+
+    python benchmarks/snapshot.py --runs 50
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import typer
+
+from run import ROOT, SCENARIOS
+
+sys.path.insert(0, str(ROOT / "src"))
+
+from api.v1.dto import GetOrganizationsQueryParams  # noqa: E402
+from core.services import OrganizationService  # noqa: E402
+from infrastructure.di.container import Container  # noqa: E402
+from infrastructure.persistence.db.repositories import OrganizationRepositoryImpl  # noqa: E402
+from infrastructure.persistence.snapshot import SnapshotOrganizationRepositoryImpl, SnapshotStore  # noqa: E402
+
+
+def _summary(timings: list[float]) -> str:
+    p95 = statistics.quantiles(timings, n=20, method="inclusive")[18] if len(timings) > 1 else timings[0]
+    return f"p50 {statistics.median(timings) * 1000:8.2f} ms  p95 {p95 * 1000:8.2f} ms"
+
+
+async def run_benchmark(*, runs: int, warmup: int, scenarios: list[str]) -> None:
+    container = Container()
+    session_factory = container.async_session_factory()
+    store = SnapshotStore(session_factory=session_factory)
+
+    await store.rebuild()
+    stats = store.stats()
+    typer.echo(
+        f"Snapshot of {stats.organizations} organizations and {stats.buildings} buildings built in "
+        f"{stats.build_seconds:.2f} s, {stats.memory_bytes / 2**20:.1f} MiB"
+    )
+
+    try:
+        for name in scenarios:
+            query = GetOrganizationsQueryParams.model_validate(SCENARIOS[name])
+            params = query.model_dump(exclude_none=True, exclude={"fields"})
+            for label in ("sql", "snapshot"):
+                timings = []
+                for run in range(warmup + runs):
+                    async with session_factory() as session:
+                        repository = (
+                            OrganizationRepositoryImpl(session)
+                            if label == "sql"
+                            else SnapshotOrganizationRepositoryImpl(store)
+                        )
+                        service = OrganizationService(organization_repository=repository)
+                        started = time.perf_counter()
+                        await service.find_organizations(**params, fields=query.fields)
+                        if run >= warmup:
+                            timings.append(time.perf_counter() - started)
+                typer.echo(f"{name:<28} {label:<9} {_summary(timings)}")
+    finally:
+        await container.db_engine().dispose()
+
+
+def main(
+    runs: int = typer.Option(20, min=1, help="Measured searches per scenario"),
+    warmup: int = typer.Option(3, min=0, help="Unmeasured searches per scenario"),
+    scenario: list[str] = typer.Option(list(SCENARIOS), help="Scenarios of run.py to run (repeatable)"),
+):
+    unknown = set(scenario) - set(SCENARIOS)
+    if unknown:
+        raise typer.BadParameter(f"Unknown scenarios: {', '.join(sorted(unknown))}", param_hint="--scenario")
+    asyncio.run(run_benchmark(runs=runs, warmup=warmup, scenarios=scenario))
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,82 @@
+"""
+Benchmark geo filters answered by the in-memory spatial index against PostGIS.
+
+Loads the index from the database in DB_URL, then runs the lat/lon and polygon scenarios of `run.py` through
+`OrganizationService.find_organizations` with and without the index, and reports p50/p95 latencies, besides the
+time and memory the index takes:
+
+    python benchmarks/spatial_index.py --runs 50
+"""
+
+import asyncio
+import statistics
+import sys
+import time
+
+import typer
+
+from run import ROOT, SCENARIOS
+
+sys.path.insert(0, str(ROOT / "src"))
+
+from api.v1.dto import GetOrganizationsQueryParams  # noqa: E402
+from core.services import OrganizationService  # noqa: E402
+from infrastructure.di.container import Container  # noqa: E402
+from infrastructure.persistence.db.repositories import OrganizationRepositoryImpl  # noqa: E402
+from infrastructure.spatial import BuildingSpatialIndex  # noqa: E402
+
+GEO_SCENARIOS = [name for name, params in SCENARIOS.items() if "lat" in params or "polygon" in params]
+
+
+def _summary(timings: list[float]) -> str:
+    p95 = statistics.quantiles(timings, n=20, method="inclusive")[18] if len(timings) > 1 else timings[0]
+    return f"p50 {statistics.median(timings) * 1000:8.2f} ms  p95 {p95 * 1000:8.2f} ms"
+
+
+async def run_benchmark(*, runs: int, warmup: int, cell_size: float, scenarios: list[str]) -> None:
+    container = Container()
+    session_factory = container.async_session_factory()
+    spatial_index = BuildingSpatialIndex(session_factory=session_factory, cell_size=cell_size)
+
+    started = time.perf_counter()
+    await spatial_index.refresh()
+    stats = spatial_index.stats()
+    typer.echo(
+        f"Index of {stats.buildings} buildings in {stats.cells} cells loaded in "
+        f"{time.perf_counter() - started:.2f} s, {stats.memory_bytes / 2**20:.1f} MiB"
+    )
+
+    try:
+        for name in scenarios:
+            query = GetOrganizationsQueryParams.model_validate(SCENARIOS[name])
+            params = query.model_dump(exclude_none=True, exclude={"fields"})
+            for label, index in (("postgis", None), ("index", spatial_index)):
+                timings = []
+                for run in range(warmup + runs):
+                    async with session_factory() as session:
+                        service = OrganizationService(
+                            organization_repository=OrganizationRepositoryImpl(session), spatial_index=index
+                        )
+                        started = time.perf_counter()
+                        await service.find_organizations(**params, fields=query.fields)
+                        if run >= warmup:
+                            timings.append(time.perf_counter() - started)
+                typer.echo(f"{name:<28} {label:<8} {_summary(timings)}")
+    finally:
+        await container.db_engine().dispose()
+
+
+def main(
+    runs: int = typer.Option(20, min=1, help="Measured searches per scenario"),
+    warmup: int = typer.Option(3, min=0, help="Unmeasured searches per scenario"),
+    cell_size: float = typer.Option(0.01, min=0.0001, help="Grid cell size in degrees"),
+    scenario: list[str] = typer.Option(GEO_SCENARIOS, help="Scenarios of run.py to run (repeatable)"),
+):
+    unknown = set(scenario) - set(GEO_SCENARIOS)
+    if unknown:
+        raise typer.BadParameter(f"Unknown geo scenarios: {', '.join(sorted(unknown))}", param_hint="--scenario")
+    asyncio.run(run_benchmark(runs=runs, warmup=warmup, cell_size=cell_size, scenarios=scenario))
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,85 @@
+from urllib.parse import parse_qsl
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from api.v1.dto import OrganizationFilterParams
+from infrastructure.observability import RequestTimings, collect_timings, observe_request, stage_durations
+from infrastructure.persistence.db.session import ScopedSessions
+
+# Query parameters that filter organizations; the combination in use labels request metrics
+FILTER_PARAMS = frozenset(OrganizationFilterParams.model_fields) - {"order_by", "radius_m", "include_subindustries"}
+
+
+class DbSessionMiddleware:
+    """
+    Scopes database sessions to requests: a request shares one session, and another one at most for facet counts,
+    all closed once its response is sent.
+    """
+
+    def __init__(self, app: ASGIApp, sessions: ScopedSessions):
+        self.app = app
+        self.sessions = sessions
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async with self.sessions.scope():
+            await self.app(scope, receive, send)
+
+
+class TimingMiddleware:
+    """
+    Collects per-request SQL counts and durations and stage timings. They are sent in a `Server-Timing` header
+    (when enabled) and recorded as Prometheus histograms labelled by route and by the filters in use.
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        duration = None
+
+        async def send_with_timings(message: Message) -> None:
+            nonlocal status, duration
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                duration = timings.elapsed()
+                if self.server_timing:
+                    MutableHeaders(scope=message).append("Server-Timing", server_timing_header(timings, duration))
+            await send(message)
+
+        filters = active_filters(scope)
+        with collect_timings(path=scope["path"], filters=filters) as timings:
+            try:
+                await self.app(scope, receive, send_with_timings)
+            finally:
+                route = scope.get("route")
+                observe_request(
+                    timings,
+                    method=scope["method"],
+                    route=route.path if route is not None else "unmatched",
+                    status=status,
+                    filters=filters,
+                    duration=duration if duration is not None else timings.elapsed(),
+                )
+
+
+def active_filters(scope: Scope) -> str:
+    names = {name for name, _ in parse_qsl(scope.get("query_string", b"").decode("latin-1"))} & FILTER_PARAMS
+    return ",".join(sorted(names)) or "none"
+
+
+def server_timing_header(timings: RequestTimings, duration: float) -> str:
+    metrics = [f'db;dur={timings.db_seconds * 1000:.2f};desc="{timings.db_queries} queries"']
+    metrics.extend(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in stage_durations(timings).items())
+    metrics.append(f"total;dur={duration * 1000:.2f}")
+    return ", ".join(metrics)
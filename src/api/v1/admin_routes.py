@@ -0,0 +1,201 @@
+import secrets
+from dataclasses import asdict
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from dependency_injector.wiring import Provide, inject
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from config.settings import settings
+from core.importing import InvalidImportRecordError
+from core.services import OrganizationImportService
+from infrastructure.autocomplete import AutocompleteIndex
+from infrastructure.cache import ResponseCache
+from infrastructure.di.container import Container
+from infrastructure.observability import SlowQueryLog
+from infrastructure.persistence.db.replicas import ReplicaRouter
+from infrastructure.persistence.snapshot import SnapshotStore
+from infrastructure.spatial import BuildingSpatialIndex
+
+
+def require_admin(
+    credentials: Annotated[HTTPAuthorizationCredentials | None, Depends(HTTPBearer(auto_error=False))],
+) -> None:
+    """Let through requests bearing ADMIN_TOKEN. Without one configured the admin endpoints are disabled."""
+    if settings.admin_token is None:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled, set ADMIN_TOKEN to enable them")
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.admin_token.get_secret_value().encode()
+    ):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+
+router = APIRouter(
+    prefix="/v1/admin",
+    tags=["admin"],
+    dependencies=[Depends(require_admin)],
+)
+
+
+@router.get(
+    "/cache",
+    summary="Response cache statistics",
+    description="Hit, miss, eviction and invalidation counters of the organization search response cache.",
+    operation_id="getCacheStats",
+)
+@inject
+async def get_cache_stats(
+    response_cache: ResponseCache | None = Depends(Provide[Container.response_cache]),
+) -> dict:
+    if response_cache is None:
+        return {"backend": "none"}
+    return {"backend": settings.cache_backend, **asdict(response_cache.stats())}
+
+
+@router.get(
+    "/db/pool",
+    summary="Database connection pool statistics",
+    description=(
+        "Connections of this worker's pool: checked out, idle and overflow, with the number of checkouts, "
+        "checkout timeouts and the time spent waiting for a connection."
+    ),
+    operation_id="getDbPoolStats",
+)
+@inject
+async def get_db_pool_stats(db_engine: AsyncEngine = Depends(Provide[Container.db_engine])) -> dict:
+    return asdict(db_engine.pool.stats())
+
+
+@router.get(
+    "/db/replicas",
+    summary="Read replica status",
+    description="Health, replication lag and checked out connections of the read replicas searches are spread over.",
+    operation_id="getDbReplicas",
+)
+@inject
+async def get_db_replicas(replica_router: ReplicaRouter = Depends(Provide[Container.replica_router])) -> list[dict]:
+    return [asdict(status) for status in replica_router.status()]
+
+
+@router.get(
+    "/spatial-index",
+    summary="Spatial index status",
+    description="Buildings, grid cells, memory and last refresh of the worker's in-memory index of building locations.",
+    operation_id="getSpatialIndexStats",
+)
+@inject
+async def get_spatial_index_stats(
+    spatial_index: BuildingSpatialIndex | None = Depends(Provide[Container.spatial_index]),
+) -> dict:
+    if spatial_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **asdict(spatial_index.stats())}
+
+
+@router.get(
+    "/autocomplete",
+    summary="Autocomplete index status",
+    description="Names, keys, memory and last refresh of the worker's in-memory index of names for `/v1/autocomplete`.",
+    operation_id="getAutocompleteStats",
+)
+@inject
+async def get_autocomplete_stats(
+    autocomplete_index: AutocompleteIndex | None = Depends(Provide[Container.autocomplete_index]),
+) -> dict:
+    if autocomplete_index is None:
+        return {"enabled": False}
+    return {"enabled": True, **asdict(autocomplete_index.stats())}
+
+
+@router.get(
+    "/snapshot",
+    summary="Directory snapshot status",
+    description=(
+        "Size, memory and last build of the worker's in-memory directory snapshot, "
+        "when organizations are read from it (`ORGANIZATION_REPOSITORY=snapshot`)."
+    ),
+    operation_id="getSnapshotStats",
+)
+@inject
+async def get_snapshot_stats(
+    snapshot_store: SnapshotStore | None = Depends(Provide[Container.snapshot_store]),
+) -> dict:
+    if snapshot_store is None:
+        return {"enabled": False}
+    return {"enabled": True, **asdict(snapshot_store.stats())}
+
+
+@router.get(
+    "/slow-queries",
+    summary="Slow SQL statements",
+    description=(
+        "The most recent SQL statements of this worker slower than the configured threshold, newest first, "
+        "with the request path and filters that issued them and their `EXPLAIN (ANALYZE, BUFFERS)` plan. "
+        "Parameters are null unless `SLOW_QUERY_LOG_PARAMETERS` is set. "
+        "`by_filters` counts them per filter combination. "
+        "Empty unless `SLOW_QUERY_LOG_ENABLED` is set."
+    ),
+    operation_id="getSlowQueries",
+)
+@inject
+async def get_slow_queries(
+    slow_query_log: SlowQueryLog | None = Depends(Provide[Container.slow_query_log]),
+) -> dict:
+    if slow_query_log is None:
+        return {"enabled": False, "by_filters": {}, "queries": []}
+
+    queries = slow_query_log.entries()
+    by_filters = {}
+    for query in queries:
+        summary = by_filters.setdefault(query.filters or "none", {"count": 0, "max_duration_ms": 0.0})
+        summary["count"] += 1
+        summary["max_duration_ms"] = max(summary["max_duration_ms"], query.duration_ms)
+    return {
+        "enabled": True,
+        "threshold_ms": slow_query_log.threshold_ms,
+        "by_filters": by_filters,
+        "queries": [asdict(query) for query in queries],
+    }
+
+
+@router.delete(
+    "/slow-queries",
+    summary="Clear the slow SQL statements",
+    status_code=204,
+    operation_id="clearSlowQueries",
+)
+@inject
+async def clear_slow_queries(
+    slow_query_log: SlowQueryLog | None = Depends(Provide[Container.slow_query_log]),
+) -> None:
+    if slow_query_log is not None:
+        slow_query_log.clear()
+
+
+@router.post(
+    "/import",
+    summary="Bulk import organizations",
+    description=(
+        "Load organizations with their buildings, phones and industries from the request body, "
+        "as NDJSON or CSV in the formats of `/v1/organizations/export`. "
+        "Organizations and buildings are upserted by ID, phones and industry links of imported organizations "
+        "are replaced, and industries are matched by name. The import runs in a single transaction."
+    ),
+    responses={
+        200: {"description": "Import counters"},
+        422: {"description": "Invalid record or conflicting organization names, nothing was imported"},
+    },
+    operation_id="importOrganizations",
+)
+@inject
+async def import_organizations(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    organization_import_service: OrganizationImportService = Depends(Provide[Container.organization_import_service]),
+) -> dict:
+    try:
+        result = await organization_import_service.import_organizations(request.stream(), format=format)
+    except InvalidImportRecordError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return asdict(result)
@@ -0,0 +1,39 @@
+"""Conditional GET support: ETags from data versions, or hashing response bodies when there is no version."""
+
+import hashlib
+
+from fastapi.responses import Response
+
+
+def make_etag(*parts: str | bytes) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode() if isinstance(part, str) else part)
+        digest.update(b"\0")
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag, as required for GET."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def conditional_response(response: Response, if_none_match: str | None, etag: str | None = None) -> Response:
+    """
+    Tag a response with `etag`, the version ETag of its data, or with the ETag of its body when there is none,
+    and replace it with a 304 when If-None-Match matches either of them.
+    The body hash is a fallback: a matching version was answered before any search, so only the transfer is saved.
+    """
+    body_etag = make_etag(response.body)
+    if etag_matches(if_none_match, body_etag) or (etag is not None and etag_matches(if_none_match, etag)):
+        return not_modified_response(etag or body_etag)
+    response.headers["ETag"] = etag or body_etag
+    return response
@@ -1,8 +1,18 @@
-from typing import TypedDict
+import hashlib
+import json
+import math
+from typing import Literal, TypedDict
 
 from pydantic import BaseModel, Field, field_validator, model_validator
 
+from config.settings import settings
 from core.entities import Point
+from core.pagination import decode_cursor
+
+# Most grid cells a cluster request may span
+MAX_CLUSTER_CELLS = 10_000
+# Cells across a 256 px map tile at the zoom level requested, so that clusters are about 64 px apart on screen
+CELLS_PER_TILE = 4
 
 
 class PointDTO(TypedDict):
@@ -22,23 +32,90 @@ class OrganizationDTO(BaseModel):
     phones: list[str] = Field(description="List of phone numbers")
     building: BuildingDTO = Field(description="Building information")
     industries: list[str] = Field(description="List of industry names")
+    distance: float | None = Field(None, description="Distance in meters to the searched point (lat/lon searches only)")
+
+
+class BatchGetOrganizationsRequest(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=5000, description="Organization IDs to fetch (at most 5000)")
+
+
+class BatchGetOrganizationResult(BaseModel):
+    id: int = Field(description="Requested organization ID")
+    found: bool = Field(description="Whether the organization exists")
+    organization: OrganizationDTO | None = Field(description="The organization, null when not found")
+
+
+class BatchGetOrganizationsResponse(BaseModel):
+    results: list[BatchGetOrganizationResult] = Field(description="One result per requested ID, in request order")
+
+
+class AutocompleteQueryParams(BaseModel):
+    model_config = {"extra": "forbid"}
+
+    q: str = Field(min_length=1, max_length=100, description="Text typed so far, matched against the start of words")
+    limit: int = Field(
+        10,
+        ge=1,
+        le=settings.autocomplete_max_suggestions,
+        description=f"Suggestions of each kind (at most {settings.autocomplete_max_suggestions})",
+    )
+
+
+class AutocompleteSuggestionDTO(BaseModel):
+    id: int = Field(description="Organization or industry unique identifier")
+    name: str = Field(description="Organization or industry name")
+
+
+class AutocompleteResponse(BaseModel):
+    organizations: list[AutocompleteSuggestionDTO] = Field(description="Suggested organizations, best first")
+    industries: list[AutocompleteSuggestionDTO] = Field(description="Suggested industries, best first")
 
 
 class PaginatedResource[T](BaseModel):
     items: list[T] = Field(description="List of items on the current page")
-    page: int = Field(description="Current page number")
+    page: int | None = Field(description="Current page number, null when the page was requested by cursor")
     page_items: int = Field(description="Number of items on the current page")
     has_more: bool = Field(description="Whether there are more pages available")
+    next_cursor: str | None = Field(
+        None, description="Opaque cursor for the next page, pass it as `cursor`. Null on the last page"
+    )
+
+
+class IndustryFacetDTO(BaseModel):
+    id: int = Field(description="Industry unique identifier")
+    name: str = Field(description="Industry name")
+    parent_id: int | None = Field(description="Parent industry identifier, null for top-level industries")
+    count: int = Field(description="Matching organizations listed under the industry or any of its subindustries")
+
+
+class SearchFacetsDTO(BaseModel):
+    industry: list[IndustryFacetDTO] | None = Field(
+        None, description="Industries of the matching organizations, most organizations first"
+    )
+
+
+class OrganizationSearchResponse(PaginatedResource[OrganizationDTO]):
+    facets: SearchFacetsDTO | None = Field(
+        None, description="Counts over all matching organizations, only returned when requested by `facets`"
+    )
 
 
-class GetOrganizationsQueryParams(BaseModel):
+class OrganizationAttributeFilterParams(BaseModel):
     model_config = {"extra": "forbid"}
 
     building_id: int | None = Field(None, description="Filter by building ID (exact match)")
     industry_id: int | None = Field(None, description="Filter by industry ID (exact match)")
-    industry_name: str | None = Field(None, description="Filter by industry name (partial match)")
+    include_subindustries: bool = Field(
+        False, description="With industry_id, also match organizations in any descendant industry"
+    )
+    industry_name: str | None = Field(
+        None, description="Filter by industry name (partial match on the industry or any of its parents)"
+    )
     organization_name: str | None = Field(None, description="Filter by organization name (partial match)")
     address: str | None = Field(None, description="Filter by address (partial match)")
+
+
+class OrganizationFilterParams(OrganizationAttributeFilterParams):
     polygon: list[tuple[float, float]] | None = Field(
         None,
         description="Filter by geographic polygon - list of comma-separated 'lat,lon' coordinates. Minimum 3 points required. Example: ?polygon=40.730,-73.936&polygon=40.730,-73.934",
@@ -49,8 +126,16 @@ class GetOrganizationsQueryParams(BaseModel):
     lon: float | None = Field(
         None, description="Longitude for point-based filtering. Must be provided together with lat."
     )
-    page: int = Field(gt=0, default=1, description="Page number (must be greater than 0)")
-    items_per_page: int = Field(gt=0, default=50, description="Number of items per page (must be greater than 0)")
+    radius_m: float | None = Field(
+        None, gt=0, description="Search radius in meters around lat/lon (default 100). Requires lat and lon."
+    )
+    order_by: Literal["name", "relevance", "distance"] = Field(
+        "name",
+        description=(
+            "Result ordering. `relevance` ranks by similarity to organization_name and/or address, "
+            "`distance` puts the organizations nearest to lat/lon first."
+        ),
+    )
 
     @field_validator("polygon", mode="before")
     @classmethod
@@ -82,7 +167,7 @@ class GetOrganizationsQueryParams(BaseModel):
         if (self.lat is None) != (self.lon is None):
             raise ValueError("Both lat and lon must be provided together, or neither.")
 
-        if self.lat and self.lon and self.polygon:
+        if self.lat is not None and self.polygon:
             raise ValueError(
                 "Cannot use both point-based (lat/lon) and polygon-based filters together. "
                 "Use either lat/lon or polygon."
@@ -91,4 +176,143 @@ class GetOrganizationsQueryParams(BaseModel):
         if self.polygon and len(self.polygon) < 3:
             raise ValueError("A polygon should have at least 3 points.")
 
+        if self.radius_m is not None and self.lat is None:
+            raise ValueError("radius_m requires lat and lon.")
+
+        if self.order_by == "distance" and self.lat is None:
+            raise ValueError("order_by=distance requires lat and lon.")
+
+        if self.order_by == "relevance" and not (self.organization_name or self.address):
+            raise ValueError("order_by=relevance requires organization_name or address.")
+
+        return self
+
+
+class OrganizationFieldsParams(BaseModel):
+    model_config = {"extra": "forbid"}
+
+    fields: list[str] | None = Field(
+        None,
+        description=(
+            "Comma-separated organization fields to return, e.g. `fields=id,name,building` for map markers. "
+            "`id` is always returned. Relations that are not requested are not loaded. All fields by default."
+        ),
+    )
+
+    @field_validator("fields", mode="before")
+    @classmethod
+    def split_fields(cls, v: any):
+        if isinstance(v, str):
+            v = [v]
+        if isinstance(v, list):
+            return [name.strip() for item in v for name in str(item).split(",") if name.strip()]
+        return v
+
+    @field_validator("fields")
+    @classmethod
+    def validate_fields(cls, v: list[str] | None):
+        if v is None:
+            return v
+        unknown = set(v) - set(OrganizationDTO.model_fields)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return sorted({"id", *v})
+
+
+class GetOrganizationsQueryParams(OrganizationFilterParams, OrganizationFieldsParams):
+    page: int = Field(gt=0, default=1, description="Page number (must be greater than 0)")
+    items_per_page: int = Field(gt=0, default=50, description="Number of items per page (must be greater than 0)")
+    cursor: str | None = Field(
+        None,
+        description="Opaque cursor from `next_cursor` of the previous page. Cannot be combined with `page`.",
+    )
+    facets: Literal["industry"] | None = Field(
+        None,
+        description=(
+            "`industry` to also count the matching organizations of all pages per industry, each counted towards "
+            "its industries and their parent industries, in `facets.industry`."
+        ),
+    )
+
+    @field_validator("cursor")
+    @classmethod
+    def validate_cursor(cls, v: str | None):
+        if v is not None:
+            decode_cursor(v)
+        return v
+
+    def cache_key(self) -> str:
+        """Key identifying the search result, equal for queries whose text filters differ only in case."""
+        params = self.model_dump(exclude_none=True)
+        for name in ("industry_name", "organization_name", "address"):
+            if name in params:
+                params[name] = params[name].casefold()
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+        return f"organizations:{digest}"
+
+    @model_validator(mode="after")
+    def validate_pagination(self):
+        if self.cursor and "page" in self.model_fields_set:
+            raise ValueError("Cannot use both page and cursor. Use either page or cursor.")
+
         return self
+
+
+class ExportOrganizationsQueryParams(OrganizationFilterParams):
+    format: Literal["ndjson", "csv"] = Field(
+        "ndjson", description="Export format: newline-delimited JSON (one organization per line) or CSV"
+    )
+
+
+class ClusterOrganizationsQueryParams(OrganizationAttributeFilterParams):
+    min_lat: float = Field(ge=-90, le=90, description="Southern edge of the bounding box")
+    min_lon: float = Field(ge=-180, le=180, description="Western edge of the bounding box")
+    max_lat: float = Field(ge=-90, le=90, description="Northern edge of the bounding box")
+    max_lon: float = Field(ge=-180, le=180, description="Eastern edge of the bounding box")
+    zoom: int | None = Field(
+        None,
+        ge=0,
+        le=22,
+        description=(
+            f"Map zoom level, for cells of 360 / 2^zoom / {CELLS_PER_TILE} degrees ({CELLS_PER_TILE} across a web map "
+            "tile). Either zoom or cell_size is required."
+        ),
+    )
+    cell_size: float | None = Field(None, gt=0, le=90, description="Grid cell size in degrees")
+
+    @model_validator(mode="after")
+    def validate_grid(self):
+        if self.min_lat >= self.max_lat or self.min_lon >= self.max_lon:
+            raise ValueError("The bounding box needs min_lat < max_lat and min_lon < max_lon.")
+
+        if (self.zoom is None) == (self.cell_size is None):
+            raise ValueError("Provide either zoom or cell_size.")
+
+        size = self.grid_size()
+        cells = math.ceil((self.max_lat - self.min_lat) / size) * math.ceil((self.max_lon - self.min_lon) / size)
+        if cells > MAX_CLUSTER_CELLS:
+            raise ValueError(
+                f"The bounding box spans {cells} cells, more than {MAX_CLUSTER_CELLS}. "
+                "Use a lower zoom or a larger cell_size."
+            )
+
+        return self
+
+    def grid_size(self) -> float:
+        """Return the cell size in degrees."""
+        if self.cell_size is not None:
+            return self.cell_size
+        return 360 / 2**self.zoom / CELLS_PER_TILE
+
+
+class OrganizationClusterDTO(BaseModel):
+    lat: float = Field(description="Latitude of the centroid of the organizations' buildings")
+    lon: float = Field(description="Longitude of the centroid of the organizations' buildings")
+    count: int = Field(description="Number of organizations in the cell")
+    organization_id: int | None = Field(description="The organization, when the cell holds only one")
+
+
+class OrganizationClustersResponse(BaseModel):
+    cell_size: float = Field(description="Grid cell size in degrees")
+    total: int = Field(description="Number of organizations in the bounding box")
+    clusters: list[OrganizationClusterDTO] = Field(description="Cells holding organizations, south to north")
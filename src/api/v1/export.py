@@ -0,0 +1,70 @@
+"""Streaming renderers for organization exports."""
+
+import csv
+import io
+from collections.abc import AsyncIterator
+
+import orjson
+
+from core.entities import Organization
+from core.importing import CSV_LIST_SEPARATOR
+
+CSV_COLUMNS = ("id", "name", "phones", "building_id", "address", "lat", "lon", "industries", "distance")
+
+# Organizations rendered per chunk written to the response
+CHUNK_SIZE = 100
+
+
+async def _chunks(lines: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    chunk = []
+    async for line in lines:
+        chunk.append(line)
+        if len(chunk) >= CHUNK_SIZE:
+            yield b"".join(chunk)
+            chunk = []
+    if chunk:
+        yield b"".join(chunk)
+
+
+async def ndjson_export(organizations: AsyncIterator[Organization]) -> AsyncIterator[bytes]:
+    """Render organizations as newline-delimited JSON, one `OrganizationDTO` per line."""
+
+    async def lines():
+        async for org in organizations:
+            yield orjson.dumps(org, option=orjson.OPT_APPEND_NEWLINE)
+
+    async for chunk in _chunks(lines()):
+        yield chunk
+
+
+async def csv_export(organizations: AsyncIterator[Organization]) -> AsyncIterator[bytes]:
+    """Render organizations as CSV with a header row; phones and industries are joined into one cell each."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(row) -> bytes:
+        writer.writerow(row)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value.encode()
+
+    async def lines():
+        yield line(CSV_COLUMNS)
+        async for org in organizations:
+            yield line(
+                (
+                    org.id,
+                    org.name,
+                    CSV_LIST_SEPARATOR.join(org.phones),
+                    org.building.id,
+                    org.building.address,
+                    org.building.coordinates["lat"],
+                    org.building.coordinates["lon"],
+                    CSV_LIST_SEPARATOR.join(org.industries),
+                    "" if org.distance is None else org.distance,
+                )
+            )
+
+    async for chunk in _chunks(lines()):
+        yield chunk
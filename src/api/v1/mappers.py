@@ -1,24 +1,19 @@
 """Mappers for converting domain entities to presentation DTOs."""
 
-from api.v1.dto import BuildingDTO, OrganizationDTO, PointDTO
-from core.entities import Building, Organization
+from collections.abc import Collection
 
+from api.v1.dto import OrganizationDTO
+from core.entities import Organization
 
-def map_organization_to_dto(organization: Organization) -> OrganizationDTO:
-    """Map domain Organization entity to OrganizationDTO."""
-    return OrganizationDTO(
-        id=organization.id,
-        name=organization.name,
-        phones=organization.phones,
-        building=map_building_to_dto(organization.building),
-        industries=organization.industries,
-    )
 
-
-def map_building_to_dto(building: Building) -> BuildingDTO:
-    """Map domain Building entity to BuildingDTO."""
-    return BuildingDTO(
-        id=building.id,
-        address=building.address,
-        coordinates=PointDTO(lat=building.coordinates["lat"], lon=building.coordinates["lon"]),
-    )
+def map_organization_to_content(
+    organization: Organization, fields: Collection[str] | None = None
+) -> Organization | dict:
+    """
+    Map domain Organization entity to the content of an OrganizationDTO JSON object, for orjson responses.
+    The entity has the DTO's shape and orjson encodes dataclasses natively, so it is used as is;
+    with `fields` only those are picked.
+    """
+    if fields is None:
+        return organization
+    return {name: getattr(organization, name) for name in OrganizationDTO.model_fields if name in fields}
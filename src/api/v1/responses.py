@@ -0,0 +1,20 @@
+"""Responses built from JSON documents rendered by the database."""
+
+import orjson
+
+from fastapi.responses import Response
+
+
+def json_document_response(document: str, status_code: int = 200) -> Response:
+    return Response(content=document, status_code=status_code, media_type="application/json")
+
+
+def json_documents_response(documents: list[str], status_code: int = 200, **fields) -> Response:
+    """
+    Wrap pre-rendered item documents into a JSON object as `items`, without decoding them.
+    The other `fields` are encoded by orjson, so they can hold dataclasses.
+    """
+    head = orjson.dumps(fields).decode()[:-1]
+    separator = "," if fields else ""
+    body = f'{head}{separator}"items": [{",".join(documents)}]}}'
+    return Response(content=body, status_code=status_code, media_type="application/json")
@@ -1,12 +1,35 @@
+from collections.abc import Awaitable
 from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, Query, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Header, HTTPException, Query, Depends
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from dependency_injector.wiring import Provide, inject
 
-from api.v1.dto import GetOrganizationsQueryParams, OrganizationDTO, PaginatedResource
-from api.v1.mappers import map_organization_to_dto
+from api.v1.conditional import conditional_response, etag_matches, make_etag, not_modified_response
+from api.v1.dto import (
+    AutocompleteQueryParams,
+    AutocompleteResponse,
+    BatchGetOrganizationsRequest,
+    BatchGetOrganizationsResponse,
+    ClusterOrganizationsQueryParams,
+    ExportOrganizationsQueryParams,
+    GetOrganizationsQueryParams,
+    OrganizationClustersResponse,
+    OrganizationDTO,
+    OrganizationFieldsParams,
+    OrganizationFilterParams,
+    OrganizationSearchResponse,
+)
+from api.v1.export import csv_export, ndjson_export
+from api.v1.mappers import map_organization_to_content
+from api.v1.responses import json_document_response, json_documents_response
+from config.settings import settings
+from core.pagination import InvalidCursorError
 from core.services import OrganizationService
+from core.services.organization_service import PaginatedResult
+from infrastructure.autocomplete import AutocompleteIndex
+from infrastructure.cache import ResponseCache
+from infrastructure.observability import timed
 from infrastructure.di.container import Container
 
 
@@ -15,6 +38,127 @@ router = APIRouter(
 )
 
 
+@router.get(
+    "/autocomplete",
+    summary="Autocomplete organization and industry names",
+    description=(
+        "Suggest organizations and industries as a name is typed, with their IDs and names only. "
+        "A name matches when one of its words starts with `q`, ignoring case and diacritics. "
+        "Names starting with `q` come first, then the most popular ones: industries with the most organizations "
+        "(subindustries included) and organizations listed under the most industries. "
+        "Suggestions come from an in-memory index refreshed in the background, so recent changes may take "
+        "a few seconds to show."
+    ),
+    response_description="Suggested organizations and industries, best first.",
+    responses={
+        200: {"description": "Success"},
+        422: {"description": "Validation error - empty query or limit out of range"},
+        503: {"description": "The autocomplete index is disabled or not loaded yet"},
+    },
+    tags=["autocomplete"],
+    operation_id="autocomplete",
+)
+@inject
+async def autocomplete(
+    query: Annotated[AutocompleteQueryParams, Query()],
+    autocomplete_index: AutocompleteIndex | None = Depends(Provide[Container.autocomplete_index]),
+) -> AutocompleteResponse:
+    if autocomplete_index is None or not autocomplete_index.ready:
+        raise HTTPException(status_code=503, detail="Autocomplete is not available", headers={"Retry-After": "5"})
+
+    # Suggestions are dataclasses, encoded by orjson in the shape of AutocompleteResponse
+    return ORJSONResponse(
+        content={
+            "organizations": autocomplete_index.suggest_organizations(query.q, limit=query.limit),
+            "industries": autocomplete_index.suggest_industries(query.q, limit=query.limit),
+        },
+        status_code=200,
+    )
+
+
+EXPORT_FORMATS = {
+    "ndjson": (ndjson_export, "application/x-ndjson"),
+    "csv": (csv_export, "text/csv; charset=utf-8"),
+}
+
+
+@router.get(
+    "/organizations/export",
+    summary="Export organizations",
+    description=(
+        "Stream all organizations matching the same filters as the search endpoint, without pagination, "
+        "as newline-delimited JSON or CSV. Rows are read from the database through a server-side cursor, "
+        "so exports of any size are served with constant memory."
+    ),
+    response_description="The matching organizations, one per line.",
+    responses={
+        200: {
+            "description": "Success",
+            "content": {"application/x-ndjson": {}, "text/csv": {}},
+        },
+        422: {"description": "Validation error - invalid filter combinations or parameters"},
+    },
+    tags=["organizations"],
+    operation_id="exportOrganizations",
+)
+@inject
+async def export_organizations(
+    export_query: Annotated[ExportOrganizationsQueryParams, Query()],
+    organization_service: OrganizationService = Depends(Provide[Container.organization_service]),
+) -> StreamingResponse:
+    render, media_type = EXPORT_FORMATS[export_query.format]
+    organizations = organization_service.stream_organizations(
+        **export_query.model_dump(exclude_none=True, exclude={"format"}),
+        fetch_size=settings.export_fetch_size,
+    )
+    return StreamingResponse(
+        render(organizations),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="organizations.{export_query.format}"'},
+    )
+
+
+@router.get(
+    "/organizations/clusters",
+    summary="Cluster organizations on a map grid",
+    description=(
+        "Count the organizations inside a bounding box per cell of a grid, for map views too zoomed out for "
+        "individual markers. The grid is given by a map `zoom` level or a `cell_size` in degrees; each cell "
+        "holding organizations is returned with their number and the centroid of their buildings, and the id "
+        "of the organization when it is the only one. Accepts the building, industry, name and address filters "
+        "of the search endpoint. The payload grows with the number of cells, at most 10000, not with the "
+        "number of organizations. Boxes crossing the antimeridian have to be requested as two boxes."
+    ),
+    response_description="Cells holding organizations, with their counts and centroids.",
+    responses={
+        200: {"description": "Success"},
+        422: {"description": "Validation error - invalid bounding box, grid or filters"},
+    },
+    tags=["organizations"],
+    operation_id="clusterOrganizations",
+)
+@inject
+async def cluster_organizations(
+    cluster_query: Annotated[ClusterOrganizationsQueryParams, Query()],
+    organization_service: OrganizationService = Depends(Provide[Container.organization_service]),
+) -> OrganizationClustersResponse:
+    cell_size = cluster_query.grid_size()
+    clusters = await organization_service.cluster_organizations(
+        **cluster_query.model_dump(exclude_none=True, exclude={"zoom", "cell_size"}), cell_size=cell_size
+    )
+
+    # Entities are encoded as is, in the shape of OrganizationClustersResponse
+    with timed("serialize"):
+        return ORJSONResponse(
+            content={
+                "cell_size": cell_size,
+                "total": sum(cluster.count for cluster in clusters),
+                "clusters": clusters,
+            },
+            status_code=200,
+        )
+
+
 @router.get(
     "/organizations/{id}",
     summary="Get organization by ID",
@@ -22,6 +166,7 @@ router = APIRouter(
     response_description="The organization details including name, phones, building information, and industries.",
     responses={
         200: {"description": "Success"},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         404: {"description": "Organization not found"},
     },
     tags=["organizations"],
@@ -30,13 +175,68 @@ router = APIRouter(
 @inject
 async def get_organization(
     id: int,
+    fields_query: Annotated[OrganizationFieldsParams, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
     organization_service: OrganizationService = Depends(Provide[Container.organization_service]),
 ) -> OrganizationDTO:
-    org = await organization_service.find_organization_by_id(id)
+    if not settings.etags_enabled:
+        return await _get_organization(id, fields_query.fields, organization_service)
+
+    etag = None
+    if if_none_match:
+        # Answered from the version of the organization before loading it
+        version = await organization_service.get_organization_version(id)
+        if version is not None:
+            etag = make_etag(settings.organization_read_path, str(id), str(fields_query.fields), version)
+            if etag_matches(if_none_match, etag):
+                return not_modified_response(etag)
+    response = await _get_organization(id, fields_query.fields, organization_service)
+    return conditional_response(response, if_none_match, etag)
+
+
+async def _get_organization(id: int, fields: list[str] | None, organization_service: OrganizationService) -> Response:
+    if settings.organization_read_path == "json" and fields is None:
+        document = await organization_service.find_organization_document_by_id(id)
+        if document is None:
+            raise HTTPException(status_code=404, detail="Organization not found")
+        return json_document_response(document)
+
+    org = await organization_service.find_organization_by_id(id, fields=fields)
     if org is None:
         raise HTTPException(status_code=404, detail="Organization not found")
-    dto = map_organization_to_dto(org)
-    return JSONResponse(content=dto.model_dump(), status_code=200)
+    with timed("serialize"):
+        return ORJSONResponse(content=map_organization_to_content(org, fields), status_code=200)
+
+
+@router.post(
+    "/organizations:batchGet",
+    summary="Get many organizations by ID",
+    description=(
+        "Retrieve up to 5000 organizations by their IDs in a single request. "
+        "Results follow the order of the requested IDs; IDs that do not exist are marked with `found: false`."
+    ),
+    response_description="One result per requested ID.",
+    responses={
+        200: {"description": "Success"},
+        422: {"description": "Validation error - empty or too long list of IDs"},
+    },
+    tags=["organizations"],
+    operation_id="batchGetOrganizations",
+)
+@inject
+async def batch_get_organizations(
+    request: BatchGetOrganizationsRequest,
+    organization_service: OrganizationService = Depends(Provide[Container.organization_service]),
+) -> BatchGetOrganizationsResponse:
+    organizations = await organization_service.find_organizations_by_ids(request.ids)
+
+    # Shaped like BatchGetOrganizationsResponse
+    results = [
+        {"id": organization_id, "found": org is not None, "organization": org}
+        for organization_id, org in zip(request.ids, organizations)
+    ]
+    with timed("serialize"):
+        return ORJSONResponse(content={"results": results}, status_code=200)
 
 
 @router.get(
@@ -46,12 +246,18 @@ async def get_organization(
         "Retrieve a paginated list of organizations with optional filtering capabilities. "
         "Supports filtering by building ID, industry ID or name, organization name, address, "
         "geographic location (point or polygon), and pagination. "
+        "Point searches match buildings within `radius_m` meters of lat/lon and report each item's distance. "
+        "Results are ordered by name, relevance or distance. Pages can be requested by number (`page`) "
+        "or, for deep pages, by following `next_cursor` through the `cursor` parameter. "
         "Cannot use both point-based (lat/lon) and polygon-based filters together. "
-        "A polygon must have at least 3 points."
+        "A polygon must have at least 3 points. "
+        "With `facets=industry` the response also counts the organizations matching the filters on all pages per "
+        "industry, rolled up through parent industries, in a query running concurrently with the page one."
     ),
-    response_description="Paginated list of organizations matching the filter criteria.",
+    response_description="Paginated list of organizations matching the filter criteria, with the requested facets.",
     responses={
         200: {"description": "Success"},
+        304: {"description": "Not modified since the ETag in If-None-Match"},
         422: {"description": "Validation error - invalid filter combinations or parameters"},
     },
     tags=["organizations"],
@@ -60,17 +266,100 @@ async def get_organization(
 @inject
 async def find_organizations(
     filter_query: Annotated[GetOrganizationsQueryParams, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
     organization_service: OrganizationService = Depends(Provide[Container.organization_service]),
-) -> PaginatedResource[OrganizationDTO]:
-    paginated_result = await organization_service.find_organizations(**filter_query.model_dump(exclude_none=True))
+    response_cache: ResponseCache | None = Depends(Provide[Container.response_cache]),
+) -> OrganizationSearchResponse:
+    cache_key = filter_query.cache_key()
+    generation = body = None
+    if response_cache is not None:
+        # Taken before the search, so that a body computed from data older than an invalidation is not stored
+        generation = await response_cache.generation()
+        body = await response_cache.get(cache_key, generation=generation)
+
+    etag = None
+    if settings.etags_enabled and if_none_match:
+        # A cached body matching If-None-Match is answered without any database work, otherwise the version of
+        # the matching organizations is, before searching them
+        if body is not None and etag_matches(if_none_match, make_etag(body)):
+            return not_modified_response(make_etag(body))
+        version = await organization_service.find_organizations_version(
+            **filter_query.model_dump(exclude_none=True, include=_VERSION_FILTERS)
+        )
+        if version is not None:
+            etag = make_etag(settings.organization_read_path, cache_key, version)
+            if etag_matches(if_none_match, etag):
+                return not_modified_response(etag)
+
+    if body is not None:
+        response = Response(content=body, status_code=200, media_type="application/json")
+    else:
+        response = await _search_organizations(filter_query, organization_service)
+        if response_cache is not None:
+            await response_cache.set(cache_key, response.body, generation=generation)
+    if settings.etags_enabled:
+        return conditional_response(response, if_none_match, etag)
+    return response
+
+
+# Filters deciding which organizations a search matches, the rest of the query only shapes their response
+_VERSION_FILTERS = set(OrganizationFilterParams.model_fields) - {"order_by"}
+
+
+async def _search_organizations(
+    filter_query: GetOrganizationsQueryParams, organization_service: OrganizationService
+) -> Response:
+    search_params = filter_query.model_dump(exclude_none=True, exclude={"fields", "facets"})
+    try:
+        # Documents rendered by the database always hold every field
+        if settings.organization_read_path == "json" and filter_query.fields is None:
+            paginated_documents, facets = await _with_facets(
+                organization_service.find_organization_documents(**search_params), filter_query, organization_service
+            )
+            with timed("serialize"):
+                return json_documents_response(
+                    paginated_documents.items,
+                    page=paginated_documents.page,
+                    page_items=paginated_documents.page_items,
+                    has_more=paginated_documents.has_more,
+                    next_cursor=paginated_documents.next_cursor,
+                    **facets,
+                )
+
+        paginated_result, facets = await _with_facets(
+            organization_service.find_organizations(**search_params, fields=filter_query.fields),
+            filter_query,
+            organization_service,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    # Entities are encoded as is, in the shape of OrganizationSearchResponse
+    with timed("serialize"):
+        return ORJSONResponse(
+            content={
+                "items": [map_organization_to_content(org, filter_query.fields) for org in paginated_result.items],
+                "page": paginated_result.page,
+                "page_items": paginated_result.page_items,
+                "has_more": paginated_result.has_more,
+                "next_cursor": paginated_result.next_cursor,
+                **facets,
+            },
+            status_code=200,
+        )
+
 
-    # Map domain entities to DTOs
-    org_dtos = [map_organization_to_dto(org) for org in paginated_result.items]
+async def _with_facets(
+    search: Awaitable[PaginatedResult],
+    filter_query: GetOrganizationsQueryParams,
+    organization_service: OrganizationService,
+) -> tuple[PaginatedResult, dict]:
+    """Await a search with the facets requested by `filter_query`, and return its result and the `facets` field."""
+    if filter_query.facets is None:
+        return await search, {}
 
-    paginated_dto = PaginatedResource(
-        items=org_dtos,
-        page=paginated_result.page,
-        page_items=paginated_result.page_items,
-        has_more=paginated_result.has_more,
+    facet_filters = filter_query.model_dump(
+        exclude_none=True, exclude={"fields", "facets", "page", "items_per_page", "cursor", "order_by"}
     )
-    return JSONResponse(content=paginated_dto.model_dump(), status_code=200)
+    result, industry_facets = await organization_service.with_industry_facets(search, **facet_filters)
+    return result, {"facets": {"industry": industry_facets}}
@@ -0,0 +1,45 @@
+import asyncio
+import json
+from dataclasses import asdict
+from pathlib import Path
+from typing import Literal
+
+import anyio
+import typer
+
+from core.importing import InvalidImportRecordError
+from infrastructure.di.container import Container
+
+app = typer.Typer(help="Organization directory management commands")
+
+
+@app.callback()
+def main():
+    pass
+
+
+@app.command("import-organizations")
+def import_organizations(
+    path: Path = typer.Argument(..., exists=True, dir_okay=False, help="NDJSON or CSV file to import"),
+    format: Literal["ndjson", "csv"] = typer.Option("ndjson", help="File format"),
+):
+    """Bulk import organizations from a file in the format of the organization export."""
+    try:
+        result = asyncio.run(_import_organizations(path, format))
+    except InvalidImportRecordError as e:
+        typer.echo(f"Import failed, nothing was imported: {e}", err=True)
+        raise typer.Exit(code=1)
+    typer.echo(json.dumps(asdict(result), indent=2))
+
+
+async def _import_organizations(path: Path, format: str):
+    container = Container()
+    try:
+        async with container.scoped_sessions().scope(), await anyio.open_file(path, "rb") as file:
+            return await container.organization_import_service().import_organizations(file, format=format)
+    finally:
+        await container.db_engine().dispose()
+
+
+if __name__ == "__main__":
+    app()
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from pydantic import Field, SecretStr
 from dotenv import load_dotenv, find_dotenv
@@ -9,7 +11,110 @@ class Settings(BaseSettings):
     environment: str = Field("development")
     db_url: SecretStr = Field(..., description="Database connection URL")
     db_pool_size: int = Field(8)
+    db_pool_max_overflow: int = Field(
+        4, ge=0, description="Connections opened beyond db_pool_size under load, closed again when returned"
+    )
+    db_pool_timeout: float = Field(
+        5, gt=0, description="Seconds to wait for a free connection before the request fails with 503"
+    )
+    db_pool_recycle: int = Field(1800, description="Replace connections older than this many seconds, -1 never")
+    db_pool_pre_ping: bool = Field(
+        False, description="Check connections with a round trip on checkout, to survive database restarts"
+    )
+    db_replica_urls: list[SecretStr] = Field(
+        [], description="Read replica URLs as a JSON list; searches are spread over the healthy ones"
+    )
+    db_replica_strategy: Literal["round_robin", "least_connections"] = Field(
+        "round_robin", description="How a replica is picked for each session"
+    )
+    db_replica_health_check_interval: float = Field(5, gt=0, description="Seconds between replica health checks")
+    db_replica_max_lag_seconds: float = Field(
+        10, ge=0, description="Replicas lagging further behind the primary are not read from"
+    )
+    organization_read_path: Literal["orm", "json"] = Field(
+        "orm",
+        description="How organizations are read: ORM hydration and mapping, or JSON documents built by Postgres",
+    )
+    admin_token: SecretStr | None = Field(
+        None, description="Bearer token of the /v1/admin endpoints, which refuse every request while it is unset"
+    )
+    etags_enabled: bool = Field(
+        True,
+        description=(
+            "Send ETags and answer a matching If-None-Match with 304, checked against a version query over the "
+            "requested organizations before loading them, or against a hash of the response body"
+        ),
+    )
+    cache_backend: Literal["none", "memory", "redis"] = Field(
+        "none", description="Response cache for organization searches"
+    )
+    cache_ttl_seconds: float = Field(30, gt=0, description="Lifetime of cached responses")
+    cache_max_entries: int = Field(10_000, gt=0, description="Size of the in-memory response cache")
+    cache_invalidation_listen: bool = Field(
+        True, description="Clear the response cache on directory changes notified by Postgres"
+    )
+    redis_url: str = Field("redis://localhost:6379/0", description="Redis URL for the redis cache backend")
+    export_fetch_size: int = Field(
+        1000, gt=0, description="Rows fetched per round trip by the server-side cursor of organization exports"
+    )
+    import_batch_size: int = Field(10_000, gt=0, description="Organizations copied into staging tables per batch")
+    server_timing_enabled: bool = Field(
+        True, description="Report SQL, ORM, mapping and serialization time of each request in a Server-Timing header"
+    )
+    slow_query_log_enabled: bool = Field(
+        False, description="Log SQL statements slower than SLOW_QUERY_THRESHOLD_MS with their filters and plans"
+    )
+    slow_query_threshold_ms: float = Field(200, ge=0, description="Duration above which a statement is slow")
+    slow_query_sample_rate: float = Field(1.0, gt=0, le=1, description="Share of slow statements that are logged")
+    slow_query_log_size: int = Field(100, gt=0, description="Slow statements kept for /v1/admin/slow-queries")
+    slow_query_log_parameters: bool = Field(
+        False, description="Keep the bound parameters of slow statements, which hold search input, instead of redacting"
+    )
+    slow_query_explain: bool = Field(
+        True, description="Capture EXPLAIN (ANALYZE, BUFFERS) of slow SELECTs, which runs each of them once more"
+    )
+    spatial_index_enabled: bool = Field(
+        False, description="Answer lat/lon and polygon filters from an in-memory grid index of building locations"
+    )
+    spatial_index_cell_size: float = Field(0.01, gt=0, description="Grid cell size of the spatial index in degrees")
+    spatial_index_refresh_interval: float = Field(
+        30, gt=0, description="Seconds the spatial index waits after a change notification, to take in a burst"
+    )
+    spatial_index_max_building_id: int = Field(
+        2_000_000, gt=0, description="Highest building id the spatial index holds (16 bytes each); beyond it, PostGIS"
+    )
+    spatial_index_max_matches: int = Field(
+        20_000, gt=0, description="Geo filters matching more buildings than this are left to PostGIS"
+    )
+    organization_repository: Literal["sql", "snapshot"] = Field(
+        "sql", description="Serve organization reads by SQL queries, or from an in-memory snapshot of the directory"
+    )
+    snapshot_refresh_interval: float = Field(300, gt=0, description="Seconds between scheduled snapshot rebuilds")
+    snapshot_rebuild_delay: float = Field(
+        1, ge=0, description="Seconds a rebuild waits after a change notification, to take in a burst of changes"
+    )
+    snapshot_listen_changes: bool = Field(
+        True, description="Rebuild the snapshot when the directory changes, using Postgres LISTEN/NOTIFY"
+    )
+    autocomplete_enabled: bool = Field(
+        True, description="Serve /v1/autocomplete from an in-memory index of organization and industry names"
+    )
+    autocomplete_refresh_interval: float = Field(
+        30, gt=0, description="Seconds the autocomplete index waits after a change notification, to take in a burst"
+    )
+    autocomplete_reload_interval: float = Field(
+        3600, gt=0, description="Seconds between full reloads of the autocomplete index, which recount popularity"
+    )
+    autocomplete_max_suggestions: int = Field(
+        20, ge=1, description="Most suggestions of each kind /v1/autocomplete returns for a query"
+    )
     port: int = Field(8080, description="Web-server listening port")
+    workers: int | None = Field(
+        None, gt=0, description="Worker processes of the production server, by default one per CPU"
+    )
+    shutdown_timeout: float = Field(
+        30, gt=0, description="Seconds a worker waits for in-flight requests to finish after SIGTERM"
+    )
 
 
 settings = Settings()
@@ -21,5 +21,25 @@ class Organization:
     id: int
     name: str
     phones: list[str]
-    building: Building
+    # None only when the building was left out of a sparse fieldset
+    building: Building | None
     industries: list[str]
+    distance: float | None = None
+
+
+@dataclass
+class OrganizationCluster:
+    lat: float
+    lon: float
+    count: int
+    # Set only when the cluster holds a single organization
+    organization_id: int | None = None
+
+
+@dataclass
+class IndustryFacet:
+    id: int
+    name: str
+    parent_id: int | None
+    # Organizations listed under the industry or any of its subindustries
+    count: int
@@ -0,0 +1,116 @@
+"""Parsing of organization import files: NDJSON or CSV in the shapes produced by the export endpoint."""
+
+import csv
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import TypeVar
+
+from pydantic import TypeAdapter, ValidationError
+
+from core.entities import Organization
+
+# Separator of phones and industries inside a CSV cell
+CSV_LIST_SEPARATOR = ";"
+
+_organization_adapter = TypeAdapter(Organization)
+
+T = TypeVar("T")
+
+
+class InvalidImportRecordError(ValueError):
+    pass
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, str]]:
+    """Split a stream of byte chunks into numbered, non-empty lines of text."""
+    line_number = 0
+    # Parts of the line not ended yet, joined once it ends so that long lines are not copied for every chunk
+    parts: list[bytes] = []
+    async for chunk in chunks:
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            lines[0] = b"".join([*parts, lines[0]])
+            parts = []
+        if rest:
+            parts.append(rest)
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, _decode(line_number, line)
+    pending = b"".join(parts)
+    if pending.strip():
+        yield line_number + 1, _decode(line_number + 1, pending)
+
+
+def _decode(line_number: int, line: bytes) -> str:
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        raise InvalidImportRecordError(f"Line {line_number}: not valid UTF-8") from e
+
+
+def _to_organization(line_number: int, record: dict) -> Organization:
+    try:
+        return _organization_adapter.validate_python(record)
+    except ValidationError as e:
+        raise InvalidImportRecordError(f"Line {line_number}: {e}") from e
+
+
+async def parse_ndjson(lines: AsyncIterable[tuple[int, str]]) -> AsyncIterator[Organization]:
+    """Parse one organization per line, shaped like `OrganizationDTO`."""
+    async for line_number, line in lines:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise InvalidImportRecordError(f"Line {line_number}: invalid JSON: {e}") from e
+        yield _to_organization(line_number, record)
+
+
+async def parse_csv(lines: AsyncIterable[tuple[int, str]]) -> AsyncIterator[Organization]:
+    """
+    Parse CSV with a header row naming at least id, name, phones, building_id, address, lat, lon and industries.
+    Phones and industries are separated by `;` within their cells. Every record must fit on one line.
+    """
+    header = None
+    async for line_number, line in lines:
+        try:
+            row = next(csv.reader([line]))
+        except csv.Error as e:
+            raise InvalidImportRecordError(f"Line {line_number}: {e}") from e
+
+        if header is None:
+            header = row
+            continue
+        if len(row) != len(header):
+            raise InvalidImportRecordError(f"Line {line_number}: expected {len(header)} columns, got {len(row)}")
+
+        values = dict(zip(header, row))
+        yield _to_organization(
+            line_number,
+            {
+                "id": values.get("id"),
+                "name": values.get("name"),
+                "phones": _split_list(values.get("phones", "")),
+                "building": {
+                    "id": values.get("building_id"),
+                    "address": values.get("address"),
+                    "coordinates": {"lat": values.get("lat"), "lon": values.get("lon")},
+                },
+                "industries": _split_list(values.get("industries", "")),
+            },
+        )
+
+
+def _split_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+
+
+async def batched(items: AsyncIterable[T], size: int) -> AsyncIterator[list[T]]:
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -1,8 +1,8 @@
+from sqlalchemy import Row
 from geoalchemy2 import WKTElement
-from geoalchemy2.shape import to_shape
 
 from infrastructure.persistence.db.schema import Organization as DbOrganization, Building as DbBuilding
-from .entities import Point, Organization, Building
+from .entities import Point, Organization, OrganizationCluster, Building, IndustryFacet
 
 
 def map_point_to_db_point(*, lat: float, lon: float) -> WKTElement | None:
@@ -14,22 +14,40 @@ def map_polygon_to_db_polygon(polygon: list[tuple[float, float]]) -> WKTElement
     return WKTElement(f"POLYGON(({', '.join(coords)}))", srid=4326)
 
 
-def map_db_organization_to_entity(db_organization: DbOrganization) -> Organization:
-    building = map_db_building_to_entity(db_organization.building)
+def map_db_organization_to_entity(
+    db_organization: DbOrganization, fields: frozenset[str] | None = None
+) -> Organization:
+    """Map an organization; relations left out of `fields` were not loaded and are mapped as empty."""
+
+    def requested(name: str) -> bool:
+        return fields is None or name in fields
 
     return Organization(
         id=db_organization.id,
         name=db_organization.name,
-        phones=[phone.phone_number for phone in db_organization.phones],
-        building=building,
-        industries=[industry.name for industry in db_organization.industries],
+        phones=[phone.phone_number for phone in db_organization.phones] if requested("phones") else [],
+        building=map_db_building_to_entity(db_organization.building) if requested("building") else None,
+        industries=[industry.name for industry in db_organization.industries] if requested("industries") else [],
+        distance=db_organization.distance,
     )
 
 
 def map_db_building_to_entity(db_building: DbBuilding) -> Building:
-    point = to_shape(db_building.coordinates)
     return Building(
         id=db_building.id,
         address=db_building.address,
-        coordinates=Point(lat=point.y, lon=point.x),
+        coordinates=Point(lat=db_building.latitude, lon=db_building.longitude),
+    )
+
+
+def map_db_cluster_to_entity(db_cluster: Row) -> OrganizationCluster:
+    return OrganizationCluster(
+        lat=db_cluster.lat,
+        lon=db_cluster.lon,
+        count=db_cluster.count,
+        organization_id=db_cluster.organization_id,
     )
+
+
+def map_db_industry_facet_to_entity(db_facet: Row) -> IndustryFacet:
+    return IndustryFacet(id=db_facet.id, name=db_facet.name, parent_id=db_facet.parent_id, count=db_facet.count)
@@ -0,0 +1,28 @@
+"""Opaque cursors for keyset pagination."""
+
+import base64
+import json
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort_key: tuple) -> str:
+    """Encode the sort key of the last returned item into an opaque cursor."""
+    payload = json.dumps(list(sort_key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """Decode a cursor produced by `encode_cursor` back into a sort key."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_key = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid pagination cursor") from e
+
+    if not isinstance(sort_key, list) or not sort_key:
+        raise InvalidCursorError("Invalid pagination cursor")
+
+    return tuple(sort_key)
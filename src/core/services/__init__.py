@@ -1,3 +1,4 @@
+from .organization_import_service import OrganizationImportService
 from .organization_service import OrganizationService
 
-__all__ = ["OrganizationService"]
+__all__ = ["OrganizationImportService", "OrganizationService"]
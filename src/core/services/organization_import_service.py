@@ -0,0 +1,26 @@
+from collections.abc import AsyncIterable
+from typing import Literal
+
+from core.importing import batched, iter_lines, parse_csv, parse_ndjson
+from infrastructure.persistence.db.repositories import ImportResult, OrganizationImportRepository
+
+PARSERS = {
+    "ndjson": parse_ndjson,
+    "csv": parse_csv,
+}
+
+
+class OrganizationImportService:
+    def __init__(self, organization_import_repository: OrganizationImportRepository, batch_size: int):
+        self._organization_import_repository = organization_import_repository
+        self._batch_size = batch_size
+
+    async def import_organizations(
+        self, chunks: AsyncIterable[bytes], *, format: Literal["ndjson", "csv"]
+    ) -> ImportResult:
+        """
+        Import organizations from a stream of NDJSON or CSV bytes, in the formats of the organization export.
+        Records are parsed and loaded `batch_size` at a time; an invalid record aborts the whole import.
+        """
+        organizations = PARSERS[format](iter_lines(chunks))
+        return await self._organization_import_repository.import_organizations(batched(organizations, self._batch_size))
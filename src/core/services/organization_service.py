@@ -1,79 +1,429 @@
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Collection
 from dataclasses import dataclass
 
-from core.mappers import map_point_to_db_point, map_polygon_to_db_polygon, map_db_organization_to_entity
-from core.entities import Organization
+from core.mappers import (
+    map_db_cluster_to_entity,
+    map_db_industry_facet_to_entity,
+    map_db_organization_to_entity,
+    map_point_to_db_point,
+    map_polygon_to_db_polygon,
+)
+from core.entities import IndustryFacet, Organization, OrganizationCluster
+from core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+from infrastructure.observability import timed
 from infrastructure.persistence.db.repositories import OrganizationRepository
+from infrastructure.spatial import BuildingSpatialIndex
 
 
 @dataclass
 class PaginatedResult[T]:
     items: list[T]
-    page: int
+    page: int | None
     page_items: int
     has_more: bool
+    next_cursor: str | None = None
+
+
+# Attributes (and their types) of the repository rows that make up the sort key of each ordering
+SORT_KEYS: dict[str, tuple[tuple[str, type], ...]] = {
+    "name": (("name", str), ("id", int)),
+    "relevance": (("relevance", float), ("id", int)),
+    "distance": (("distance", float), ("id", int)),
+}
+
+# Radius of lat/lon searches when none is requested
+DEFAULT_RADIUS_M = 100.0
 
 
 class OrganizationService:
-    def __init__(self, organization_repository: OrganizationRepository):
+    def __init__(
+        self,
+        organization_repository: OrganizationRepository,
+        spatial_index: BuildingSpatialIndex | None = None,
+        facet_repository_factory: Callable[[], OrganizationRepository | None] | None = None,
+    ):
         self._organization_repository = organization_repository
+        self._spatial_index = spatial_index
+        self._facet_repository_factory = facet_repository_factory
 
-    def _build_paginated_response(self, results: list, page: int, items_per_page: int) -> PaginatedResult[Organization]:
-        domain_entities = [map_db_organization_to_entity(org) for org in results[:items_per_page]]
+    def _build_paginated_response(
+        self,
+        results: list,
+        page: int | None,
+        items_per_page: int,
+        order_by: str = "name",
+        map_item: Callable = map_db_organization_to_entity,
+    ) -> PaginatedResult:
+        page_results = results[:items_per_page]
+        with timed("map_entities"):
+            domain_entities = [map_item(row) for row in page_results]
         has_more = len(results) > items_per_page
 
+        next_cursor = None
+        if has_more:
+            last = page_results[-1]
+            next_cursor = encode_cursor((order_by, *(getattr(last, attr) for attr, _ in SORT_KEYS[order_by])))
+
         return PaginatedResult(
             items=domain_entities,
             has_more=has_more,
             page=page,
-            page_items=len(results),
+            page_items=len(domain_entities),
+            next_cursor=next_cursor,
         )
 
+    @staticmethod
+    def _decode_sort_key(cursor: str, order_by: str) -> tuple:
+        cursor_order, *sort_key = decode_cursor(cursor)
+        if cursor_order != order_by:
+            raise InvalidCursorError(f"Pagination cursor does not belong to order_by={order_by}")
+
+        key_types = [key_type for _, key_type in SORT_KEYS[order_by]]
+        if len(sort_key) != len(key_types) or not all(
+            isinstance(value, (int, float) if key_type is float else key_type)
+            for value, key_type in zip(sort_key, key_types)
+        ):
+            raise InvalidCursorError("Invalid pagination cursor")
+        return tuple(sort_key)
+
     async def find_organizations(
         self,
         *,
         building_id: int | None = None,
         industry_id: int | None = None,
+        include_subindustries: bool = False,
         organization_name: str | None = None,
         industry_name: str | None = None,
         address: str | None = None,
         polygon: list[tuple[float, float]] | None = None,
         lat: float | None = None,
         lon: float | None = None,
+        radius_m: float = DEFAULT_RADIUS_M,
         page: int,
         items_per_page: int,
+        cursor: str | None = None,
+        order_by: str = "name",
+        fields: Collection[str] | None = None,
     ) -> PaginatedResult[Organization]:
-        offset = (page - 1) * items_per_page
+        """
+        Find organizations page by page, ordered by (name, id) or, for text searches, by relevance.
+        With a `cursor` the page is fetched by keyset instead of OFFSET, so deep pages cost the same as the first one.
+        With `fields`, relations outside of them are neither loaded nor mapped.
+        """
+        fields = frozenset(fields) if fields is not None else None
+        after = self._decode_sort_key(cursor, order_by) if cursor else None
+        offset = 0 if after else (page - 1) * items_per_page
         limit = items_per_page + 1  # Fetch one extra to check for more pages
+        filters = self._repository_filters(
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            polygon=polygon,
+            lat=lat,
+            lon=lon,
+            radius_m=radius_m,
+        )
 
-        if any(
-            [
-                building_id,
-                industry_id,
-                organization_name,
-                industry_name,
-                address,
-                lat and lon,
-                polygon,
-            ]
-        ):
-            result = await self._organization_repository.find_organizations_with_filters(
-                building_id=building_id,
-                industry_id=industry_id,
-                organization_name=organization_name,
-                industry_name=industry_name,
-                address=address,
-                point_wkt=map_point_to_db_point(lat=lat, lon=lon) if lat and lon else None,
-                polygon_wkt=map_polygon_to_db_polygon(polygon) if polygon else None,
-                limit=limit,
+        with timed("repository"):
+            if filters:
+                result = await self._organization_repository.find_organizations_with_filters(
+                    **filters,
+                    order_by=order_by,
+                    limit=limit,
+                    offset=offset,
+                    after=after,
+                    fields=fields,
+                )
+            else:
+                result = await self._organization_repository.get_all_organizations(
+                    limit=limit, offset=offset, after=after, fields=fields
+                )
+
+        return self._build_paginated_response(
+            result,
+            None if cursor else page,
+            items_per_page,
+            order_by,
+            map_item=lambda org: map_db_organization_to_entity(org, fields),
+        )
+
+    async def find_organization_documents(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        polygon: list[tuple[float, float]] | None = None,
+        lat: float | None = None,
+        lon: float | None = None,
+        radius_m: float = DEFAULT_RADIUS_M,
+        page: int,
+        items_per_page: int,
+        cursor: str | None = None,
+        order_by: str = "name",
+    ) -> PaginatedResult[str]:
+        """Find organizations like `find_organizations`, with items as JSON documents rendered by the database."""
+        after = self._decode_sort_key(cursor, order_by) if cursor else None
+        offset = 0 if after else (page - 1) * items_per_page
+        filters = self._repository_filters(
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            polygon=polygon,
+            lat=lat,
+            lon=lon,
+            radius_m=radius_m,
+        )
+
+        with timed("repository"):
+            result = await self._organization_repository.find_organization_documents_with_filters(
+                **filters,
+                order_by=order_by,
+                limit=items_per_page + 1,
                 offset=offset,
+                after=after,
             )
-        else:
-            result = await self._organization_repository.get_all_organizations(limit=limit, offset=offset)
+        return self._build_paginated_response(
+            result, None if cursor else page, items_per_page, order_by, map_item=lambda row: row.document
+        )
+
+    async def stream_organizations(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        polygon: list[tuple[float, float]] | None = None,
+        lat: float | None = None,
+        lon: float | None = None,
+        radius_m: float = DEFAULT_RADIUS_M,
+        order_by: str = "name",
+        fetch_size: int,
+    ) -> AsyncIterator[Organization]:
+        """Stream all organizations `find_organizations` would return across its pages, fetched in batches."""
+        filters = self._repository_filters(
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            polygon=polygon,
+            lat=lat,
+            lon=lon,
+            radius_m=radius_m,
+        )
 
-        return self._build_paginated_response(result, page, items_per_page)
+        async for org in self._organization_repository.stream_organizations_with_filters(
+            **filters, order_by=order_by, fetch_size=fetch_size
+        ):
+            yield map_db_organization_to_entity(org)
 
-    async def find_organization_by_id(self, organization_id: int) -> Organization | None:
-        result = await self._organization_repository.find_organization_by_id(organization_id)
+    async def with_industry_facets(
+        self,
+        search: Awaitable[PaginatedResult],
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        polygon: list[tuple[float, float]] | None = None,
+        lat: float | None = None,
+        lon: float | None = None,
+        radius_m: float = DEFAULT_RADIUS_M,
+    ) -> tuple[PaginatedResult, list[IndustryFacet]]:
+        """
+        Await a search and count the organizations `find_organizations` would return across its pages per industry,
+        each counted towards its industries and their ancestors. The count runs meanwhile on a repository from
+        `facet_repository_factory`, or after the search on the shared one when the factory gives none.
+        """
+        filters = self._repository_filters(
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            polygon=polygon,
+            lat=lat,
+            lon=lon,
+            radius_m=radius_m,
+        )
+        repository = None
+        if self._facet_repository_factory is not None:
+            repository = self._facet_repository_factory()
+        if repository is None:
+            result = await search
+            return result, await self._count_industry_facets(self._organization_repository, filters)
+
+        counting = asyncio.ensure_future(self._count_industry_facets(repository, filters))
+        try:
+            result = await search
+        except BaseException:
+            counting.cancel()
+            raise
+        return result, await counting
+
+    async def _count_industry_facets(self, repository: OrganizationRepository, filters: dict) -> list[IndustryFacet]:
+        with timed("facets"):
+            result = await repository.count_industry_facets_with_filters(**filters)
+        return [map_db_industry_facet_to_entity(row) for row in result]
+
+    async def cluster_organizations(
+        self,
+        *,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        cell_size: float,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+    ) -> list[OrganizationCluster]:
+        """
+        Count the organizations matching the filters inside a bounding box per cell of a `cell_size` degree grid,
+        with the centroid of their buildings. The box is filtered as a polygon, by the spatial index when loaded.
+        """
+        bbox = [(min_lat, min_lon), (min_lat, max_lon), (max_lat, max_lon), (max_lat, min_lon), (min_lat, min_lon)]
+        filters = self._repository_filters(
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            polygon=bbox,
+            lat=None,
+            lon=None,
+            radius_m=DEFAULT_RADIUS_M,
+        )
+
+        with timed("repository"):
+            result = await self._organization_repository.cluster_organizations_with_filters(
+                **filters, cell_size=cell_size
+            )
+        return [map_db_cluster_to_entity(row) for row in result]
+
+    async def find_organizations_version(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        polygon: list[tuple[float, float]] | None = None,
+        lat: float | None = None,
+        lon: float | None = None,
+        radius_m: float = DEFAULT_RADIUS_M,
+    ) -> str | None:
+        """
+        Version of the organizations matching the filters, which changes whenever a search with them could.
+        Answered without loading any organization; None when the repository cannot tell it.
+        """
+        filters = self._repository_filters(
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            polygon=polygon,
+            lat=lat,
+            lon=lon,
+            radius_m=radius_m,
+        )
+        with timed("repository"):
+            return await self._organization_repository.get_organizations_version_with_filters(**filters)
+
+    def _repository_filters(
+        self,
+        *,
+        building_id: int | None,
+        industry_id: int | None,
+        include_subindustries: bool,
+        organization_name: str | None,
+        industry_name: str | None,
+        address: str | None,
+        polygon: list[tuple[float, float]] | None,
+        lat: float | None,
+        lon: float | None,
+        radius_m: float,
+    ) -> dict:
+        """
+        Convert search parameters to repository filters. Empty when nothing is filtered.
+        Geo filters are answered by the spatial index when it is loaded, as the ids of the matching buildings.
+        """
+        has_point = lat is not None and lon is not None
+        if not any([building_id, industry_id, organization_name, industry_name, address, has_point, polygon]):
+            return {}
+
+        building_ids = None
+        if self._spatial_index is not None and self._spatial_index.ready and (has_point or polygon):
+            with timed("spatial_index"):
+                if has_point:
+                    building_ids = self._spatial_index.within_radius(lat, lon, radius_m)
+                else:
+                    building_ids = self._spatial_index.within_polygon(polygon)
+
+        return dict(
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            # Still needed for distances when the spatial index matched the buildings
+            point_wkt=map_point_to_db_point(lat=lat, lon=lon) if has_point else None,
+            radius_m=radius_m if has_point else None,
+            polygon_wkt=map_polygon_to_db_polygon(polygon) if polygon and building_ids is None else None,
+            building_ids=building_ids,
+        )
+
+    async def find_organization_by_id(
+        self, organization_id: int, *, fields: Collection[str] | None = None
+    ) -> Organization | None:
+        fields = frozenset(fields) if fields is not None else None
+        with timed("repository"):
+            result = await self._organization_repository.find_organization_by_id(organization_id, fields=fields)
         if result is None:
             return None
-        return map_db_organization_to_entity(result)
+        with timed("map_entities"):
+            return map_db_organization_to_entity(result, fields)
+
+    async def get_organization_version(self, organization_id: int) -> str | None:
+        """Version of an organization, which changes whenever its response could. None when it cannot be told."""
+        with timed("repository"):
+            return await self._organization_repository.get_organization_version(organization_id)
+
+    async def find_organizations_by_ids(self, organization_ids: list[int]) -> list[Organization | None]:
+        """Find organizations by id, in the requested order, with None for ids that do not exist."""
+        with timed("repository"):
+            result = await self._organization_repository.find_organizations_by_ids(list(set(organization_ids)))
+        with timed("map_entities"):
+            organizations = {org.id: map_db_organization_to_entity(org) for org in result}
+        return [organizations.get(organization_id) for organization_id in organization_ids]
+
+    async def find_organization_document_by_id(self, organization_id: int) -> str | None:
+        with timed("repository"):
+            return await self._organization_repository.find_organization_document_by_id(organization_id)
@@ -0,0 +1,3 @@
+from .name_index import AutocompleteIndex, AutocompleteStats, Suggestion, fold
+
+__all__ = ["AutocompleteIndex", "AutocompleteStats", "Suggestion", "fold"]
@@ -0,0 +1,424 @@
+import asyncio
+import bisect
+import heapq
+import logging
+import re
+import sys
+import time
+import unicodedata
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy import distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from infrastructure.persistence.db.notifications import DirectoryChange
+from infrastructure.persistence.db.schema import Industry, Organization, industry_closure, organization_industries
+from infrastructure.persistence.db.watermarks import change_watermark
+
+logger = logging.getLogger(__name__)
+
+# Prefixes matching more names than this keep their suggestions until the names change
+_CACHED_MATCHES = 500
+_PUNCTUATION = re.compile(r"[\W_]+")
+# Directory tables whose changes show in names or their popularity
+_NAME_TABLES = frozenset({"organizations", "industries", "organization_industries"})
+
+
+@dataclass
+class AutocompleteStats:
+    ready: bool
+    organizations: int
+    industries: int
+    keys: int
+    memory_bytes: int
+    watermark: datetime | None
+    refreshed_at: datetime | None
+    reloaded_at: datetime | None
+    last_error: str | None
+
+
+@dataclass(frozen=True, slots=True)
+class Suggestion:
+    id: int
+    name: str
+
+
+def fold(text: str) -> str:
+    """Return text casefolded and stripped of diacritics, with punctuation and runs of whitespace made single spaces."""
+    if text.isascii():
+        folded = text.lower()
+    else:
+        decomposed = unicodedata.normalize("NFKD", text.casefold())
+        folded = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_PUNCTUATION.sub(" ", folded).split())
+
+
+def _word_starts(folded: str) -> Iterator[int]:
+    yield 0
+    space = folded.find(" ")
+    while space >= 0:
+        yield space + 1
+        space = folded.find(" ", space + 1)
+
+
+class _Names:
+    """
+    Names of one kind of record, found by a prefix of any of their words.
+
+    Each word start of each folded name is a key, stored as a (slot, offset) pair into the folded names and sorted by
+    the text from there on, so that the keys starting with a prefix are a range found by binary search. Renamed and
+    new records take new slots, whose keys wait in a short sorted list until the names are compacted; the slots they
+    leave behind are dead, with no name.
+    """
+
+    def __init__(self, rows: Iterable[tuple[int, str, int]], *, max_suggestions: int):
+        self.max_suggestions = max_suggestions
+        self.ids = array("i")
+        self.names: list[str | None] = []
+        self.popularity = array("i")
+        for record_id, name, popularity in rows:
+            self.ids.append(record_id)
+            self.names.append(sys.intern(name))
+            self.popularity.append(popularity)
+        self.folded = [fold(name) for name in self.names]
+        self.slots: dict[int, int] = {record_id: slot for slot, record_id in enumerate(self.ids)}
+
+        key_slots, key_offsets, suffixes = array("i"), array("i"), []
+        for slot, folded in enumerate(self.folded):
+            for offset in _word_starts(folded):
+                key_slots.append(slot)
+                key_offsets.append(offset)
+                suffixes.append(folded[offset:])
+        order = sorted(range(len(suffixes)), key=suffixes.__getitem__)
+        self._key_slots = array("i", map(key_slots.__getitem__, order))
+        self._key_offsets = array("i", map(key_offsets.__getitem__, order))
+        self._pending: list[tuple[str, int]] = []
+        self._cache: dict[str, list[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    @property
+    def keys(self) -> int:
+        return len(self._key_slots) + len(self._pending)
+
+    def _add(self, record_id: int, name: str, popularity: int) -> int:
+        slot = len(self.ids)
+        self.ids.append(record_id)
+        self.names.append(sys.intern(name))
+        self.folded.append(fold(name))
+        self.popularity.append(popularity)
+        self.slots[record_id] = slot
+        return slot
+
+    def upsert(self, rows: Iterable[tuple[int, str, int | None]]) -> None:
+        """Add or rename records given as (id, name, popularity) rows; a None popularity keeps the current one."""
+        for record_id, name, updated_popularity in rows:
+            slot = self.slots.get(record_id)
+            popularity = updated_popularity
+            if popularity is None:
+                popularity = self.popularity[slot] if slot is not None else 0
+            if slot is not None and self.names[slot] == name:
+                if popularity != self.popularity[slot]:
+                    demoted = popularity < self.popularity[slot]
+                    self.popularity[slot] = popularity
+                    self._update_cache(slot, demoted=demoted)
+                continue
+            if slot is not None:
+                # Keys of the dead slot stay where they are sorted, and are skipped
+                self.names[slot] = None
+                self._update_cache(slot, demoted=True)
+            slot = self._add(record_id, name, popularity)
+            folded = self.folded[slot]
+            for offset in _word_starts(folded):
+                bisect.insort(self._pending, (folded[offset:], slot))
+            self._update_cache(slot, demoted=False)
+
+    def _update_cache(self, slot: int, *, demoted: bool) -> None:
+        """
+        Bring the cached suggestions of the prefixes of a changed record's words up to date: a record ranking lower
+        than before (or dead) drops those it is part of, to be searched again, and one ranking higher is merged in.
+        """
+        folded = self.folded[slot]
+        prefixes = {folded[offset:end] for offset in _word_starts(folded) for end in range(offset + 1, len(folded) + 1)}
+        for prefix in prefixes & self._cache.keys():
+            slots = self._cache[prefix]
+            if demoted:
+                if slot in slots:
+                    del self._cache[prefix]
+            else:
+                ranked = sorted({*slots, slot}, key=lambda cached: self._rank(cached, prefix))
+                self._cache[prefix] = ranked[: self.max_suggestions]
+
+    @property
+    def needs_compaction(self) -> bool:
+        return len(self._pending) > max(1000, len(self._key_slots) // 20)
+
+    def compacted(self) -> "_Names":
+        """Return the live records in a new index, without pending keys or dead slots."""
+        return _Names(
+            ((self.ids[slot], name, self.popularity[slot]) for slot, name in enumerate(self.names) if name is not None),
+            max_suggestions=self.max_suggestions,
+        )
+
+    def search(self, prefix: str, limit: int) -> list[Suggestion]:
+        """Return the records with a word starting with a folded prefix, by rank."""
+        if not prefix:
+            return []
+        slots = self._cache.get(prefix)
+        if slots is None:
+            slots = self._search(prefix, limit)
+        return [Suggestion(id=self.ids[slot], name=self.names[slot]) for slot in slots[:limit]]
+
+    def _search(self, prefix: str, limit: int) -> list[int]:
+        length = len(prefix)
+
+        def key_prefix(key: int) -> str:
+            # Keys cut to the prefix length are still sorted, so both ends of the range are found by bisecting
+            offset = self._key_offsets[key]
+            return self.folded[self._key_slots[key]][offset : offset + length]
+
+        keys = range(len(self._key_slots))
+        start = bisect.bisect_left(keys, prefix, key=key_prefix)
+        end = bisect.bisect_right(keys, prefix, lo=start, key=key_prefix)
+        matches = set(self._key_slots[start:end])
+        for position in range(bisect.bisect_left(self._pending, (prefix,)), len(self._pending)):
+            key, slot = self._pending[position]
+            if not key.startswith(prefix):
+                break
+            matches.add(slot)
+
+        live = [slot for slot in matches if self.names[slot] is not None]
+        if len(live) <= _CACHED_MATCHES:
+            return heapq.nsmallest(limit, live, key=lambda slot: self._rank(slot, prefix))
+        slots = heapq.nsmallest(self.max_suggestions, live, key=lambda slot: self._rank(slot, prefix))
+        self._cache[prefix] = slots
+        return slots
+
+    def _rank(self, slot: int, prefix: str) -> tuple:
+        # Names starting with the prefix come first, then the most popular ones
+        folded = self.folded[slot]
+        return not folded.startswith(prefix), -self.popularity[slot], folded, self.ids[slot]
+
+    def memory_bytes(self) -> int:
+        arrays = (self.ids, self.popularity, self._key_slots, self._key_offsets)
+        strings = sum(sys.getsizeof(folded) for folded in self.folded)
+        return sum(values.itemsize * len(values) for values in arrays) + strings
+
+
+class AutocompleteIndex:
+    """
+    In-memory index of organization and industry names answering search-as-you-type queries with ids and names.
+
+    Names and queries are folded (case and diacritics), and a name matches when one of its words starts with the
+    query. Names starting with the query come first, then the most popular: industries by the organizations in them
+    or their subindustries, organizations by the industries they are listed under. Changes are notified through
+    `notify_change` and applied `refresh_interval` seconds later, taking in a burst of them at once: organizations
+    inserted or updated from `updated_at`, while any other change of names, industry links or the industry hierarchy
+    reloads the index, which also recounts popularity. The index is reloaded every `reload_interval` seconds
+    regardless. Until it is loaded it is not `ready`.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory: async_sessionmaker[AsyncSession],
+        refresh_interval: float = 30.0,
+        reload_interval: float = 3600.0,
+        max_suggestions: int = 20,
+    ):
+        self._session_factory = session_factory
+        self._max_suggestions = max_suggestions
+        self._refresh_interval = refresh_interval
+        self._reload_interval = reload_interval
+        self._organizations = _Names((), max_suggestions=max_suggestions)
+        self._industries = _Names((), max_suggestions=max_suggestions)
+        self._ready = False
+        self._watermark: datetime | None = None
+        self._changed = asyncio.Event()
+        self._reload_needed = False
+        self._refreshed_at: datetime | None = None
+        self._reloaded_at: datetime | None = None
+        self._reloaded: float | None = None
+        self._last_error: str | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def stats(self) -> AutocompleteStats:
+        return AutocompleteStats(
+            ready=self._ready,
+            organizations=len(self._organizations),
+            industries=len(self._industries),
+            keys=self._organizations.keys + self._industries.keys,
+            memory_bytes=self._organizations.memory_bytes() + self._industries.memory_bytes(),
+            watermark=self._watermark,
+            refreshed_at=self._refreshed_at,
+            reloaded_at=self._reloaded_at,
+            last_error=self._last_error,
+        )
+
+    def load(
+        self, *, organizations: Iterable[tuple[int, str, int]], industries: Iterable[tuple[int, str, int]]
+    ) -> None:
+        """Replace the indexed names with (id, name, popularity) rows."""
+        self._organizations = _Names(organizations, max_suggestions=self._max_suggestions)
+        self._industries = _Names(industries, max_suggestions=self._max_suggestions)
+        self._ready = True
+
+    def upsert(
+        self,
+        *,
+        organizations: Iterable[tuple[int, str, int | None]] = (),
+        industries: Iterable[tuple[int, str, int | None]] = (),
+    ) -> None:
+        """Add or rename records given as (id, name, popularity) rows; a None popularity keeps the current one."""
+        self._organizations.upsert(organizations)
+        self._industries.upsert(industries)
+
+    def suggest_organizations(self, query: str, *, limit: int = 10) -> list[Suggestion]:
+        return self._organizations.search(fold(query), min(limit, self._max_suggestions))
+
+    def suggest_industries(self, query: str, *, limit: int = 10) -> list[Suggestion]:
+        return self._industries.search(fold(query), min(limit, self._max_suggestions))
+
+    async def notify_change(self, change: DirectoryChange | None) -> None:
+        """Schedule an update for a directory change, or a reload for changes that may have been missed (None)."""
+        if change is not None and change.table not in _NAME_TABLES:
+            return
+        if change is None or change.table != "organizations" or change.operation not in ("INSERT", "UPDATE"):
+            # Deletions, industry links and the industry hierarchy leave no trace in `updated_at`
+            self._reload_needed = True
+        self._changed.set()
+
+    async def refresh(self) -> None:
+        """Apply the organizations updated since the last refresh, or reload all names when due or needed."""
+        if (
+            not self._ready
+            or self._reload_needed
+            or self._watermark is None
+            or time.monotonic() - self._reloaded >= self._reload_interval
+        ):
+            await self.reload()
+            return
+
+        async with self._session_factory() as session:
+            watermark = await change_watermark(session)
+            # Rows updated after the watermark and read by the previous refresh are applied again, harmlessly
+            organizations = (
+                await session.execute(self._organizations_query().filter(Organization.updated_at >= self._watermark))
+            ).all()
+
+        self.upsert(organizations=((row.id, row.name, row.popularity) for row in organizations))
+        if self._organizations.needs_compaction:
+            self._organizations = await asyncio.to_thread(self._organizations.compacted)
+
+        self._watermark = watermark
+        self._refreshed_at = datetime.now(UTC)
+        self._last_error = None
+
+    async def reload(self) -> None:
+        """Load all names, counting their popularity."""
+        # Changes notified from now on are not necessarily read, and take another reload
+        self._reload_needed = False
+        try:
+            await self._reload()
+        except BaseException:
+            self._reload_needed = True
+            raise
+
+    async def _reload(self) -> None:
+        async with self._session_factory() as session:
+            watermark = await change_watermark(session)
+            organizations = (await session.execute(self._organizations_query())).all()
+            industries = (
+                await session.execute(
+                    select(
+                        Industry.id,
+                        Industry.name,
+                        func.count(distinct(organization_industries.c.organization_id)).label("popularity"),
+                    )
+                    .outerjoin(industry_closure, industry_closure.c.ancestor_id == Industry.id)
+                    .outerjoin(
+                        organization_industries,
+                        organization_industries.c.industry_id == industry_closure.c.descendant_id,
+                    )
+                    .group_by(Industry.id)
+                )
+            ).all()
+
+        started = time.monotonic()
+        organization_names, industry_names = await asyncio.gather(
+            asyncio.to_thread(
+                _Names,
+                ((row.id, row.name, row.popularity) for row in organizations),
+                max_suggestions=self._max_suggestions,
+            ),
+            asyncio.to_thread(
+                _Names,
+                ((row.id, row.name, row.popularity) for row in industries),
+                max_suggestions=self._max_suggestions,
+            ),
+        )
+        self._organizations, self._industries, self._ready = organization_names, industry_names, True
+        logger.info(
+            "Autocomplete index of %d organizations and %d industries built in %.2f s",
+            len(organization_names),
+            len(industry_names),
+            time.monotonic() - started,
+        )
+
+        self._watermark = watermark
+        self._reloaded = time.monotonic()
+        self._refreshed_at = self._reloaded_at = datetime.now(UTC)
+        self._last_error = None
+
+    @staticmethod
+    def _organizations_query():
+        linked_industries = (
+            select(func.count())
+            .select_from(organization_industries)
+            .filter(organization_industries.c.organization_id == Organization.id)
+            .scalar_subquery()
+        )
+        return select(Organization.id, Organization.name, linked_industries.label("popularity"))
+
+    async def start(self) -> None:
+        """Load the index, then keep refreshing it in the background."""
+        await self._refresh_safely()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            reload_due = self._reload_interval
+            if self._reloaded is not None:
+                reload_due -= time.monotonic() - self._reloaded
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=max(reload_due, 0))
+            except TimeoutError:
+                pass
+            # Changes notified meanwhile are applied together
+            await asyncio.sleep(self._refresh_interval)
+            self._changed.clear()
+            await self._refresh_safely()
+
+    async def _refresh_safely(self) -> None:
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.warning("Autocomplete index refresh failed: %r", e)
+            self._last_error = repr(e)
@@ -0,0 +1,10 @@
+from .invalidation import CacheInvalidationListener
+from .response_cache import CacheStats, InMemoryResponseCache, RedisResponseCache, ResponseCache
+
+__all__ = [
+    "CacheInvalidationListener",
+    "CacheStats",
+    "InMemoryResponseCache",
+    "RedisResponseCache",
+    "ResponseCache",
+]
@@ -0,0 +1,19 @@
+from infrastructure.persistence.db.notifications import DirectoryChange, DirectoryChangeListener
+
+from .response_cache import ResponseCache
+
+
+class CacheInvalidationListener(DirectoryChangeListener):
+    """
+    Clears the response cache whenever the directory changes, using Postgres LISTEN/NOTIFY.
+    The cache is also cleared after the connection drops, since notifications may have been missed meanwhile.
+    Changes are told apart by their transaction, so that a shared cache is cleared once per transaction however
+    many workers and tables it is notified to.
+    """
+
+    def __init__(self, *, db_url: str, cache: ResponseCache, reconnect_delay: float = 5.0):
+        super().__init__(db_url=db_url, on_change=self._clear, reconnect_delay=reconnect_delay)
+        self._cache = cache
+
+    async def _clear(self, change: DirectoryChange | None) -> None:
+        await self._cache.clear(change=change.transaction_id if change is not None else None)
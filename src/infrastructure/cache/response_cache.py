@@ -0,0 +1,159 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+# Marks the change (KEYS[2]) as cleared and increments the generation (KEYS[1]), unless the change was marked already
+_CLEAR_ONCE = """
+if redis.call("SET", KEYS[2], 1, "NX", "PX", ARGV[1]) then
+    return redis.call("INCR", KEYS[1])
+end
+return false
+"""
+# How long a change stays marked, well beyond the time its notification takes to reach every worker
+_CHANGE_TTL_MS = 60_000
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+
+
+class ResponseCache(ABC):
+    """
+    Cache of serialized response bodies by request key.
+    Every `clear` starts a new generation. Responses computed while the cache is cleared must not be stored in the
+    new generation, so callers take `generation()` before computing a response and pass it to `get` and `set`;
+    `set` drops values of a past generation. A `clear` naming the `change` it is for does nothing when the cache was
+    already cleared for that change.
+    """
+
+    def __init__(self):
+        self._stats = CacheStats()
+
+    @abstractmethod
+    async def generation(self) -> int:
+        pass
+
+    @abstractmethod
+    async def get(self, key: str, *, generation: int | None = None) -> bytes | None:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, *, generation: int | None = None) -> None:
+        pass
+
+    @abstractmethod
+    async def clear(self, *, change: str | None = None) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> CacheStats:
+        return self._stats
+
+
+class InMemoryResponseCache(ResponseCache):
+    """Per-process LRU cache whose entries also expire after `ttl_seconds`."""
+
+    def __init__(self, *, max_entries: int, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        super().__init__()
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._generation = 0
+        self._change: str | None = None
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def get(self, key: str, *, generation: int | None = None) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self._stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return entry[1]
+
+    async def set(self, key: str, value: bytes, *, generation: int | None = None) -> None:
+        if generation is not None and generation != self._generation:
+            return
+        self._entries[key] = (self._clock() + self._ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    async def clear(self, *, change: str | None = None) -> None:
+        if change is not None:
+            if change == self._change:
+                return
+            self._change = change
+        self._entries.clear()
+        self._generation += 1
+        self._stats.invalidations += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    Cache shared by all workers through Redis (or any server speaking its protocol).
+    Keys are prefixed with the generation counted by a Redis key, so `clear` is a single INCR; entries of past
+    generations are no longer read and expire after `ttl_seconds` like the others. Eviction is left to the server's
+    maxmemory policy. A `clear` for a change also marks the change as done for a minute, so that the workers
+    notified of the same change increment the generation once between them.
+    """
+
+    def __init__(self, *, url: str, ttl_seconds: float, prefix: str = "org-directory:response:"):
+        super().__init__()
+        from redis.asyncio import Redis
+
+        self._redis = Redis.from_url(url)
+        self._ttl_ms = int(ttl_seconds * 1000)
+        self._prefix = prefix
+
+    async def generation(self) -> int:
+        return int(await self._redis.get(self._prefix + "generation") or 0)
+
+    def _key(self, key: str, generation: int) -> str:
+        return f"{self._prefix}{generation}:{key}"
+
+    async def get(self, key: str, *, generation: int | None = None) -> bytes | None:
+        if generation is None:
+            generation = await self.generation()
+        value = await self._redis.get(self._key(key, generation))
+        if value is None:
+            self._stats.misses += 1
+        else:
+            self._stats.hits += 1
+        return value
+
+    async def set(self, key: str, value: bytes, *, generation: int | None = None) -> None:
+        # A past generation's key is written as well, but no longer read
+        if generation is None:
+            generation = await self.generation()
+        await self._redis.set(self._key(key, generation), value, px=self._ttl_ms)
+
+    async def clear(self, *, change: str | None = None) -> None:
+        if change is None:
+            await self._redis.incr(self._prefix + "generation")
+        else:
+            await self._redis.eval(
+                _CLEAR_ONCE, 2, self._prefix + "generation", f"{self._prefix}change:{change}", _CHANGE_TTL_MS
+            )
+        self._stats.invalidations += 1
+
+    async def close(self) -> None:
+        await self._redis.aclose()
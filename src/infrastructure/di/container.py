@@ -1,22 +1,152 @@
 from dependency_injector import containers, providers
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker
 
-from core.services import OrganizationService
-from infrastructure.persistence.db.repositories import OrganizationRepositoryImpl
+from core.services import OrganizationImportService, OrganizationService
+from infrastructure.autocomplete import AutocompleteIndex
+from infrastructure.cache import InMemoryResponseCache, RedisResponseCache
+from infrastructure.observability import SlowQueryLog
+from infrastructure.persistence.db.pool import InstrumentedAsyncPool
+from infrastructure.persistence.db.replicas import ReplicaRouter, RoutingSession, read_from
+from infrastructure.persistence.db.repositories import OrganizationImportRepositoryImpl, OrganizationRepositoryImpl
+from infrastructure.persistence.db.session import ScopedSessions
+from infrastructure.persistence.snapshot import SnapshotOrganizationRepositoryImpl, SnapshotStore
+from infrastructure.spatial import BuildingSpatialIndex
 from config.settings import settings
 
 
+_POOL_OPTIONS = dict(
+    poolclass=InstrumentedAsyncPool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_pool_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+)
+
+
+def _create_replica_engines(urls: list[str]) -> list[AsyncEngine]:
+    return [create_async_engine(url, **_POOL_OPTIONS) for url in urls]
+
+
+def _spare_organization_repository(
+    scoped_sessions: ScopedSessions, router: ReplicaRouter
+) -> OrganizationRepositoryImpl | None:
+    # A request holding a connection never waits for a second one, which would let concurrent requests exhaust the
+    # pool waiting for each other
+    engine = router.choose()
+    if not engine.pool.has_spare_connection():
+        return None
+    session = scoped_sessions.open()
+    read_from(session, engine)
+    return OrganizationRepositoryImpl(session=session)
+
+
 class Container(containers.DeclarativeContainer):
-    db_engine = create_async_engine(
-        settings.db_url.get_secret_value(),
-        pool_size=settings.db_pool_size,
-        max_overflow=0,
-        pool_timeout=30,
-    )
-    async_session_factory = async_sessionmaker(db_engine, expire_on_commit=False)
-    db_session = providers.Factory(async_session_factory)
-    organization_repository = providers.Factory(
-        OrganizationRepositoryImpl,
+    db_engine = providers.Singleton(create_async_engine, settings.db_url.get_secret_value(), **_POOL_OPTIONS)
+    db_replica_engines = providers.Singleton(
+        _create_replica_engines, [url.get_secret_value() for url in settings.db_replica_urls]
+    )
+    replica_router = providers.Singleton(
+        ReplicaRouter,
+        primary=db_engine,
+        replicas=db_replica_engines,
+        strategy=settings.db_replica_strategy,
+        health_check_interval=settings.db_replica_health_check_interval,
+        max_lag_seconds=settings.db_replica_max_lag_seconds,
+    )
+    async_session_factory = providers.Singleton(
+        async_sessionmaker,
+        db_engine,
+        expire_on_commit=False,
+        sync_session_class=RoutingSession,
+        router=replica_router,
+    )
+    scoped_sessions = providers.Singleton(ScopedSessions, session_factory=async_session_factory)
+    # One session per request, see DbSessionMiddleware
+    db_session = scoped_sessions.provided.get.call()
+    snapshot_store = providers.Selector(
+        providers.Object(settings.organization_repository),
+        sql=providers.Object(None),
+        snapshot=providers.Singleton(
+            SnapshotStore,
+            session_factory=async_session_factory,
+            refresh_interval=settings.snapshot_refresh_interval,
+            rebuild_delay=settings.snapshot_rebuild_delay,
+        ),
+    )
+    organization_repository = providers.Selector(
+        providers.Object(settings.organization_repository),
+        sql=providers.Factory(OrganizationRepositoryImpl, session=db_session),
+        snapshot=providers.Factory(SnapshotOrganizationRepositoryImpl, store=snapshot_store),
+    )
+    # Repository with a session of its own, for facet counts running alongside the page query, or None while the
+    # pool has no connection free
+    facet_repository = providers.Selector(
+        providers.Object(settings.organization_repository),
+        sql=providers.Callable(_spare_organization_repository, scoped_sessions, replica_router),
+        snapshot=providers.Factory(SnapshotOrganizationRepositoryImpl, store=snapshot_store),
+    )
+    spatial_index = providers.Selector(
+        providers.Object("enabled" if settings.spatial_index_enabled else "disabled"),
+        disabled=providers.Object(None),
+        enabled=providers.Singleton(
+            BuildingSpatialIndex,
+            session_factory=async_session_factory,
+            cell_size=settings.spatial_index_cell_size,
+            refresh_interval=settings.spatial_index_refresh_interval,
+            max_building_id=settings.spatial_index_max_building_id,
+            max_matches=settings.spatial_index_max_matches,
+        ),
+    )
+    autocomplete_index = providers.Selector(
+        providers.Object("enabled" if settings.autocomplete_enabled else "disabled"),
+        disabled=providers.Object(None),
+        enabled=providers.Singleton(
+            AutocompleteIndex,
+            session_factory=async_session_factory,
+            refresh_interval=settings.autocomplete_refresh_interval,
+            reload_interval=settings.autocomplete_reload_interval,
+            max_suggestions=settings.autocomplete_max_suggestions,
+        ),
+    )
+    organization_service = providers.Factory(
+        OrganizationService,
+        organization_repository=organization_repository,
+        spatial_index=spatial_index,
+        facet_repository_factory=facet_repository.provider,
+    )
+    organization_import_repository = providers.Factory(
+        OrganizationImportRepositoryImpl,
         session=db_session,
     )
-    organization_service = providers.Factory(OrganizationService, organization_repository=organization_repository)
+    organization_import_service = providers.Factory(
+        OrganizationImportService,
+        organization_import_repository=organization_import_repository,
+        batch_size=settings.import_batch_size,
+    )
+    response_cache = providers.Selector(
+        providers.Object(settings.cache_backend),
+        none=providers.Object(None),
+        memory=providers.Singleton(
+            InMemoryResponseCache,
+            max_entries=settings.cache_max_entries,
+            ttl_seconds=settings.cache_ttl_seconds,
+        ),
+        redis=providers.Singleton(
+            RedisResponseCache,
+            url=settings.redis_url,
+            ttl_seconds=settings.cache_ttl_seconds,
+        ),
+    )
+    slow_query_log = providers.Selector(
+        providers.Object("enabled" if settings.slow_query_log_enabled else "disabled"),
+        disabled=providers.Object(None),
+        enabled=providers.Singleton(
+            SlowQueryLog,
+            threshold_ms=settings.slow_query_threshold_ms,
+            sample_rate=settings.slow_query_sample_rate,
+            max_entries=settings.slow_query_log_size,
+            explain=settings.slow_query_explain,
+            log_parameters=settings.slow_query_log_parameters,
+        ),
+    )
@@ -0,0 +1,17 @@
+from .metrics import METRICS_CONTENT_TYPE, observe_request, render_metrics, stage_durations
+from .slow_queries import SlowQuery, SlowQueryLog
+from .timing import RequestTimings, collect_timings, current_timings, instrument_sql, timed
+
+__all__ = [
+    "METRICS_CONTENT_TYPE",
+    "RequestTimings",
+    "SlowQuery",
+    "SlowQueryLog",
+    "collect_timings",
+    "current_timings",
+    "instrument_sql",
+    "observe_request",
+    "render_metrics",
+    "stage_durations",
+    "timed",
+]
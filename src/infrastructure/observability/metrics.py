@@ -0,0 +1,57 @@
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Histogram, generate_latest, multiprocess
+
+from .timing import RequestTimings
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to respond to HTTP requests, until the response headers are sent",
+    ["method", "route", "status", "filters"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per HTTP request",
+    ["route", "filters"],
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time spent executing SQL statements per HTTP request",
+    ["route", "filters"],
+)
+REQUEST_STAGE_DURATION = Histogram(
+    "http_request_stage_duration_seconds",
+    "Time spent per stage of HTTP requests, e.g. ORM hydration, mapping and serialization",
+    ["route", "stage"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def observe_request(
+    timings: RequestTimings, *, method: str, route: str, status: int, filters: str, duration: float
+) -> None:
+    REQUEST_DURATION.labels(method=method, route=route, status=str(status), filters=filters).observe(duration)
+    REQUEST_DB_QUERIES.labels(route=route, filters=filters).observe(timings.db_queries)
+    REQUEST_DB_DURATION.labels(route=route, filters=filters).observe(timings.db_seconds)
+    for stage, seconds in stage_durations(timings).items():
+        REQUEST_STAGE_DURATION.labels(route=route, stage=stage).observe(seconds)
+
+
+def stage_durations(timings: RequestTimings) -> dict[str, float]:
+    """Stage durations, with the SQL time taken out of the repository stage, leaving query building and hydration."""
+    stages = dict(timings.stages)
+    if "repository" in stages:
+        stages["orm"] = max(stages.pop("repository") - timings.db_seconds, 0.0)
+    return stages
+
+
+def render_metrics() -> bytes:
+    """Render the metrics of this process, or of all workers when they share PROMETHEUS_MULTIPROC_DIR."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return generate_latest()
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
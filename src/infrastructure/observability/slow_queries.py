@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .timing import RequestTimings, current_timings
+
+logger = logging.getLogger(__name__)
+
+# Execution option of the EXPLAIN statements themselves, which are never logged
+_SKIP_OPTION = "skip_slow_query_log"
+# Statements of the admin endpoints (imports, maintenance) are not explained, since they write or use temp tables
+_UNEXPLAINED_PATH_PREFIX = "/v1/admin/"
+
+
+@dataclass
+class SlowQuery:
+    logged_at: datetime
+    duration_ms: float
+    path: str | None
+    filters: str | None
+    statement: str
+    # None unless parameters are logged, since they hold search input
+    parameters: str | None
+    plan: str | None = None
+    # Why there is no plan: the statement is not a SELECT of a read request, another EXPLAIN was running, or EXPLAIN
+    # failed
+    plan_error: str | None = None
+
+
+class SlowQueryLog:
+    """
+    Keeps the most recent SQL statements slower than `threshold_ms` (a `sample_rate` share of them) in a ring
+    buffer, with the request path and filters that issued them and, for SELECTs of requests outside the admin
+    endpoints, their `EXPLAIN (ANALYZE, BUFFERS)` plan. Plans are captured in the background on a separate
+    connection, one at a time, in a read-only transaction that is rolled back, so that a statement with side effects
+    fails to be explained rather than running twice. Bound parameters are redacted unless `log_parameters` is set.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold_ms: float,
+        sample_rate: float = 1.0,
+        max_entries: int = 100,
+        explain: bool = True,
+        log_parameters: bool = False,
+    ):
+        self.threshold_ms = threshold_ms
+        self._sample_rate = sample_rate
+        self._explain = explain
+        self._log_parameters = log_parameters
+        self._entries: deque[SlowQuery] = deque(maxlen=max_entries)
+        self._explaining: asyncio.Task | None = None
+
+    def entries(self) -> list[SlowQuery]:
+        """Return the logged queries, the most recent first."""
+        return list(reversed(self._entries))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def record(self, connection: Connection, context, statement: str, parameters, seconds: float) -> None:
+        """Log a statement that took `seconds`, if it is slow and sampled."""
+        duration_ms = seconds * 1000
+        if duration_ms < self.threshold_ms or (context is not None and context.execution_options.get(_SKIP_OPTION)):
+            return
+        if self._sample_rate < 1 and random.random() >= self._sample_rate:  # noqa: S311
+            return
+
+        timings = current_timings()
+        entry = SlowQuery(
+            logged_at=datetime.now(UTC),
+            duration_ms=round(duration_ms, 2),
+            path=timings.path if timings else None,
+            filters=timings.filters if timings else None,
+            statement=statement,
+            parameters=repr(parameters) if self._log_parameters else None,
+        )
+        self._entries.append(entry)
+        logger.warning(
+            "Slow query (%.1f ms, filters: %s): %s with parameters %s",
+            entry.duration_ms,
+            entry.filters,
+            statement,
+            entry.parameters or "(redacted)",
+        )
+
+        if not self._explain:
+            return
+        if not _is_select(statement) or not _is_read_request(timings):
+            entry.plan_error = "Only SELECT statements of read requests are explained"
+        elif self._explaining is not None and not self._explaining.done():
+            entry.plan_error = "Skipped, another EXPLAIN was running"
+        else:
+            engine = AsyncEngine(connection.engine)
+            self._explaining = asyncio.get_running_loop().create_task(
+                self._capture_plan(engine, entry, statement, parameters)
+            )
+
+    async def _capture_plan(self, engine: AsyncEngine, entry: SlowQuery, statement: str, parameters) -> None:
+        started = time.perf_counter()
+        try:
+            async with engine.connect() as connection:
+                explain = await connection.execution_options(**{_SKIP_OPTION: True})
+                try:
+                    # Writes, including those of volatile functions and data-modifying CTEs, fail instead of running
+                    await explain.exec_driver_sql("SET TRANSACTION READ ONLY")
+                    result = await explain.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters)
+                    entry.plan = "\n".join(row[0] for row in result)
+                finally:
+                    await explain.rollback()
+        except Exception as e:
+            entry.plan_error = repr(e)
+            logger.warning("Could not explain slow query: %r", e)
+            return
+        logger.warning(
+            "Plan of slow query (filters: %s, explained in %.1f ms):\n%s",
+            entry.filters,
+            (time.perf_counter() - started) * 1000,
+            entry.plan,
+        )
+
+
+def _is_read_request(timings: RequestTimings | None) -> bool:
+    return timings is not None and timings.path is not None and not timings.path.startswith(_UNEXPLAINED_PATH_PREFIX)
+
+
+def _is_select(statement: str) -> bool:
+    keyword = statement.lstrip()[:6].upper()
+    return keyword == "SELECT" or keyword.startswith("WITH")
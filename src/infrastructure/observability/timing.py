@@ -0,0 +1,99 @@
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+if TYPE_CHECKING:
+    from .slow_queries import SlowQueryLog
+
+
+class RequestTimings:
+    """
+    Where the time of a request went: SQL statements and their total duration, and named stages.
+    The request path and the filters it uses tell slow queries apart.
+    """
+
+    def __init__(self, *, path: str | None = None, filters: str | None = None):
+        self.path = path
+        self.filters = filters
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.stages: dict[str, float] = defaultdict(float)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def current_timings() -> RequestTimings | None:
+    return _current.get()
+
+
+@contextmanager
+def collect_timings(*, path: str | None = None, filters: str | None = None) -> Iterator[RequestTimings]:
+    """Collect timings of everything run within the block, including tasks it starts."""
+    timings = RequestTimings(path=path, filters=filters)
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Add the duration of the block to a stage of the current request's timings, if any are collected."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.stages[stage] += time.perf_counter() - started
+
+
+_slow_query_log: "SlowQueryLog | None" = None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    seconds = time.perf_counter() - conn.info["query_started"].pop()
+    timings = _current.get()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_seconds += seconds
+    if _slow_query_log is not None:
+        _slow_query_log.record(conn, context, statement, parameters, seconds)
+
+
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started"):
+        connection.info["query_started"].pop()
+
+
+def instrument_sql(slow_query_log: "SlowQueryLog | None" = None) -> None:
+    """
+    Count and time the SQL statements of every engine into the current request's timings,
+    and pass their durations to `slow_query_log`, when given.
+    """
+    global _slow_query_log  # noqa: PLW0603
+    _slow_query_log = slow_query_log
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
@@ -0,0 +1,35 @@
+"""Geography coordinates index
+
+Revision ID: 0c6f3a8e5d27
+Revises: 9e41c7d2b6f8
+Create Date: 2026-10-18 12:41:05.217634
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0c6f3a8e5d27"
+down_revision: Union[str, Sequence[str], None] = "9e41c7d2b6f8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "idx_buildings_coordinates_geography",
+        "buildings",
+        [sa.text("geography(coordinates)")],
+        unique=False,
+        postgresql_using="gist",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("idx_buildings_coordinates_geography", table_name="buildings", postgresql_using="gist")
@@ -0,0 +1,51 @@
+"""Directory change notifications
+
+Revision ID: 4d7a1c9e2b60
+Revises: 0c6f3a8e5d27
+Create Date: 2026-10-18 13:55:48.630151
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4d7a1c9e2b60"
+down_revision: Union[str, Sequence[str], None] = "0c6f3a8e5d27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DIRECTORY_TABLES = ["organizations", "buildings", "phones", "industries", "organization_industries"]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_directory_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('directory_changes', TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    # Statement level, so a bulk load notifies once per statement instead of once per row
+    for table_name in DIRECTORY_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER notify_directory_change
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table_name}
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_directory_change();
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in DIRECTORY_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS notify_directory_change ON {table_name};")
+    op.execute("DROP FUNCTION IF EXISTS notify_directory_change();")
@@ -0,0 +1,95 @@
+"""Industry closure table
+
+Revision ID: 5b2e8d0f4a13
+Revises: c7a14b59c29e
+Create Date: 2026-10-18 10:02:11.418203
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2e8d0f4a13"
+down_revision: Union[str, Sequence[str], None] = "c7a14b59c29e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "industry_closure",
+        sa.Column("ancestor_id", sa.Integer(), nullable=False),
+        sa.Column("descendant_id", sa.Integer(), nullable=False),
+        sa.Column("depth", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["ancestor_id"], ["industries.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["descendant_id"], ["industries.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("ancestor_id", "descendant_id"),
+    )
+    op.create_index(
+        "idx_industry_closure_descendant", "industry_closure", ["descendant_id", "ancestor_id"], unique=False
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION industry_closure_maintain() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO industry_closure (ancestor_id, descendant_id, depth)
+                SELECT NEW.id, NEW.id, 0
+                UNION ALL
+                SELECT ancestor_id, NEW.id, depth + 1 FROM industry_closure WHERE descendant_id = NEW.parent_id;
+            ELSIF NEW.parent_id IS DISTINCT FROM OLD.parent_id THEN
+                -- Detach the moved subtree from its former ancestors ...
+                DELETE FROM industry_closure c
+                USING industry_closure sub, industry_closure sup
+                WHERE sub.ancestor_id = NEW.id
+                  AND sup.descendant_id = NEW.id
+                  AND sup.ancestor_id <> NEW.id
+                  AND c.ancestor_id = sup.ancestor_id
+                  AND c.descendant_id = sub.descendant_id;
+                -- ... and attach it under the new parent.
+                INSERT INTO industry_closure (ancestor_id, descendant_id, depth)
+                SELECT sup.ancestor_id, sub.descendant_id, sup.depth + sub.depth + 1
+                FROM industry_closure sup
+                CROSS JOIN industry_closure sub
+                WHERE sup.descendant_id = NEW.parent_id AND sub.ancestor_id = NEW.id;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER industry_closure_maintain
+        AFTER INSERT OR UPDATE OF parent_id ON industries
+        FOR EACH ROW EXECUTE FUNCTION industry_closure_maintain();
+        """
+    )
+
+    op.execute(
+        """
+        INSERT INTO industry_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE tree AS (
+            SELECT id AS ancestor_id, id AS descendant_id, 0 AS depth FROM industries
+            UNION ALL
+            SELECT tree.ancestor_id, industries.id, tree.depth + 1
+            FROM tree
+            JOIN industries ON industries.parent_id = tree.descendant_id
+        )
+        SELECT ancestor_id, descendant_id, depth FROM tree;
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS industry_closure_maintain ON industries;")
+    op.execute("DROP FUNCTION IF EXISTS industry_closure_maintain();")
+    op.drop_index("idx_industry_closure_descendant", table_name="industry_closure")
+    op.drop_table("industry_closure")
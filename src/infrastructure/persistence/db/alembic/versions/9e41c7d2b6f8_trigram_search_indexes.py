@@ -0,0 +1,49 @@
+"""Trigram search indexes
+
+Revision ID: 9e41c7d2b6f8
+Revises: 5b2e8d0f4a13
+Create Date: 2026-10-18 11:24:37.902114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9e41c7d2b6f8"
+down_revision: Union[str, Sequence[str], None] = "5b2e8d0f4a13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, column) of every column searched with ILIKE '%...%'
+TRIGRAM_INDEXES = [
+    ("idx_organizations_name", "organizations", "name"),
+    ("idx_building_address", "buildings", "address"),
+    ("idx_industry_name", "industries", "name"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+
+    for index_name, table_name, column_name in TRIGRAM_INDEXES:
+        op.drop_index(index_name, table_name=table_name, postgresql_using="gin")
+        op.create_index(
+            index_name,
+            table_name,
+            [column_name],
+            unique=False,
+            postgresql_using="gin",
+            postgresql_ops={column_name: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for index_name, table_name, column_name in TRIGRAM_INDEXES:
+        op.drop_index(index_name, table_name=table_name, postgresql_using="gin")
+        op.create_index(index_name, table_name, [column_name], unique=False, postgresql_using="gin")
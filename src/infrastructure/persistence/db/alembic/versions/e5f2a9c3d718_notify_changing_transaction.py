@@ -0,0 +1,41 @@
+"""Notify the operation and transaction of directory changes
+
+Revision ID: e5f2a9c3d718
+Revises: 4d7a1c9e2b60
+Create Date: 2026-10-18 22:04:12.571309
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5f2a9c3d718"
+down_revision: Union[str, Sequence[str], None] = "4d7a1c9e2b60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _notify_directory_change(payload: str) -> str:
+    return f"""
+        CREATE OR REPLACE FUNCTION notify_directory_change() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('directory_changes', {payload});
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Listeners tell writes that can be applied incrementally from others by the operation, and the notifications of
+    # one transaction from those of others by its id
+    op.execute(_notify_directory_change("TG_TABLE_NAME || ':' || TG_OP || ':' || txid_current()"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(_notify_directory_change("TG_TABLE_NAME"))
@@ -0,0 +1,88 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+# Channel notified by the `notify_directory_change` triggers on every directory table, with a payload of
+# "<table>:<operation>:<transaction id>"
+DIRECTORY_CHANGES_CHANNEL = "directory_changes"
+
+
+@dataclass(frozen=True)
+class DirectoryChange:
+    """A statement changing a directory table. Payloads of older triggers only name the table."""
+
+    table: str
+    # INSERT, UPDATE, DELETE or TRUNCATE
+    operation: str | None = None
+    transaction_id: str | None = None
+
+    @classmethod
+    def parse(cls, payload: str) -> "DirectoryChange":
+        table, _, rest = payload.partition(":")
+        operation, _, transaction_id = rest.partition(":")
+        return cls(table=table, operation=operation or None, transaction_id=transaction_id or None)
+
+
+class DirectoryChangeListener:
+    """
+    Calls `on_change` with every change of the directory, using Postgres LISTEN/NOTIFY.
+    It is also called with None after the connection drops, since changes may have been missed meanwhile.
+    """
+
+    def __init__(
+        self,
+        *,
+        db_url: str,
+        on_change: Callable[[DirectoryChange | None], Awaitable[None]],
+        reconnect_delay: float = 5.0,
+    ):
+        self._dsn = make_url(db_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._on_change = on_change
+        self._reconnect_delay = reconnect_delay
+        self._task: asyncio.Task | None = None
+        # The event loop only keeps weak references to tasks
+        self._notified: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Directory change listener failed, reconnecting")
+            await self._on_change(None)
+            await asyncio.sleep(self._reconnect_delay)
+
+    async def _listen(self) -> None:
+        connection = await asyncpg.connect(self._dsn)
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        try:
+            await connection.add_listener(DIRECTORY_CHANGES_CHANNEL, self._on_notification)
+            await closed.wait()
+        finally:
+            await connection.close()
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        task = asyncio.get_running_loop().create_task(self._on_change(DirectoryChange.parse(payload)))
+        self._notified.add(task)
+        task.add_done_callback(self._notified.discard)
@@ -0,0 +1,62 @@
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolStats:
+    size: int
+    checked_out: int
+    checked_in: int
+    overflow: int
+    max_overflow: int
+    checkouts: int
+    timeouts: int
+    # Time spent waiting for a connection, including opening new ones and pre-ping
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """The default pool of async engines, counting checkouts, checkout timeouts and the time spent waiting."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self._wait_seconds_total += waited
+            self._wait_seconds_max = max(self._wait_seconds_max, waited)
+
+        self._checkouts += 1
+        return connection
+
+    def has_spare_connection(self) -> bool:
+        """Whether a checkout gets a connection now, without waiting for one to be returned."""
+        return self._max_overflow < 0 or self.checkedout() < self.size() + self._max_overflow
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self.size(),
+            checked_out=self.checkedout(),
+            checked_in=self.checkedin(),
+            overflow=max(self.overflow(), 0),
+            max_overflow=self._max_overflow,
+            checkouts=self._checkouts,
+            timeouts=self._timeouts,
+            wait_seconds_total=round(self._wait_seconds_total, 6),
+            wait_seconds_max=round(self._wait_seconds_max, 6),
+        )
@@ -0,0 +1,177 @@
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Literal
+
+from sqlalchemy import Delete, Insert, Select, Update, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Replication lag in seconds, 0 when the replica has replayed everything it received (or is not a replica at all)
+_REPLICATION_LAG = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+@dataclass
+class ReplicaStatus:
+    url: str
+    healthy: bool = False
+    lag_seconds: float | None = None
+    checked_out: int = 0
+    last_error: str | None = None
+
+
+class _Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.healthy = False
+        self.lag_seconds: float | None = None
+        self.last_error: str | None = None
+
+
+class ReplicaRouter:
+    """
+    Picks the engine that serves reads: one of the healthy replicas, by round-robin or least checked out
+    connections, or the primary when there are no healthy replicas. Replicas are health checked in the background
+    and taken out of rotation while unreachable or lagging more than `max_lag_seconds` behind.
+    """
+
+    def __init__(
+        self,
+        *,
+        primary: AsyncEngine,
+        replicas: list[AsyncEngine],
+        strategy: Literal["round_robin", "least_connections"] = "round_robin",
+        health_check_interval: float = 5.0,
+        health_check_timeout: float = 2.0,
+        max_lag_seconds: float = 10.0,
+    ):
+        self._primary = primary
+        self._replicas = [_Replica(engine) for engine in replicas]
+        self._strategy = strategy
+        self._health_check_interval = health_check_interval
+        self._health_check_timeout = health_check_timeout
+        self._max_lag_seconds = max_lag_seconds
+        self._counter = itertools.count()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def primary(self) -> AsyncEngine:
+        return self._primary
+
+    def choose(self) -> AsyncEngine:
+        healthy = [replica for replica in self._replicas if replica.healthy]
+        if not healthy:
+            return self._primary
+        if self._strategy == "least_connections":
+            return min(healthy, key=lambda replica: replica.engine.pool.checkedout()).engine
+        return healthy[next(self._counter) % len(healthy)].engine
+
+    def status(self) -> list[ReplicaStatus]:
+        return [
+            ReplicaStatus(
+                url=replica.engine.url.render_as_string(hide_password=True),
+                healthy=replica.healthy,
+                lag_seconds=replica.lag_seconds,
+                checked_out=replica.engine.pool.checkedout(),
+                last_error=replica.last_error,
+            )
+            for replica in self._replicas
+        ]
+
+    async def start(self) -> None:
+        """Check all replicas once, then keep checking them in the background."""
+        if not self._replicas:
+            return
+        await self.check_health()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def dispose(self) -> None:
+        for replica in self._replicas:
+            await replica.engine.dispose()
+
+    async def check_health(self) -> None:
+        await asyncio.gather(*(self._check(replica) for replica in self._replicas))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._health_check_interval)
+            await self.check_health()
+
+    async def _check(self, replica: _Replica) -> None:
+        try:
+            async with asyncio.timeout(self._health_check_timeout):
+                async with replica.engine.connect() as connection:
+                    lag = float(await connection.scalar(_REPLICATION_LAG))
+        except Exception as e:
+            if replica.healthy:
+                logger.warning("Replica %s is unavailable, reading from the others: %r", replica.engine.url, e)
+            replica.healthy, replica.lag_seconds, replica.last_error = False, None, repr(e)
+            return
+
+        replica.lag_seconds = lag
+        replica.last_error = None
+        if lag > self._max_lag_seconds:
+            if replica.healthy:
+                logger.warning("Replica %s lags %.1f s behind, reading from the others", replica.engine.url, lag)
+            replica.healthy = False
+        else:
+            replica.healthy = True
+
+
+class RoutingSession(Session):
+    """
+    Sends plain SELECTs to the engine picked by a `ReplicaRouter`, and everything else to the primary.
+    A session reads from a single replica, and once it has written (or asked for a connection directly) it stays
+    on the primary, so that it reads its own writes.
+    """
+
+    def __init__(self, *, router: ReplicaRouter | None = None, **kwargs):
+        super().__init__(**kwargs)
+        self._router = router
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs) -> Engine:
+        if self._router is None:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+
+        if self.info.get("primary") or not self._is_read(clause):
+            self.info["primary"] = True
+            return self._router.primary.sync_engine
+
+        if "replica" not in self.info:
+            self.info["replica"] = self._router.choose()
+        return self.info["replica"].sync_engine
+
+    def _is_read(self, clause) -> bool:
+        if self._flushing or isinstance(clause, (Insert, Update, Delete)):
+            return False
+        return isinstance(clause, Select) and clause._for_update_arg is None
+
+
+def use_primary(session: Session | AsyncSession) -> None:
+    """Route all further statements of a session to the primary, e.g. to read data written by another session."""
+    session.info["primary"] = True
+
+
+def read_from(session: Session | AsyncSession, engine: AsyncEngine) -> None:
+    """Send the reads of a session to an engine chosen beforehand by `ReplicaRouter.choose`."""
+    session.info["replica"] = engine
@@ -1,6 +1,14 @@
+from .organization_import_repository import (
+    ImportResult,
+    OrganizationImportRepository,
+    OrganizationImportRepositoryImpl,
+)
 from .organization_repository import OrganizationRepository, OrganizationRepositoryImpl
 
 __all__ = [
+    "ImportResult",
+    "OrganizationImportRepository",
+    "OrganizationImportRepositoryImpl",
     "OrganizationRepository",
     "OrganizationRepositoryImpl",
 ]
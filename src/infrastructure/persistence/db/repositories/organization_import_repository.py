@@ -0,0 +1,251 @@
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterable
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from core.entities import Organization
+from core.importing import InvalidImportRecordError
+
+
+@dataclass
+class ImportResult:
+    records: int = 0
+    buildings_upserted: int = 0
+    organizations_upserted: int = 0
+    phones_added: int = 0
+    phones_removed: int = 0
+    industry_links_added: int = 0
+    industry_links_removed: int = 0
+    # Industry names that matched no industry; links to them are skipped
+    unknown_industries: list[str] = field(default_factory=list)
+
+
+# Staging tables, dropped when the import transaction ends.
+# `position` is the record number, so that the last of duplicate records wins.
+_STAGING_TABLES = (
+    """
+    CREATE TEMP TABLE import_buildings (
+        position bigint NOT NULL,
+        id integer NOT NULL,
+        address text NOT NULL,
+        lat double precision NOT NULL,
+        lon double precision NOT NULL
+    ) ON COMMIT DROP
+    """,
+    """
+    CREATE TEMP TABLE import_organizations (
+        position bigint NOT NULL,
+        id integer NOT NULL,
+        name text NOT NULL,
+        building_id integer NOT NULL
+    ) ON COMMIT DROP
+    """,
+    """
+    CREATE TEMP TABLE import_phones (
+        position bigint NOT NULL,
+        organization_id integer NOT NULL,
+        phone_number text NOT NULL
+    ) ON COMMIT DROP
+    """,
+    """
+    CREATE TEMP TABLE import_industries (
+        organization_id integer NOT NULL,
+        industry_name text NOT NULL
+    ) ON COMMIT DROP
+    """,
+)
+
+_UPSERT_BUILDINGS = """
+    INSERT INTO buildings (id, address, coordinates, created_at, updated_at)
+    SELECT DISTINCT ON (id) id, address, ST_SetSRID(ST_MakePoint(lon, lat), 4326), now(), now()
+    FROM import_buildings
+    ORDER BY id, position DESC
+    ON CONFLICT (id) DO UPDATE
+    SET address = EXCLUDED.address, coordinates = EXCLUDED.coordinates, updated_at = now()
+    WHERE (buildings.address, buildings.coordinates) IS DISTINCT FROM (EXCLUDED.address, EXCLUDED.coordinates)
+"""
+
+# Organization names must stay unique: an imported name may not be taken by another imported organization, nor by
+# one the import leaves alone
+_CONFLICTING_NAMES = """
+    WITH imported AS (
+        SELECT DISTINCT ON (id) id, name FROM import_organizations ORDER BY id, position DESC
+    )
+    SELECT name, array_agg(id ORDER BY id) FROM imported GROUP BY name HAVING count(*) > 1
+    UNION ALL
+    SELECT imported.name, ARRAY[imported.id, organizations.id]
+    FROM imported
+    JOIN organizations ON organizations.name = imported.name AND organizations.id <> imported.id
+    WHERE NOT EXISTS (SELECT 1 FROM imported AS other WHERE other.id = organizations.id)
+    LIMIT 10
+"""
+
+# The unique name constraint is checked row by row, so names passed between imported organizations (e.g. swapped)
+# are first released by renaming their current holders to placeholders, which the upsert then overwrites
+_RELEASE_NAMES = """
+    UPDATE organizations SET name = 'import-' || gen_random_uuid()
+    WHERE id IN (SELECT id FROM import_organizations)
+    AND EXISTS (
+        SELECT 1 FROM import_organizations
+        WHERE import_organizations.name = organizations.name AND import_organizations.id <> organizations.id
+    )
+"""
+
+_UPSERT_ORGANIZATIONS = """
+    INSERT INTO organizations (id, name, building_id, created_at, updated_at)
+    SELECT DISTINCT ON (id) id, name, building_id, now(), now()
+    FROM import_organizations
+    ORDER BY id, position DESC
+    ON CONFLICT (id) DO UPDATE
+    SET name = EXCLUDED.name, building_id = EXCLUDED.building_id, updated_at = now()
+    WHERE (organizations.name, organizations.building_id) IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.building_id)
+"""
+
+# Explicit ids were inserted, so move the sequences past them
+_SYNC_SEQUENCES = (
+    "SELECT setval(pg_get_serial_sequence('buildings', 'id'), max(id)) FROM buildings",
+    "SELECT setval(pg_get_serial_sequence('organizations', 'id'), max(id)) FROM organizations",
+)
+
+# Phones and industry links of imported organizations are replaced by the imported ones. Rows that stay the same
+# are left untouched, which keeps their timestamps stable.
+_DELETE_PHONES = """
+    DELETE FROM phones
+    WHERE organization_id IN (SELECT id FROM import_organizations)
+    AND NOT EXISTS (
+        SELECT 1 FROM import_phones
+        WHERE import_phones.organization_id = phones.organization_id
+        AND import_phones.phone_number = phones.phone_number
+    )
+"""
+
+_INSERT_PHONES = """
+    INSERT INTO phones (organization_id, phone_number, created_at, updated_at)
+    SELECT organization_id, phone_number, now(), now()
+    FROM import_phones
+    WHERE NOT EXISTS (
+        SELECT 1 FROM phones
+        WHERE phones.organization_id = import_phones.organization_id
+        AND phones.phone_number = import_phones.phone_number
+    )
+    GROUP BY organization_id, phone_number
+    ORDER BY min(position)
+"""
+
+_UNKNOWN_INDUSTRIES = """
+    SELECT DISTINCT industry_name FROM import_industries
+    WHERE NOT EXISTS (SELECT 1 FROM industries WHERE industries.name = import_industries.industry_name)
+    ORDER BY industry_name
+"""
+
+_DELETE_INDUSTRY_LINKS = """
+    DELETE FROM organization_industries
+    WHERE organization_id IN (SELECT id FROM import_organizations)
+    AND NOT EXISTS (
+        SELECT 1 FROM import_industries
+        JOIN industries ON industries.name = import_industries.industry_name
+        WHERE import_industries.organization_id = organization_industries.organization_id
+        AND industries.id = organization_industries.industry_id
+    )
+"""
+
+_INSERT_INDUSTRY_LINKS = """
+    INSERT INTO organization_industries (organization_id, industry_id, created_at)
+    SELECT DISTINCT import_industries.organization_id, industries.id, now()
+    FROM import_industries
+    JOIN industries ON industries.name = import_industries.industry_name
+    ON CONFLICT DO NOTHING
+"""
+
+
+class OrganizationImportRepository(ABC):
+    @abstractmethod
+    async def import_organizations(self, batches: AsyncIterable[list[Organization]]) -> ImportResult:
+        pass
+
+
+class OrganizationImportRepositoryImpl(OrganizationImportRepository):
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    async def import_organizations(self, batches: AsyncIterable[list[Organization]]) -> ImportResult:
+        """
+        Load organizations with their buildings, phones and industries in one transaction.
+        Batches are copied into staging tables with COPY, then merged into the directory with set-based upserts
+        keyed by organization and building id. Industries are matched by name and never created. Organization names
+        taken by another organization raise `InvalidImportRecordError`, and nothing is imported.
+        """
+        connection = await self._session.connection()
+        try:
+            for statement in _STAGING_TABLES:
+                await connection.exec_driver_sql(statement)
+
+            records = 0
+            async for batch in batches:
+                await self._copy_batch(connection, batch, start=records)
+                records += len(batch)
+
+            result = await self._merge(connection)
+            result.records = records
+            await self._session.commit()
+        except BaseException:
+            await self._session.rollback()
+            raise
+
+        return result
+
+    @staticmethod
+    async def _copy_batch(connection: AsyncConnection, batch: list[Organization], *, start: int) -> None:
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+
+        buildings, organizations, phones, industries = [], [], [], []
+        for position, org in enumerate(batch, start=start):
+            building = org.building
+            buildings.append(
+                (position, building.id, building.address, building.coordinates["lat"], building.coordinates["lon"])
+            )
+            organizations.append((position, org.id, org.name, building.id))
+            phones.extend((position, org.id, phone_number) for phone_number in org.phones)
+            industries.extend((org.id, industry_name) for industry_name in org.industries)
+
+        await driver_connection.copy_records_to_table(
+            "import_buildings", records=buildings, columns=["position", "id", "address", "lat", "lon"]
+        )
+        await driver_connection.copy_records_to_table(
+            "import_organizations", records=organizations, columns=["position", "id", "name", "building_id"]
+        )
+        await driver_connection.copy_records_to_table(
+            "import_phones", records=phones, columns=["position", "organization_id", "phone_number"]
+        )
+        await driver_connection.copy_records_to_table(
+            "import_industries", records=industries, columns=["organization_id", "industry_name"]
+        )
+
+    @staticmethod
+    async def _merge(connection: AsyncConnection) -> ImportResult:
+        for table in ("import_buildings", "import_organizations", "import_phones", "import_industries"):
+            await connection.exec_driver_sql(f"ANALYZE {table}")
+
+        result = ImportResult()
+        result.buildings_upserted = (await connection.exec_driver_sql(_UPSERT_BUILDINGS)).rowcount
+        conflicts = (await connection.exec_driver_sql(_CONFLICTING_NAMES)).all()
+        if conflicts:
+            raise InvalidImportRecordError(
+                "; ".join(
+                    f"Organization name {name!r} is used by organizations {', '.join(map(str, ids))}"
+                    for name, ids in conflicts
+                )
+            )
+        await connection.exec_driver_sql(_RELEASE_NAMES)
+        result.organizations_upserted = (await connection.exec_driver_sql(_UPSERT_ORGANIZATIONS)).rowcount
+        for statement in _SYNC_SEQUENCES:
+            await connection.exec_driver_sql(statement)
+
+        result.phones_removed = (await connection.exec_driver_sql(_DELETE_PHONES)).rowcount
+        result.phones_added = (await connection.exec_driver_sql(_INSERT_PHONES)).rowcount
+
+        result.unknown_industries = list((await connection.exec_driver_sql(_UNKNOWN_INDUSTRIES)).scalars())
+        result.industry_links_removed = (await connection.exec_driver_sql(_DELETE_INDUSTRY_LINKS)).rowcount
+        result.industry_links_added = (await connection.exec_driver_sql(_INSERT_INDUSTRY_LINKS)).rowcount
+        return result
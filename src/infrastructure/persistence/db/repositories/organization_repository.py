@@ -1,20 +1,75 @@
 from abc import ABC, abstractmethod
-
-from sqlalchemy import or_, func, select
+from collections.abc import AsyncIterator, Collection
+
+from sqlalchemy import (
+    ColumnElement,
+    Float,
+    Integer,
+    Row,
+    Select,
+    Text,
+    and_,
+    any_,
+    case,
+    cast,
+    distinct,
+    func,
+    literal,
+    literal_column,
+    null,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm import contains_eager, joinedload, load_only, selectinload, with_expression
+from geoalchemy2 import Geometry
 from geoalchemy2.elements import WKTElement
 
-from infrastructure.persistence.db.schema import Organization, Industry, Building
+from infrastructure.persistence.db.schema import (
+    Organization,
+    Industry,
+    Building,
+    Phone,
+    industry_closure,
+    organization_industries,
+)
+
+
+def _geography(geometry: ColumnElement | WKTElement) -> ColumnElement:
+    if isinstance(geometry, WKTElement):
+        geometry = literal(geometry, Geometry)
+    return func.geography(geometry)
+
+
+def _json_object(**fields: ColumnElement) -> ColumnElement:
+    # Keys are inlined as literals, Postgres cannot infer the type of bound parameters passed to json_build_object
+    return func.json_build_object(
+        *(arg for key, value in fields.items() for arg in (literal_column(f"'{key}'"), value))
+    )
 
 
 class OrganizationRepository(ABC):
     @abstractmethod
-    async def get_all_organizations(self, *, limit: int, offset: int) -> list[Organization]:
+    async def get_all_organizations(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[str, int] | None = None,
+        fields: frozenset[str] | None = None,
+    ) -> list[Organization]:
+        pass
+
+    @abstractmethod
+    async def find_organization_by_id(
+        self, organization_id: int, *, fields: frozenset[str] | None = None
+    ) -> Organization | None:
         pass
 
     @abstractmethod
-    async def find_organization_by_id(self, organization_id: int) -> Organization | None:
+    async def find_organizations_by_ids(self, organization_ids: list[int]) -> list[Organization]:
         pass
 
     @abstractmethod
@@ -26,11 +81,13 @@ class OrganizationRepository(ABC):
         pass
 
     @abstractmethod
-    async def find_organizations_by_industry_id(self, industry_id: int) -> list[Organization]:
+    async def find_organizations_by_industry_id(
+        self, industry_id: int, *, include_descendants: bool = False
+    ) -> list[Organization]:
         pass
 
     @abstractmethod
-    async def find_organizations_by_geo_point(self, point_wkt: WKTElement) -> list[Organization]:
+    async def find_organizations_by_geo_point(self, point_wkt: WKTElement, radius_m: float) -> list[Organization]:
         pass
 
     @abstractmethod
@@ -47,36 +104,156 @@ class OrganizationRepository(ABC):
         *,
         building_id: int | None = None,
         industry_id: int | None = None,
+        include_subindustries: bool = False,
         organization_name: str | None = None,
         industry_name: str | None = None,
         address: str | None = None,
         point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
         polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
         limit: int,
         offset: int,
+        after: tuple | None = None,
+        fields: frozenset[str] | None = None,
     ) -> list[Organization]:
         pass
 
+    @abstractmethod
+    def stream_organizations_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
+        fetch_size: int,
+    ) -> AsyncIterator[Organization]:
+        pass
+
+    @abstractmethod
+    async def find_organization_document_by_id(self, organization_id: int) -> str | None:
+        pass
+
+    @abstractmethod
+    async def find_organization_documents_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
+        limit: int,
+        offset: int,
+        after: tuple | None = None,
+    ) -> list[Row]:
+        pass
+
+    @abstractmethod
+    async def cluster_organizations_with_filters(
+        self,
+        *,
+        cell_size: float,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> list[Row]:
+        pass
+
+    @abstractmethod
+    async def count_industry_facets_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> list[Row]:
+        pass
+
+    @abstractmethod
+    async def get_organization_version(self, organization_id: int) -> str | None:
+        pass
+
+    @abstractmethod
+    async def get_organizations_version_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> str | None:
+        pass
+
 
 class OrganizationRepositoryImpl(OrganizationRepository):
     def __init__(self, session: AsyncSession):
         self._session = session
 
-    async def get_all_organizations(self, *, limit: int, offset: int) -> list[Organization]:
+    async def get_all_organizations(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[str, int] | None = None,
+        fields: frozenset[str] | None = None,
+    ) -> list[Organization]:
         stmt = (
             select(Organization)
-            .options(
-                selectinload(Organization.building),
-                selectinload(Organization.phones),
-                selectinload(Organization.industries),
-            )
+            .options(*self._load_options(fields))
+            .order_by(Organization.name, Organization.id)
             .limit(limit)
             .offset(offset)
         )
+        if after is not None:
+            stmt = self._seek(stmt, after)
         result = await self._session.execute(stmt)
         return list(result.scalars().all())
 
-    async def find_organization_by_id(self, organization_id: int) -> Organization | None:
+    async def find_organization_by_id(
+        self, organization_id: int, *, fields: frozenset[str] | None = None
+    ) -> Organization | None:
+        stmt = select(Organization).options(*self._load_options(fields)).filter(Organization.id == organization_id)
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def find_organizations_by_ids(self, organization_ids: list[int]) -> list[Organization]:
+        """Load many organizations at once: one query for the organizations and one IN query per relation."""
         stmt = (
             select(Organization)
             .options(
@@ -84,10 +261,10 @@ class OrganizationRepositoryImpl(OrganizationRepository):
                 selectinload(Organization.phones),
                 selectinload(Organization.industries),
             )
-            .filter(Organization.id == organization_id)
+            .filter(Organization.id.in_(organization_ids))
         )
         result = await self._session.execute(stmt)
-        return result.scalar_one_or_none()
+        return list(result.scalars().all())
 
     async def find_organizations_by_name(self, name: str) -> list[Organization]:
         stmt = (
@@ -98,6 +275,7 @@ class OrganizationRepositoryImpl(OrganizationRepository):
                 selectinload(Organization.industries),
             )
             .filter(Organization.name.ilike(f"%{name}%"))
+            .order_by(Organization.name, Organization.id)
         )
         result = await self._session.execute(stmt)
         return list(result.scalars().all())
@@ -111,26 +289,33 @@ class OrganizationRepositoryImpl(OrganizationRepository):
                 selectinload(Organization.industries),
             )
             .filter(Organization.building_id == building_id)
+            .order_by(Organization.name, Organization.id)
         )
         result = await self._session.execute(stmt)
         return list(result.scalars().all())
 
-    async def find_organizations_by_industry_id(self, industry_id: int) -> list[Organization]:
+    async def find_organizations_by_industry_id(
+        self, industry_id: int, *, include_descendants: bool = False
+    ) -> list[Organization]:
         stmt = (
             select(Organization)
-            .join(Organization.industries)
             .options(
                 selectinload(Organization.building),
                 selectinload(Organization.phones),
                 selectinload(Organization.industries),
             )
-            .filter(Industry.id == industry_id)
-            .distinct()
+            .filter(
+                Organization.id.in_(
+                    self._industry_organization_ids(industry_id=industry_id, include_descendants=include_descendants)
+                )
+            )
+            .order_by(Organization.name, Organization.id)
         )
         result = await self._session.execute(stmt)
         return list(result.scalars().all())
 
-    async def find_organizations_by_geo_point(self, point_wkt: WKTElement) -> list[Organization]:
+    async def find_organizations_by_geo_point(self, point_wkt: WKTElement, radius_m: float) -> list[Organization]:
+        distance = self._distance(point_wkt)
         stmt = (
             select(Organization)
             .join(Organization.building)
@@ -138,9 +323,10 @@ class OrganizationRepositoryImpl(OrganizationRepository):
                 selectinload(Organization.building),
                 selectinload(Organization.phones),
                 selectinload(Organization.industries),
+                with_expression(Organization.distance, distance),
             )
-            .filter(func.ST_DWithin(Building.coordinates, point, 0.001))
-            .distinct()
+            .filter(func.ST_DWithin(_geography(Building.coordinates), _geography(point_wkt), radius_m))
+            .order_by(distance, Organization.id)
         )
         result = await self._session.execute(stmt)
         return list(result.scalars().all())
@@ -155,36 +341,21 @@ class OrganizationRepositoryImpl(OrganizationRepository):
                 selectinload(Organization.industries),
             )
             .filter(func.ST_Contains(polygon_wkt, Building.coordinates))
-            .distinct()
+            .order_by(Organization.name, Organization.id)
         )
         result = await self._session.execute(stmt)
         return list(result.scalars().all())
 
     async def find_organizations_by_industry_name(self, industry_name: str) -> list[Organization]:
-        parent1 = aliased(Industry)
-        parent2 = aliased(Industry)
-        parent3 = aliased(Industry)
-
         stmt = (
             select(Organization)
-            .join(Organization.industries)
-            .outerjoin(parent1, Industry.parent_id == parent1.id)
-            .outerjoin(parent2, parent1.parent_id == parent2.id)
-            .outerjoin(parent3, parent2.parent_id == parent3.id)
             .options(
                 selectinload(Organization.building),
                 selectinload(Organization.phones),
                 selectinload(Organization.industries),
             )
-            .filter(
-                or_(
-                    Industry.name.ilike(f"%{industry_name}%"),
-                    parent1.name.ilike(f"%{industry_name}%"),
-                    parent2.name.ilike(f"%{industry_name}%"),
-                    parent3.name.ilike(f"%{industry_name}%"),
-                )
-            )
-            .distinct()
+            .filter(Organization.id.in_(self._industry_organization_ids(industry_name=industry_name)))
+            .order_by(Organization.name, Organization.id)
         )
         result = await self._session.execute(stmt)
         return list(result.scalars().all())
@@ -194,48 +365,427 @@ class OrganizationRepositoryImpl(OrganizationRepository):
         *,
         building_id: int | None = None,
         industry_id: int | None = None,
+        include_subindustries: bool = False,
         organization_name: str | None = None,
         industry_name: str | None = None,
         address: str | None = None,
         point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
         polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
         limit: int,
         offset: int,
+        after: tuple | None = None,
+        fields: frozenset[str] | None = None,
     ) -> list[Organization]:
         """
         Find organizations by many parameters combined.
         All provided filters are combined with AND.
+        `point_wkt` matches buildings within `radius_m` meters of the point.
+        `building_ids`, when given, are the buildings matching the point or polygon filter, found beforehand (e.g. by
+        the in-memory spatial index); they replace the PostGIS predicates, and `point_wkt` only yields distances.
+        Rows are ordered by (name, id), or with `order_by="relevance"` by trigram similarity to the
+        organization_name/address filters, or with `order_by="distance"` by distance to `point_wkt`, and then id.
+        Relevance and distance are exposed as `Organization.relevance` and `Organization.distance`.
+        When `after` is given the page starts right after that sort key.
+        With `fields`, only the relations among them are loaded (see `_load_options`).
         """
-        stmt = select(Organization)
+        stmt = self._organizations_statement(
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+            order_by=order_by,
+            after=after,
+            fields=fields,
+        )
+        result = await self._session.execute(stmt.limit(limit).offset(offset))
+        return list(result.scalars().all())
+
+    async def stream_organizations_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
+        fetch_size: int,
+    ) -> AsyncIterator[Organization]:
+        """
+        Stream every organization matching the filters of `find_organizations_with_filters` through a server-side
+        cursor, `fetch_size` rows (and their relations) at a time, so memory use does not grow with the result.
+        """
+        stmt = self._organizations_statement(
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+            order_by=order_by,
+        )
+        result = await self._session.stream_scalars(stmt.execution_options(yield_per=fetch_size))
+        try:
+            async for organization in result:
+                yield organization
+        finally:
+            await result.close()
+
+    async def find_organization_document_by_id(self, organization_id: int) -> str | None:
+        stmt = (
+            select(self._document())
+            .select_from(Organization)
+            .join(Organization.building)
+            .filter(Organization.id == organization_id)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    async def find_organization_documents_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
+        limit: int,
+        offset: int,
+        after: tuple | None = None,
+    ) -> list[Row]:
+        """
+        Run the same search as `find_organizations_with_filters`, rendering every organization to a JSON
+        document in Postgres within a single query. Rows carry `document` (JSON text) and the sort key columns.
+        """
+        stmt = select(Organization).join(Organization.building)
+        stmt = self._apply_filters(
+            stmt,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+        )
+        stmt, computed = self._apply_order(
+            stmt,
+            order_by=order_by,
+            organization_name=organization_name,
+            address=address,
+            point_wkt=point_wkt,
+            after=after,
+        )
+
+        columns = [
+            self._document(distance=computed.get("distance")).label("document"),
+            Organization.id,
+            Organization.name,
+        ]
+        columns.extend(expression.label(name) for name, expression in computed.items())
+        stmt = stmt.with_only_columns(*columns).limit(limit).offset(offset)
+
+        result = await self._session.execute(stmt)
+        return list(result.all())
+
+    async def cluster_organizations_with_filters(
+        self,
+        *,
+        cell_size: float,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> list[Row]:
+        """
+        Group the organizations of the same search as `find_organizations_with_filters` by the cell of a
+        `cell_size` degree grid their building snaps to (ST_SnapToGrid), south to north and west to east.
+        Rows hold the centroid (lat, lon) of the buildings, the count and, for single organizations, their id.
+        """
+        stmt = select(Organization).join(Organization.building).filter(Building.coordinates.is_not(None))
+        stmt = self._apply_filters(
+            stmt,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+        )
+        matches = stmt.with_only_columns(
+            Organization.id.label("id"),
+            func.ST_SnapToGrid(Building.coordinates, cell_size).label("cell"),
+            Building.latitude.label("lat"),
+            Building.longitude.label("lon"),
+        ).subquery()
+        count = func.count()
+        stmt = (
+            select(
+                func.avg(matches.c.lat).label("lat"),
+                func.avg(matches.c.lon).label("lon"),
+                count.label("count"),
+                case((count == 1, func.min(matches.c.id))).label("organization_id"),
+            )
+            .group_by(matches.c.cell)
+            .order_by(func.ST_Y(matches.c.cell), func.ST_X(matches.c.cell))
+        )
+
+        result = await self._session.execute(stmt)
+        return list(result.all())
 
+    async def count_industry_facets_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> list[Row]:
+        """
+        Count the organizations of the same search as `find_organizations_with_filters` per industry, rolled up the
+        hierarchy through `industry_closure`: an organization counts once towards each industry it is listed under
+        and each of their ancestors. Rows hold the industry id, name and parent_id and the count, largest first.
+        """
+        stmt = select(Organization.id)
         if any([address, point_wkt, polygon_wkt]):
             stmt = stmt.join(Organization.building)
+        matches = self._apply_filters(
+            stmt,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+        ).cte("matches")
+        count = func.count(distinct(organization_industries.c.organization_id))
+        stmt = (
+            select(Industry.id, Industry.name, Industry.parent_id, count.label("count"))
+            .select_from(matches)
+            .join(organization_industries, organization_industries.c.organization_id == matches.c.id)
+            .join(industry_closure, industry_closure.c.descendant_id == organization_industries.c.industry_id)
+            .join(Industry, Industry.id == industry_closure.c.ancestor_id)
+            .group_by(Industry.id)
+            .order_by(count.desc(), Industry.name, Industry.id)
+        )
 
-        if any([industry_id, industry_name]):
-            stmt = stmt.join(Organization.industries)
+        result = await self._session.execute(stmt)
+        return list(result.all())
 
-        if industry_name:
-            parent1 = aliased(Industry)
-            parent2 = aliased(Industry)
-            parent3 = aliased(Industry)
-
-            stmt = (
-                stmt.outerjoin(parent1, Industry.parent_id == parent1.id)
-                .outerjoin(parent2, parent1.parent_id == parent2.id)
-                .outerjoin(parent3, parent2.parent_id == parent3.id)
-                .filter(
-                    or_(
-                        Industry.name.ilike(f"%{industry_name}%"),
-                        parent1.name.ilike(f"%{industry_name}%"),
-                        parent2.name.ilike(f"%{industry_name}%"),
-                        parent3.name.ilike(f"%{industry_name}%"),
+    async def get_organization_version(self, organization_id: int) -> str | None:
+        matches = self._version_columns().filter(Organization.id == organization_id).cte("matches")
+        return await self._session.scalar(self._version(matches))
+
+    async def get_organizations_version_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> str | None:
+        """
+        Version of the organizations of the same search as `find_organizations_with_filters`, on all pages: their
+        count and latest `updated_at`, with those of their buildings, phones and industry links, and of industries.
+        It changes with every page of the search, at the cost of one aggregate over the matching organizations.
+        """
+        matches = self._apply_filters(
+            self._version_columns(),
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+        ).cte("matches")
+        return await self._session.scalar(self._version(matches))
+
+    @staticmethod
+    def _version_columns() -> Select:
+        return select(
+            Organization.id,
+            func.greatest(Organization.updated_at, Building.updated_at).label("updated_at"),
+        ).join(Organization.building)
+
+    @staticmethod
+    def _version(matches) -> Select:
+        """
+        Version of the organizations in `matches`. Deletions show in the counts, and insertions and updates in the
+        latest timestamps. Industries are counted whole, since facets and documents show their ancestors too.
+        """
+
+        def summary(updated_at: ColumnElement) -> ColumnElement[str]:
+            return func.concat_ws(literal_column("' '"), func.count(), func.max(updated_at))
+
+        matching_ids = select(matches.c.id)
+        parts = [
+            select(summary(matches.c.updated_at)).select_from(matches),
+            select(summary(Phone.updated_at)).filter(Phone.organization_id.in_(matching_ids)),
+            select(summary(organization_industries.c.created_at)).filter(
+                organization_industries.c.organization_id.in_(matching_ids)
+            ),
+            select(summary(Industry.updated_at)),
+        ]
+        return select(func.concat_ws(literal_column("'/'"), *(part.scalar_subquery() for part in parts)))
+
+    def _organizations_statement(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
+        after: tuple | None = None,
+        fields: frozenset[str] | None = None,
+    ) -> Select:
+        """Select of the filtered and ordered organizations, with relations and computed values loaded."""
+        stmt = select(Organization)
+        building_joined = any([address, point_wkt, polygon_wkt])
+        if building_joined:
+            stmt = stmt.join(Organization.building)
+
+        stmt = self._apply_filters(
+            stmt,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+        )
+        stmt, computed = self._apply_order(
+            stmt,
+            order_by=order_by,
+            organization_name=organization_name,
+            address=address,
+            point_wkt=point_wkt,
+            after=after,
+        )
+        for name, expression in computed.items():
+            stmt = stmt.options(with_expression(getattr(Organization, name), expression))
+
+        return stmt.options(*self._load_options(fields, building_joined=building_joined))
+
+    @staticmethod
+    def _load_options(fields: frozenset[str] | None, *, building_joined: bool = False) -> list:
+        """
+        Loader options for the relations in `fields`, all of them when None.
+        Sparse loads skip the columns no field needs and fetch the building in the same query, so that
+        e.g. `{"id", "name", "building"}` takes a single query.
+        """
+        if fields is None:
+            return [
+                selectinload(Organization.building),
+                selectinload(Organization.phones),
+                selectinload(Organization.industries),
+            ]
+
+        options = [load_only(Organization.id, Organization.name, Organization.building_id)]
+        if "building" in fields:
+            options.append(
+                contains_eager(Organization.building) if building_joined else joinedload(Organization.building)
+            )
+        if "phones" in fields:
+            options.append(selectinload(Organization.phones))
+        if "industries" in fields:
+            options.append(selectinload(Organization.industries))
+        return options
+
+    def _apply_filters(
+        self,
+        stmt: Select,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> Select:
+        """Add the search filters to a statement; building filters expect `buildings` to be joined already."""
+        if any([industry_id, industry_name]):
+            stmt = stmt.filter(
+                Organization.id.in_(
+                    self._industry_organization_ids(
+                        industry_id=industry_id,
+                        industry_name=industry_name,
+                        include_descendants=include_subindustries,
                     )
                 )
             )
 
-        if industry_id:
-            stmt = stmt.filter(Industry.id == industry_id)
-
         if building_id:
             stmt = stmt.filter(Organization.building_id == building_id)
 
@@ -245,22 +795,146 @@ class OrganizationRepositoryImpl(OrganizationRepository):
         if address:
             stmt = stmt.filter(Building.address.ilike(f"%{address}%"))
 
-        if point_wkt:
-            stmt = stmt.filter(func.ST_DWithin(Building.coordinates, point_wkt, 0.001))
+        if building_ids is not None:
+            # Buildings matched by the geo filters beforehand, bound as a single array parameter
+            stmt = stmt.filter(Organization.building_id == any_(literal(list(building_ids), ARRAY(Integer))))
+        else:
+            if point_wkt:
+                stmt = stmt.filter(func.ST_DWithin(_geography(Building.coordinates), _geography(point_wkt), radius_m))
 
-        if polygon_wkt:
-            stmt = stmt.filter(func.ST_Contains(polygon_wkt, Building.coordinates))
+            if polygon_wkt:
+                stmt = stmt.filter(func.ST_Contains(polygon_wkt, Building.coordinates))
 
-        stmt = (
-            stmt.options(
-                selectinload(Organization.building),
-                selectinload(Organization.phones),
-                selectinload(Organization.industries),
+        return stmt
+
+    def _apply_order(
+        self,
+        stmt: Select,
+        *,
+        order_by: str,
+        organization_name: str | None,
+        address: str | None,
+        point_wkt: WKTElement | None,
+        after: tuple | None,
+    ) -> tuple[Select, dict[str, ColumnElement[float]]]:
+        """
+        Order a statement and seek past `after`.
+        Returns the computed per-row values by name: `distance` for point searches, `relevance` when ordering by it.
+        """
+        computed = {}
+        if point_wkt is not None:
+            computed["distance"] = self._distance(point_wkt)
+
+        if order_by == "relevance":
+            computed["relevance"] = self._relevance(organization_name=organization_name, address=address)
+            stmt = stmt.order_by(computed["relevance"].desc(), Organization.id)
+            if after is not None:
+                stmt = self._seek_by(stmt, computed["relevance"], after, descending=True)
+        elif order_by == "distance":
+            # KNN ordering, served by the GiST index on geography(buildings.coordinates)
+            stmt = stmt.order_by(computed["distance"], Organization.id)
+            if after is not None:
+                stmt = self._seek_by(stmt, computed["distance"], after)
+        else:
+            stmt = stmt.order_by(Organization.name, Organization.id)
+            if after is not None:
+                stmt = self._seek(stmt, after)
+
+        return stmt, computed
+
+    @staticmethod
+    def _document(distance: ColumnElement[float] | None = None) -> ColumnElement[str]:
+        """
+        JSON document of an organization with the same shape as `OrganizationDTO`.
+        Phones and industries are aggregated by correlated subqueries; `buildings` must be joined.
+        """
+        phones = (
+            select(
+                func.coalesce(
+                    func.json_agg(aggregate_order_by(Phone.phone_number, Phone.id)), literal_column("'[]'::json")
+                )
             )
-            .distinct()
-            .limit(limit)
-            .offset(offset)
+            .filter(Phone.organization_id == Organization.id)
+            .scalar_subquery()
+        )
+        industries = (
+            select(
+                func.coalesce(
+                    func.json_agg(aggregate_order_by(Industry.name, Industry.id)), literal_column("'[]'::json")
+                )
+            )
+            .select_from(organization_industries)
+            .join(Industry, Industry.id == organization_industries.c.industry_id)
+            .filter(organization_industries.c.organization_id == Organization.id)
+            .scalar_subquery()
         )
+        coordinates = _json_object(lat=func.ST_Y(Building.coordinates), lon=func.ST_X(Building.coordinates))
+        building = _json_object(id=Building.id, address=Building.address, coordinates=coordinates)
+        document = _json_object(
+            id=Organization.id,
+            name=Organization.name,
+            phones=phones,
+            building=building,
+            industries=industries,
+            distance=distance if distance is not None else null(),
+        )
+        return cast(document, Text)
 
-        result = await self._session.execute(stmt)
-        return list(result.scalars().all())
+    @staticmethod
+    def _industry_organization_ids(
+        *,
+        industry_id: int | None = None,
+        industry_name: str | None = None,
+        include_descendants: bool = False,
+    ) -> Select:
+        """
+        Ids of organizations linked to a matching industry.
+        An industry matches `industry_name` when it or any of its ancestors does, which is resolved through
+        `industry_closure` at any depth. Both conditions, when given, apply to the same linked industry.
+        """
+        stmt = select(organization_industries.c.organization_id)
+
+        if industry_name:
+            stmt = stmt.join(
+                industry_closure, industry_closure.c.descendant_id == organization_industries.c.industry_id
+            ).join(Industry, Industry.id == industry_closure.c.ancestor_id)
+            stmt = stmt.filter(Industry.name.ilike(f"%{industry_name}%"))
+
+        if industry_id and include_descendants:
+            stmt = stmt.filter(
+                organization_industries.c.industry_id.in_(
+                    select(industry_closure.c.descendant_id).filter(industry_closure.c.ancestor_id == industry_id)
+                )
+            )
+        elif industry_id:
+            stmt = stmt.filter(organization_industries.c.industry_id == industry_id)
+
+        return stmt
+
+    @staticmethod
+    def _relevance(*, organization_name: str | None, address: str | None) -> ColumnElement[float]:
+        """Trigram word similarity of the text filters, computed by pg_trgm."""
+        scores = []
+        if organization_name:
+            scores.append(func.word_similarity(organization_name, Organization.name))
+        if address:
+            scores.append(func.word_similarity(address, Building.address))
+        return sum(scores[1:], scores[0]) if scores else literal(0.0, Float)
+
+    @staticmethod
+    def _distance(point_wkt: WKTElement) -> ColumnElement[float]:
+        """Distance in meters from the building to the point, as the KNN `<->` operator on geography."""
+        return _geography(Building.coordinates).op("<->", return_type=Float)(_geography(point_wkt))
+
+    @staticmethod
+    def _seek_by(stmt, key: ColumnElement, after: tuple[float, int], *, descending: bool = False):
+        """Apply keyset pagination on (key, id), with key ascending or descending and id ascending."""
+        value, organization_id = after
+        past_value = key < value if descending else key > value
+        return stmt.filter(or_(past_value, and_(key == value, Organization.id > organization_id)))
+
+    @staticmethod
+    def _seek(stmt, after: tuple[str, int]):
+        """Apply keyset pagination on (name, id), served by the unique index on name."""
+        name, organization_id = after
+        return stmt.filter(tuple_(Organization.name, Organization.id) > tuple_(name, organization_id))
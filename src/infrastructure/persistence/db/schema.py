@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Index
-from sqlalchemy.orm import DeclarativeBase, relationship
+from sqlalchemy.orm import DeclarativeBase, column_property, deferred, query_expression, relationship
 from sqlalchemy.sql import func
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from geoalchemy2 import Geometry
@@ -28,9 +28,18 @@ class Organization(Base):
     phones = relationship("Phone", back_populates="organization")
     building = relationship("Building", back_populates="organizations")
     industries = relationship("Industry", secondary=organization_industries, back_populates="organizations")
+    # Search score, only populated by queries ordering by relevance
+    relevance = query_expression()
+    # Distance in meters to the searched point, only populated by point searches
+    distance = query_expression()
 
 
-Index("idx_organizations_name", Organization.name, postgresql_using="gin")
+Index(
+    "idx_organizations_name",
+    Organization.name,
+    postgresql_using="gin",
+    postgresql_ops={"name": "gin_trgm_ops"},
+)
 
 
 class Phone(Base):
@@ -48,12 +57,28 @@ class Building(Base):
     id = Column(Integer, primary_key=True, index=True)
     address = Column(String, nullable=False)
     coordinates = Column(Geometry(geometry_type="POINT", srid=4326, spatial_index=True))
+    # Coordinates are read as plain floats; the geometry itself is only needed in SQL expressions
+    latitude = column_property(func.ST_Y(coordinates))
+    longitude = column_property(func.ST_X(coordinates))
+    coordinates = deferred(coordinates)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     organizations = relationship("Organization", back_populates="building")
 
 
-Index("idx_building_address", Building.address, postgresql_using="gin")
+# Serves metric ST_DWithin radius checks and KNN (<->) ordering, which are done on geography
+Index(
+    "idx_buildings_coordinates_geography",
+    func.geography(Building.__table__.c.coordinates),
+    postgresql_using="gist",
+)
+
+Index(
+    "idx_building_address",
+    Building.address,
+    postgresql_using="gin",
+    postgresql_ops={"address": "gin_trgm_ops"},
+)
 
 
 class Industry(Base):
@@ -67,4 +92,22 @@ class Industry(Base):
     children = relationship("Industry", lazy="joined", join_depth=3)
 
 
-Index("idx_industry_name", Industry.name, postgresql_using="gin")
+Index(
+    "idx_industry_name",
+    Industry.name,
+    postgresql_using="gin",
+    postgresql_ops={"name": "gin_trgm_ops"},
+)
+
+
+# Transitive closure of the industry hierarchy, including a depth 0 row per industry.
+# Maintained by the `industry_closure_maintain` trigger on `industries`.
+industry_closure = Table(
+    "industry_closure",
+    Base.metadata,
+    Column("ancestor_id", Integer, ForeignKey("industries.id", ondelete="CASCADE"), primary_key=True),
+    Column("descendant_id", Integer, ForeignKey("industries.id", ondelete="CASCADE"), primary_key=True),
+    Column("depth", Integer, nullable=False),
+)
+
+Index("idx_industry_closure_descendant", industry_closure.c.descendant_id, industry_closure.c.ancestor_id)
@@ -0,0 +1,63 @@
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+
+class _Scope:
+    __slots__ = ("shared", "sessions")
+
+    def __init__(self):
+        self.shared: AsyncSession | None = None
+        self.sessions: list[AsyncSession] = []
+
+
+class ScopedSessions:
+    """
+    Shares one session per scope, e.g. a request, and closes it when the scope ends, which returns its connection
+    to the pool. Tasks started within a scope share its session. Outside of any scope every call gets a new session
+    which the caller has to close.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]):
+        self._session_factory = session_factory
+        self._scope: ContextVar[_Scope | None] = ContextVar("db_session_scope", default=None)
+
+    def get(self) -> AsyncSession:
+        scope = self._scope.get()
+        if scope is None:
+            return self._session_factory()
+        if scope.shared is None:
+            scope.shared = self._session_factory()
+            scope.sessions.append(scope.shared)
+        return scope.shared
+
+    def open(self) -> AsyncSession:
+        """
+        Return a session besides the shared one, for a query running concurrently with it on a connection of its
+        own. It is closed with the scope too.
+        """
+        session = self._session_factory()
+        scope = self._scope.get()
+        if scope is not None:
+            scope.sessions.append(session)
+        return session
+
+    @asynccontextmanager
+    async def scope(self) -> AsyncIterator[None]:
+        scope = _Scope()
+        token = self._scope.set(scope)
+        try:
+            yield
+        finally:
+            self._scope.reset(token)
+            for session in scope.sessions:
+                # One failing close must not keep the other sessions' connections out of the pool
+                try:
+                    await session.close()
+                except Exception:
+                    logger.exception("Failed to close a database session")
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .replicas import use_primary
+
+# Start of the oldest transaction open on the database, this one included, as the timestamp `updated_at` holds
+_OLDEST_TRANSACTION_START = text(
+    "SELECT min(xact_start)::timestamp FROM pg_stat_activity WHERE datname = current_database()"
+)
+
+
+async def change_watermark(session: AsyncSession) -> datetime:
+    """
+    Return the watermark to poll `updated_at >= watermark` from, for rows changed after the session's next reads.
+
+    `updated_at` is set to now(), the start of the writing transaction, so a transaction that commits after a poll
+    can write timestamps older than anything that poll read. Every transaction not yet committed has started after
+    the oldest one open now, which makes its start a watermark that misses none of them. Rows of transactions that
+    commit before the next reads are seen twice, which pollers have to tolerate.
+
+    The session is routed to the primary, where the writers run; its next reads have to follow in the same session.
+    Writers must connect as the same role or one whose sessions the reader may see in `pg_stat_activity`.
+    """
+    use_primary(session)
+    return await session.scalar(_OLDEST_TRANSACTION_START)
@@ -0,0 +1,11 @@
+from .repository import SnapshotOrganizationRepositoryImpl
+from .snapshot import DirectorySnapshot, load_snapshot
+from .store import SnapshotStats, SnapshotStore
+
+__all__ = [
+    "DirectorySnapshot",
+    "SnapshotOrganizationRepositoryImpl",
+    "SnapshotStats",
+    "SnapshotStore",
+    "load_snapshot",
+]
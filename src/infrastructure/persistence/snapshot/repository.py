@@ -0,0 +1,484 @@
+import asyncio
+import bisect
+import itertools
+import math
+import re
+from collections import Counter
+from collections.abc import AsyncIterator, Collection, Iterator, Sequence
+
+from geoalchemy2.elements import WKTElement
+
+from infrastructure.persistence.db.repositories import OrganizationRepository
+from infrastructure.spatial import distance_m
+
+from .snapshot import ClusterRecord, DirectorySnapshot, DocumentRecord, IndustryFacetRecord, OrganizationRecord
+from .store import SnapshotStore
+from .text import LikePattern, trigrams, word_similarity
+
+# "lon lat" pairs of WKT points and polygons
+_WKT_COORDINATES = re.compile(r"(-?[\d.]+(?:[eE][-+]?\d+)?)\s+(-?[\d.]+(?:[eE][-+]?\d+)?)")
+
+
+def _coordinates(wkt: WKTElement) -> list[tuple[float, float]]:
+    """Return the (lat, lon) pairs of a WKT point or polygon."""
+    return [(float(lat), float(lon)) for lon, lat in _WKT_COORDINATES.findall(wkt.data)]
+
+
+class SnapshotOrganizationRepositoryImpl(OrganizationRepository):
+    """
+    Read-only organization repository answering every query from the current snapshot of a `SnapshotStore`,
+    without the database. Each call reads a single snapshot, even if a rebuild swaps in a new one meanwhile.
+    Filters behave like the SQL ones: text filters are ILIKE patterns, relevance is pg_trgm's word similarity,
+    distances are great-circle distances on a sphere like the `<->` operator and polygons have straight edges in
+    lat/lon. Names are ordered by code point, as by the "C" collation. All relations are always at hand, so
+    `fields` is ignored.
+    """
+
+    def __init__(self, store: SnapshotStore):
+        self._store = store
+
+    async def get_all_organizations(
+        self,
+        *,
+        limit: int,
+        offset: int,
+        after: tuple[str, int] | None = None,
+        fields: frozenset[str] | None = None,
+    ) -> list[OrganizationRecord]:
+        snapshot = self._store.snapshot
+        start = snapshot.seek(after) if after is not None else 0
+        return [snapshot.organization(row) for row in range(start + offset, min(start + offset + limit, len(snapshot)))]
+
+    async def find_organization_by_id(
+        self, organization_id: int, *, fields: frozenset[str] | None = None
+    ) -> OrganizationRecord | None:
+        snapshot = self._store.snapshot
+        row = snapshot.row(organization_id)
+        return snapshot.organization(row) if row is not None else None
+
+    async def find_organizations_by_ids(self, organization_ids: list[int]) -> list[OrganizationRecord]:
+        snapshot = self._store.snapshot
+        rows = (snapshot.row(organization_id) for organization_id in organization_ids)
+        return [snapshot.organization(row) for row in rows if row is not None]
+
+    async def find_organizations_by_name(self, name: str) -> list[OrganizationRecord]:
+        return self._find_all(organization_name=name)
+
+    async def find_organizations_by_building_id(self, building_id: int) -> list[OrganizationRecord]:
+        return self._find_all(building_id=building_id)
+
+    async def find_organizations_by_industry_id(
+        self, industry_id: int, *, include_descendants: bool = False
+    ) -> list[OrganizationRecord]:
+        return self._find_all(industry_id=industry_id, include_subindustries=include_descendants)
+
+    async def find_organizations_by_geo_point(self, point_wkt: WKTElement, radius_m: float) -> list[OrganizationRecord]:
+        return self._find_all(point_wkt=point_wkt, radius_m=radius_m, order_by="distance")
+
+    async def find_organizations_by_geo_area(self, polygon_wkt: WKTElement) -> list[OrganizationRecord]:
+        return self._find_all(polygon_wkt=polygon_wkt)
+
+    async def find_organizations_by_industry_name(self, industry_name: str) -> list[OrganizationRecord]:
+        return self._find_all(industry_name=industry_name)
+
+    async def find_organizations_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
+        limit: int,
+        offset: int,
+        after: tuple | None = None,
+        fields: frozenset[str] | None = None,
+    ) -> list[OrganizationRecord]:
+        snapshot = self._store.snapshot
+        matches = self._search(
+            snapshot,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+            order_by=order_by,
+            after=after,
+        )
+        return [
+            snapshot.organization(row, relevance=relevance, distance=distance)
+            for row, relevance, distance in itertools.islice(matches, offset, offset + limit)
+        ]
+
+    async def stream_organizations_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
+        fetch_size: int,
+    ) -> AsyncIterator[OrganizationRecord]:
+        """Stream every organization matching the filters, yielding to the event loop every `fetch_size` of them."""
+        snapshot = self._store.snapshot
+        matches = self._search(
+            snapshot,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+            order_by=order_by,
+        )
+        for count, (row, relevance, distance) in enumerate(matches, start=1):
+            yield snapshot.organization(row, relevance=relevance, distance=distance)
+            if count % fetch_size == 0:
+                await asyncio.sleep(0)
+
+    async def find_organization_document_by_id(self, organization_id: int) -> str | None:
+        snapshot = self._store.snapshot
+        row = snapshot.row(organization_id)
+        return snapshot.document(row) if row is not None else None
+
+    async def find_organization_documents_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
+        limit: int,
+        offset: int,
+        after: tuple | None = None,
+    ) -> list[DocumentRecord]:
+        snapshot = self._store.snapshot
+        matches = self._search(
+            snapshot,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+            order_by=order_by,
+            after=after,
+        )
+        return [
+            DocumentRecord(
+                document=snapshot.document(row, distance=distance),
+                id=snapshot.ids[row],
+                name=snapshot.names[row],
+                relevance=relevance,
+                distance=distance,
+            )
+            for row, relevance, distance in itertools.islice(matches, offset, offset + limit)
+        ]
+
+    async def cluster_organizations_with_filters(
+        self,
+        *,
+        cell_size: float,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> list[ClusterRecord]:
+        snapshot = self._store.snapshot
+        matches = self._search(
+            snapshot,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+        )
+        # Cells as ST_SnapToGrid rounds coordinates to them: (count, sum of lats, sum of lons, first organization)
+        cells: dict[tuple[int, int], list] = {}
+        for row, _, _ in matches:
+            building_row = snapshot.building_rows[row]
+            lat, lon = snapshot.latitudes[building_row], snapshot.longitudes[building_row]
+            if math.isnan(lat):
+                continue
+            cell = cells.setdefault((round(lat / cell_size), round(lon / cell_size)), [0, 0.0, 0.0, snapshot.ids[row]])
+            cell[0] += 1
+            cell[1] += lat
+            cell[2] += lon
+        return [
+            ClusterRecord(
+                lat=lat_sum / count,
+                lon=lon_sum / count,
+                count=count,
+                organization_id=organization_id if count == 1 else None,
+            )
+            for _, (count, lat_sum, lon_sum, organization_id) in sorted(cells.items())
+        ]
+
+    async def count_industry_facets_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> list[IndustryFacetRecord]:
+        snapshot = self._store.snapshot
+        matches = self._search(
+            snapshot,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            organization_name=organization_name,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+        )
+        counts = Counter()
+        for row, _, _ in matches:
+            linked = snapshot.industry_links[snapshot.industry_offsets[row] : snapshot.industry_offsets[row + 1]]
+            # Once per organization, like count(DISTINCT organization_id) over industry_closure
+            counts.update(
+                {ancestor_id for linked_id in linked for ancestor_id in snapshot.industry_ancestors[linked_id]}
+            )
+        facets = [
+            IndustryFacetRecord(
+                id=industry.id, name=industry.name, parent_id=industry.parent_id, count=counts[industry.id]
+            )
+            for industry in map(snapshot.industries.__getitem__, counts)
+        ]
+        facets.sort(key=lambda facet: (-facet.count, facet.name, facet.id))
+        return facets
+
+    async def get_organization_version(self, organization_id: int) -> str | None:
+        return self._store.snapshot.version
+
+    async def get_organizations_version_with_filters(
+        self,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+    ) -> str | None:
+        # Every search of a snapshot changes with the snapshot
+        return self._store.snapshot.version
+
+    def _find_all(self, **filters) -> list[OrganizationRecord]:
+        snapshot = self._store.snapshot
+        return [
+            snapshot.organization(row, relevance=relevance, distance=distance)
+            for row, relevance, distance in self._search(snapshot, **filters)
+        ]
+
+    def _search(
+        self,
+        snapshot: DirectorySnapshot,
+        *,
+        building_id: int | None = None,
+        industry_id: int | None = None,
+        include_subindustries: bool = False,
+        organization_name: str | None = None,
+        industry_name: str | None = None,
+        address: str | None = None,
+        point_wkt: WKTElement | None = None,
+        radius_m: float | None = None,
+        polygon_wkt: WKTElement | None = None,
+        building_ids: Collection[int] | None = None,
+        order_by: str = "name",
+        after: tuple | None = None,
+    ) -> Iterator[tuple[int, float | None, float | None]]:
+        """
+        Rows matching the filters as (row, relevance, distance), in the order of `order_by` and starting after the
+        sort key `after`. Ordered by name, rows are produced lazily, so a page only scans up to its last row.
+        """
+        rows = self._candidate_rows(
+            snapshot,
+            building_id=building_id,
+            industry_id=industry_id,
+            include_subindustries=include_subindustries,
+            industry_name=industry_name,
+            address=address,
+            point_wkt=point_wkt,
+            radius_m=radius_m,
+            polygon_wkt=polygon_wkt,
+            building_ids=building_ids,
+        )
+        # Rows are numbered in (name, id) order, so seeking is a binary search
+        start = snapshot.seek(after) if order_by == "name" and after is not None else 0
+        name_like = LikePattern(organization_name) if organization_name else None
+        if rows is None and name_like is not None:
+            # Without other filters to narrow rows down, names are scanned all at once
+            rows, name_like = snapshot.lowered_names.matching(name_like, start=start), None
+        elif rows is None:
+            rows = range(start, len(snapshot))
+        else:
+            rows = rows[bisect.bisect_left(rows, start) :]
+        point = _coordinates(point_wkt)[0] if point_wkt is not None else None
+
+        def matches() -> Iterator[tuple[int, float | None]]:
+            for row in rows:
+                if name_like is not None and not name_like.matches(snapshot.lowered_names[row]):
+                    continue
+                distance = None
+                if point is not None:
+                    building_row = snapshot.building_rows[row]
+                    distance = distance_m(*point, snapshot.latitudes[building_row], snapshot.longitudes[building_row])
+                yield row, distance
+
+        if order_by == "relevance":
+            name_trigrams = trigrams(organization_name) if organization_name else None
+            address_trigrams = trigrams(address) if address else None
+            scored = []
+            for row, distance in matches():
+                relevance = 0.0
+                if name_trigrams is not None:
+                    relevance += word_similarity(name_trigrams, snapshot.names[row])
+                if address_trigrams is not None:
+                    relevance += word_similarity(address_trigrams, snapshot.addresses[snapshot.building_rows[row]])
+                scored.append((row, relevance, distance))
+            scored.sort(key=lambda match: (-match[1], snapshot.ids[match[0]]))
+            if after is not None:
+                value, organization_id = after
+                scored = [
+                    match
+                    for match in scored
+                    if match[1] < value or (match[1] == value and snapshot.ids[match[0]] > organization_id)
+                ]
+            return iter(scored)
+
+        if order_by == "distance":
+            if point is None:
+                raise ValueError("Ordering by distance needs a point")
+            by_distance = sorted(matches(), key=lambda match: (match[1], snapshot.ids[match[0]]))
+            if after is not None:
+                by_distance = [match for match in by_distance if (match[1], snapshot.ids[match[0]]) > tuple(after)]
+            return ((row, None, distance) for row, distance in by_distance)
+
+        return ((row, None, distance) for row, distance in matches())
+
+    @staticmethod
+    def _candidate_rows(
+        snapshot: DirectorySnapshot,
+        *,
+        building_id: int | None,
+        industry_id: int | None,
+        include_subindustries: bool,
+        industry_name: str | None,
+        address: str | None,
+        point_wkt: WKTElement | None,
+        radius_m: float | None,
+        polygon_wkt: WKTElement | None,
+        building_ids: Collection[int] | None,
+    ) -> Sequence[int] | None:
+        """
+        Rows narrowed down by the industry and building filters, in ascending order; None without such filters.
+        An industry matches `industry_name` when it or any of its ancestors does; both industry conditions, when
+        given, apply to the same linked industry.
+        """
+        candidates: set[int] | None = None
+
+        if industry_id or industry_name:
+            if industry_id:
+                industry_ids = (
+                    snapshot.industry_descendants.get(industry_id, frozenset())
+                    if include_subindustries
+                    else {industry_id}
+                )
+            else:
+                industry_ids = snapshot.industries.keys()
+            if industry_name:
+                industry_like = LikePattern(industry_name)
+                industry_ids = [
+                    matched_id
+                    for matched_id in industry_ids
+                    if matched_id in snapshot.industries
+                    and any(
+                        industry_like.matches(snapshot.lowered_industry_names[ancestor_id])
+                        for ancestor_id in snapshot.industry_ancestors[matched_id]
+                    )
+                ]
+            candidates = snapshot.industry_rows(industry_ids)
+
+        matched_buildings: list[set[int]] = []
+        if building_id:
+            matched_buildings.append({snapshot.building_row(building_id)})
+        if address:
+            matched_buildings.append(set(snapshot.lowered_addresses.matching(LikePattern(address))))
+        if building_ids is not None:
+            # Buildings matched by the geo filters beforehand replace the point and polygon filters
+            matched_buildings.append({snapshot.building_row(matched_id) for matched_id in building_ids})
+        else:
+            if point_wkt:
+                lat, lon = _coordinates(point_wkt)[0]
+                nearby = snapshot.locations.within_radius(lat, lon, radius_m)
+                matched_buildings.append({snapshot.building_row(matched_id) for matched_id in nearby})
+            if polygon_wkt:
+                inside = snapshot.locations.within_polygon(_coordinates(polygon_wkt))
+                matched_buildings.append({snapshot.building_row(matched_id) for matched_id in inside})
+
+        if matched_buildings:
+            building_rows = set.intersection(*matched_buildings)
+            building_rows.discard(-1)
+            located = snapshot.organization_rows(building_rows)
+            candidates = located if candidates is None else candidates & located
+
+        return sorted(candidates) if candidates is not None else None
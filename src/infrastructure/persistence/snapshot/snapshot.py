@@ -0,0 +1,357 @@
+import asyncio
+import bisect
+import math
+import sys
+from array import array
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from infrastructure.persistence.db.repositories import OrganizationRepositoryImpl
+from infrastructure.persistence.db.schema import Building, Industry, Organization, Phone, organization_industries
+from infrastructure.spatial import BuildingSpatialIndex
+
+from .text import TextColumn
+
+
+@dataclass(frozen=True, slots=True)
+class BuildingRecord:
+    id: int
+    address: str
+    latitude: float | None
+    longitude: float | None
+
+
+@dataclass(frozen=True, slots=True)
+class PhoneRecord:
+    phone_number: str
+
+
+@dataclass(frozen=True, slots=True)
+class IndustryRecord:
+    id: int
+    name: str
+    parent_id: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class OrganizationRecord:
+    """Organization read from a snapshot, with the attributes of `schema.Organization` the mappers and cursors use."""
+
+    id: int
+    name: str
+    building_id: int
+    building: BuildingRecord
+    phones: tuple[PhoneRecord, ...]
+    industries: tuple[IndustryRecord, ...]
+    relevance: float | None = None
+    distance: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class DocumentRecord:
+    """Row of `find_organization_documents_with_filters`: the JSON document and the sort key values."""
+
+    document: str
+    id: int
+    name: str
+    relevance: float | None = None
+    distance: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class ClusterRecord:
+    """Row of `cluster_organizations_with_filters`."""
+
+    lat: float
+    lon: float
+    count: int
+    organization_id: int | None
+
+
+@dataclass(frozen=True, slots=True)
+class IndustryFacetRecord:
+    """Row of `count_industry_facets_with_filters`."""
+
+    id: int
+    name: str
+    parent_id: int | None
+    count: int
+
+
+class DirectorySnapshot:
+    """
+    Immutable, columnar copy of the directory.
+
+    Organizations are rows ordered by (name, id), so that row numbers are also the default sort order. Their columns
+    are arrays (ids, building rows), lists of interned strings (names) and a `TextColumn` of lowercased names for
+    ILIKE searches. Phones and industries of row `r` are the entries between `offsets[r]` and `offsets[r + 1]` of
+    flat columns. Buildings are rows ordered by id, each with the organization rows it houses, and their locations are
+    indexed on a grid. Industries come with their ancestors and descendants, each industry included in both like in
+    `industry_closure`.
+
+    Rows are given as tuples: organizations (id, name, building_id), buildings (id, address, latitude, longitude),
+    phones (organization_id, phone_number) in display order, industries (id, name, parent_id) and
+    organization_industries (organization_id, industry_id). `version` is the version of the whole directory the
+    rows were read from, as told by the SQL repository, which every search of the snapshot answers with.
+    """
+
+    def __init__(
+        self,
+        *,
+        organizations: Iterable[Sequence],
+        buildings: Iterable[Sequence],
+        phones: Iterable[Sequence],
+        industries: Iterable[Sequence],
+        organization_industries: Iterable[Sequence],
+        cell_size: float = 0.01,
+        version: str | None = None,
+    ):
+        self.version = version
+        self._load_buildings(buildings, cell_size)
+        self._load_industries(industries)
+        self._load_organizations(organizations, phones, organization_industries)
+        self._index_organizations()
+        self.memory_bytes = self._memory_bytes()
+
+    def _load_buildings(self, buildings: Iterable[Sequence], cell_size: float) -> None:
+        buildings = sorted(buildings, key=lambda row: row[0])
+        self.building_ids = array("i", (row[0] for row in buildings))
+        self.addresses = [sys.intern(row[1]) for row in buildings]
+        self.lowered_addresses = TextColumn(self.addresses)
+        self.latitudes = array("d", (math.nan if row[2] is None else row[2] for row in buildings))
+        self.longitudes = array("d", (math.nan if row[3] is None else row[3] for row in buildings))
+        self.locations = BuildingSpatialIndex(
+            session_factory=None,
+            cell_size=cell_size,
+            max_building_id=max(self.building_ids, default=0),
+            max_matches=len(buildings),
+        )
+        self.locations.load((row[0], row[2], row[3]) for row in buildings if row[2] is not None)
+
+    def _load_industries(self, industries: Iterable[Sequence]) -> None:
+        self.industries = {
+            row[0]: IndustryRecord(id=row[0], name=sys.intern(row[1]), parent_id=row[2]) for row in industries
+        }
+        self.lowered_industry_names = {industry.id: industry.name.lower() for industry in self.industries.values()}
+        self.industry_ancestors = {industry_id: self._ancestors(industry_id) for industry_id in self.industries}
+        descendants: dict[int, list[int]] = {industry_id: [] for industry_id in self.industries}
+        for industry_id, ancestors in self.industry_ancestors.items():
+            for ancestor_id in ancestors:
+                descendants[ancestor_id].append(industry_id)
+        self.industry_descendants = {industry_id: frozenset(ids) for industry_id, ids in descendants.items()}
+
+    def _load_organizations(
+        self,
+        organizations: Iterable[Sequence],
+        phones: Iterable[Sequence],
+        organization_industries: Iterable[Sequence],
+    ) -> None:
+        phones_by_organization: dict[int, list[str]] = {}
+        for organization_id, phone_number in phones:
+            phones_by_organization.setdefault(organization_id, []).append(phone_number)
+        # Industries of an organization are listed by name, then id
+        industry_order = {
+            industry.id: position
+            for position, industry in enumerate(
+                sorted(self.industries.values(), key=lambda industry: (industry.name, industry.id))
+            )
+        }
+        industries_by_organization: dict[int, list[int]] = {}
+        for organization_id, industry_id in organization_industries:
+            if industry_id in industry_order:
+                industries_by_organization.setdefault(organization_id, []).append(industry_id)
+
+        organizations = sorted(organizations, key=lambda row: (row[1], row[0]))
+        self.ids = array("i", (row[0] for row in organizations))
+        self.names = [sys.intern(row[1]) for row in organizations]
+        self.lowered_names = TextColumn(self.names)
+        self.building_rows = array("i", (self.building_row(row[2]) for row in organizations))
+        self.phone_offsets = array("i", [0])
+        self.phone_numbers: list[str] = []
+        self.industry_offsets = array("i", [0])
+        self.industry_links = array("i")
+        for organization_id in self.ids:
+            self.phone_numbers.extend(phones_by_organization.get(organization_id, ()))
+            self.phone_offsets.append(len(self.phone_numbers))
+            linked = industries_by_organization.get(organization_id, ())
+            self.industry_links.extend(sorted(linked, key=industry_order.__getitem__) if len(linked) > 1 else linked)
+            self.industry_offsets.append(len(self.industry_links))
+
+    def _index_organizations(self) -> None:
+        """Index organization rows by building row, by directly linked industry and by id."""
+        counts = array("i", bytes(4 * (len(self.building_ids) + 1)))
+        for building_row in self.building_rows:
+            counts[building_row + 1] += 1
+        self.building_offsets = array("i", [0])
+        for count in counts[1:]:
+            self.building_offsets.append(self.building_offsets[-1] + count)
+        self.building_organizations = array("i", bytes(4 * len(self.ids)))
+        filled = array("i", self.building_offsets[:-1])
+        for row, building_row in enumerate(self.building_rows):
+            if building_row >= 0:
+                self.building_organizations[filled[building_row]] = row
+                filled[building_row] += 1
+
+        self.industry_organizations: dict[int, array] = {}
+        for row in range(len(self.ids)):
+            for industry_id in self.industry_links[self.industry_offsets[row] : self.industry_offsets[row + 1]]:
+                self.industry_organizations.setdefault(industry_id, array("i")).append(row)
+
+        id_order = sorted(range(len(self.ids)), key=self.ids.__getitem__)
+        self.sorted_ids = array("i", (self.ids[row] for row in id_order))
+        self.sorted_id_rows = array("i", id_order)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _ancestors(self, industry_id: int) -> tuple[int, ...]:
+        """Return the industry and its ancestors, stopping at a missing parent or a cycle."""
+        ancestors = [industry_id]
+        parent_id = self.industries[industry_id].parent_id
+        while parent_id in self.industries and parent_id not in ancestors:
+            ancestors.append(parent_id)
+            parent_id = self.industries[parent_id].parent_id
+        return tuple(ancestors)
+
+    def row(self, organization_id: int) -> int | None:
+        position = bisect.bisect_left(self.sorted_ids, organization_id)
+        if position < len(self.sorted_ids) and self.sorted_ids[position] == organization_id:
+            return self.sorted_id_rows[position]
+        return None
+
+    def building_row(self, building_id: int) -> int:
+        """Return the row of a building, -1 when there is none."""
+        position = bisect.bisect_left(self.building_ids, building_id)
+        if position < len(self.building_ids) and self.building_ids[position] == building_id:
+            return position
+        return -1
+
+    def seek(self, after: tuple[str, int]) -> int:
+        """Return the first row whose (name, id) sorts after `after`."""
+        return bisect.bisect_right(range(len(self.ids)), tuple(after), key=lambda row: (self.names[row], self.ids[row]))
+
+    def organization_rows(self, building_rows: Iterable[int]) -> set[int]:
+        rows = set()
+        for building_row in building_rows:
+            rows.update(
+                self.building_organizations[
+                    self.building_offsets[building_row] : self.building_offsets[building_row + 1]
+                ]
+            )
+        return rows
+
+    def industry_rows(self, industry_ids: Iterable[int]) -> set[int]:
+        rows = set()
+        for industry_id in industry_ids:
+            rows.update(self.industry_organizations.get(industry_id, ()))
+        return rows
+
+    def building(self, building_row: int) -> BuildingRecord:
+        latitude, longitude = self.latitudes[building_row], self.longitudes[building_row]
+        return BuildingRecord(
+            id=self.building_ids[building_row],
+            address=self.addresses[building_row],
+            latitude=None if math.isnan(latitude) else latitude,
+            longitude=None if math.isnan(longitude) else longitude,
+        )
+
+    def organization(
+        self, row: int, *, relevance: float | None = None, distance: float | None = None
+    ) -> OrganizationRecord:
+        building_row = self.building_rows[row]
+        return OrganizationRecord(
+            id=self.ids[row],
+            name=self.names[row],
+            building_id=self.building_ids[building_row],
+            building=self.building(building_row),
+            phones=tuple(
+                PhoneRecord(phone_number)
+                for phone_number in self.phone_numbers[self.phone_offsets[row] : self.phone_offsets[row + 1]]
+            ),
+            industries=tuple(
+                self.industries[industry_id]
+                for industry_id in self.industry_links[self.industry_offsets[row] : self.industry_offsets[row + 1]]
+            ),
+            relevance=relevance,
+            distance=distance,
+        )
+
+    def document(self, row: int, *, distance: float | None = None) -> str:
+        """Return the JSON document of an organization, with the same shape as `OrganizationDTO`."""
+        return self._document(row, distance).decode()
+
+    def _document(self, row: int, distance: float | None) -> bytes:
+        building = self.building(self.building_rows[row])
+        return orjson.dumps(
+            {
+                "id": self.ids[row],
+                "name": self.names[row],
+                "phones": self.phone_numbers[self.phone_offsets[row] : self.phone_offsets[row + 1]],
+                "building": {
+                    "id": building.id,
+                    "address": building.address,
+                    "coordinates": {"lat": building.latitude, "lon": building.longitude},
+                },
+                "industries": [
+                    self.industries[industry_id].name
+                    for industry_id in self.industry_links[self.industry_offsets[row] : self.industry_offsets[row + 1]]
+                ],
+                "distance": distance,
+            }
+        )
+
+    def _memory_bytes(self) -> int:
+        """Approximate the memory taken by the snapshot; strings shared by several rows are counted once per row."""
+        arrays = [
+            self.ids,
+            self.building_rows,
+            self.phone_offsets,
+            self.industry_offsets,
+            self.industry_links,
+            self.building_ids,
+            self.latitudes,
+            self.longitudes,
+            self.building_offsets,
+            self.building_organizations,
+            self.sorted_ids,
+            self.sorted_id_rows,
+            *self.industry_organizations.values(),
+        ]
+        lists = (self.names, self.addresses, self.phone_numbers)
+        return (
+            sum(column.itemsize * len(column) for column in arrays)
+            + sum(sys.getsizeof(column) + sum(map(sys.getsizeof, column)) for column in lists)
+            + self.lowered_names.memory_bytes()
+            + self.lowered_addresses.memory_bytes()
+            + self.locations.stats().memory_bytes
+        )
+
+
+async def load_snapshot(session: AsyncSession, *, cell_size: float = 0.01) -> DirectorySnapshot:
+    """
+    Read the whole directory in a single REPEATABLE READ transaction, so that all tables are read at the same
+    point in time, and build its snapshot in a worker thread to keep the event loop serving meanwhile.
+    """
+    await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    organizations = await session.execute(select(Organization.id, Organization.name, Organization.building_id))
+    buildings = await session.execute(select(Building.id, Building.address, Building.latitude, Building.longitude))
+    phones = await session.execute(select(Phone.organization_id, Phone.phone_number).order_by(Phone.id))
+    industries = await session.execute(select(Industry.id, Industry.name, Industry.parent_id))
+    links = await session.execute(
+        select(organization_industries.c.organization_id, organization_industries.c.industry_id)
+    )
+    version = await OrganizationRepositoryImpl(session).get_organizations_version_with_filters()
+    return await asyncio.to_thread(
+        DirectorySnapshot,
+        organizations=organizations.all(),
+        buildings=buildings.all(),
+        phones=phones.all(),
+        industries=industries.all(),
+        organization_industries=links.all(),
+        cell_size=cell_size,
+        version=version,
+    )
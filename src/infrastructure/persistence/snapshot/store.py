@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from infrastructure.persistence.db.notifications import DirectoryChange
+
+from .snapshot import DirectorySnapshot, load_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SnapshotStats:
+    ready: bool
+    organizations: int
+    buildings: int
+    industries: int
+    memory_bytes: int
+    built_at: datetime | None
+    build_seconds: float | None
+    rebuilds: int
+    last_error: str | None
+
+
+class SnapshotStore:
+    """
+    Holds the current `DirectorySnapshot` and rebuilds it in the background: every `refresh_interval` seconds, and
+    `rebuild_delay` seconds after `notify_change` is called (so that a burst of changes takes a single rebuild).
+    A rebuilt snapshot replaces the current one at once; searches that already took the old one finish on it.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory: async_sessionmaker[AsyncSession],
+        refresh_interval: float = 300.0,
+        rebuild_delay: float = 1.0,
+        cell_size: float = 0.01,
+    ):
+        self._session_factory = session_factory
+        self._refresh_interval = refresh_interval
+        self._rebuild_delay = rebuild_delay
+        self._cell_size = cell_size
+        self._snapshot: DirectorySnapshot | None = None
+        self._changed = asyncio.Event()
+        self._built_at: datetime | None = None
+        self._build_seconds: float | None = None
+        self._rebuilds = 0
+        self._last_error: str | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def snapshot(self) -> DirectorySnapshot:
+        if self._snapshot is None:
+            raise RuntimeError("The directory snapshot is not loaded")
+        return self._snapshot
+
+    def swap(self, snapshot: DirectorySnapshot) -> None:
+        self._snapshot = snapshot
+
+    def stats(self) -> SnapshotStats:
+        snapshot = self._snapshot
+        return SnapshotStats(
+            ready=snapshot is not None,
+            organizations=len(snapshot) if snapshot is not None else 0,
+            buildings=len(snapshot.building_ids) if snapshot is not None else 0,
+            industries=len(snapshot.industries) if snapshot is not None else 0,
+            memory_bytes=snapshot.memory_bytes if snapshot is not None else 0,
+            built_at=self._built_at,
+            build_seconds=self._build_seconds,
+            rebuilds=self._rebuilds,
+            last_error=self._last_error,
+        )
+
+    async def rebuild(self) -> None:
+        started = time.perf_counter()
+        async with self._session_factory() as session:
+            snapshot = await load_snapshot(session, cell_size=self._cell_size)
+        self.swap(snapshot)
+        self._built_at = datetime.now(UTC)
+        self._build_seconds = time.perf_counter() - started
+        self._rebuilds += 1
+        self._last_error = None
+        logger.info("Directory snapshot of %d organizations built in %.2f s", len(snapshot), self._build_seconds)
+
+    async def notify_change(self, change: DirectoryChange | None = None) -> None:
+        """Schedule a rebuild, e.g. when notified of a directory change."""
+        self._changed.set()
+
+    async def start(self) -> None:
+        """Build the first snapshot, failing if it cannot be built, then keep rebuilding it in the background."""
+        await self.rebuild()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with asyncio.timeout(self._refresh_interval):
+                    await self._changed.wait()
+            except TimeoutError:
+                pass
+            else:
+                await asyncio.sleep(self._rebuild_delay)
+            self._changed.clear()
+            await self._rebuild_safely()
+
+    async def _rebuild_safely(self) -> None:
+        try:
+            await self.rebuild()
+        except Exception as e:
+            logger.warning("Directory snapshot rebuild failed, serving the previous one: %r", e)
+            self._last_error = repr(e)
@@ -0,0 +1,94 @@
+import bisect
+import re
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+
+# Words trigrams are extracted from, as in pg_trgm
+_WORD = re.compile(r"[^\W_]+")
+
+
+class LikePattern:
+    """ILIKE pattern wrapped in `%`, with `%` and `_` wildcards and `\\` escapes, matched against lowercased text."""
+
+    def __init__(self, pattern: str):
+        pattern = pattern.lower()
+        self._plain: str | None = None
+        self._regex: re.Pattern | None = None
+        if not any(char in pattern for char in "%_\\"):
+            self._plain = pattern
+            return
+
+        regex, escaped = [], False
+        for char in pattern:
+            if escaped:
+                regex.append(re.escape(char))
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            else:
+                regex.append({"%": ".*", "_": "."}.get(char) or re.escape(char))
+        self._regex = re.compile("".join(regex))
+
+    def matches(self, text: str) -> bool:
+        if self._plain is not None:
+            return self._plain in text
+        return self._regex.search(text) is not None
+
+    def find(self, text: str, start: int) -> int:
+        """Return the position of the first match at or after `start`, -1 when there is none."""
+        if self._plain is not None:
+            return text.find(self._plain, start)
+        match = self._regex.search(text, start)
+        return match.start() if match else -1
+
+
+class TextColumn:
+    """
+    Lowercased strings joined by newlines into a single one, so that a pattern is looked for in all of them at once,
+    at C speed, rather than string by string.
+    """
+
+    def __init__(self, values: Iterable[str]):
+        lowered = [value.lower().replace("\n", " ") for value in values]
+        self._text = "".join(f"{value}\n" for value in lowered)
+        self._offsets = array("q", [0])
+        for value in lowered:
+            self._offsets.append(self._offsets[-1] + len(value) + 1)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self._text[self._offsets[index] : self._offsets[index + 1] - 1]
+
+    def matching(self, pattern: LikePattern, *, start: int = 0) -> Iterator[int]:
+        """Indexes of the strings matching a pattern from `start` on, in ascending order."""
+        end = len(self._text)
+        position = pattern.find(self._text, self._offsets[start]) if start < len(self) else -1
+        while 0 <= position < end:
+            index = bisect.bisect_right(self._offsets, position) - 1
+            yield index
+            position = pattern.find(self._text, self._offsets[index + 1])
+
+    def memory_bytes(self) -> int:
+        return sys.getsizeof(self._text) + self._offsets.itemsize * len(self._offsets)
+
+
+def trigrams(text: str) -> set[str]:
+    """Trigrams of the words of a text, padded like pg_trgm does."""
+    result = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        result.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def word_similarity(query_trigrams: set[str], text: str) -> float:
+    """Return pg_trgm's `word_similarity`: the share of the query trigrams found in the text."""
+    if not query_trigrams:
+        return 0.0
+    # Trigrams only ever span word boundaries through their padding, so they are looked up in the padded words as
+    # substrings rather than extracted from the text
+    padded = "".join(f"  {word} " for word in _WORD.findall(text.lower()))
+    return sum(trigram in padded for trigram in query_trigrams) / len(query_trigrams)
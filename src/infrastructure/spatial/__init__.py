@@ -0,0 +1,3 @@
+from .building_index import BuildingSpatialIndex, SpatialIndexStats, distance_m, polygon_contains
+
+__all__ = ["BuildingSpatialIndex", "SpatialIndexStats", "distance_m", "polygon_contains"]
@@ -0,0 +1,320 @@
+import asyncio
+import logging
+import math
+from array import array
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from infrastructure.persistence.db.notifications import DirectoryChange
+from infrastructure.persistence.db.schema import Building
+from infrastructure.persistence.db.watermarks import change_watermark
+
+logger = logging.getLogger(__name__)
+
+# Mean Earth radius; distances are great-circle distances on a sphere of this radius
+EARTH_RADIUS_M = 6_371_008.8
+_METERS_PER_DEGREE = math.pi * EARTH_RADIUS_M / 180
+
+
+@dataclass
+class SpatialIndexStats:
+    ready: bool
+    buildings: int
+    cells: int
+    memory_bytes: int
+    watermark: datetime | None
+    refreshed_at: datetime | None
+    last_error: str | None
+
+
+class _Grid:
+    """
+    Building coordinates in arrays indexed by building id (NaN where there is no building) and, per grid cell,
+    an array of the ids of the buildings inside it.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self.lats = array("d")
+        self.lons = array("d")
+        self.cells: dict[tuple[int, int], array] = {}
+        self.count = 0
+
+    def cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lon / self.cell_size), math.floor(lat / self.cell_size)
+
+    def upsert(self, building_id: int, lat: float, lon: float) -> None:
+        if building_id >= len(self.lats):
+            missing = building_id + 1 - len(self.lats)
+            self.lats.extend(array("d", [math.nan]) * missing)
+            self.lons.extend(array("d", [math.nan]) * missing)
+
+        cell = self.cell(lat, lon)
+        if math.isnan(self.lats[building_id]):
+            self.count += 1
+        else:
+            previous = self.cell(self.lats[building_id], self.lons[building_id])
+            if previous == cell:
+                self.lats[building_id], self.lons[building_id] = lat, lon
+                return
+            self.cells[previous].remove(building_id)
+
+        self.lats[building_id], self.lons[building_id] = lat, lon
+        self.cells.setdefault(cell, array("i")).append(building_id)
+
+    def remove(self, building_id: int) -> None:
+        if building_id >= len(self.lats) or math.isnan(self.lats[building_id]):
+            return
+        self.cells[self.cell(self.lats[building_id], self.lons[building_id])].remove(building_id)
+        self.lats[building_id] = self.lons[building_id] = math.nan
+        self.count -= 1
+
+    def in_box(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> Iterator[int]:
+        """Ids of the buildings in the cells overlapping a box; longitudes may run past ±180."""
+        ranges = [(min_lon, max_lon)]
+        if min_lon < -180:
+            ranges = [(-180.0, max_lon), (min_lon + 360, 180.0)]
+        elif max_lon > 180:
+            ranges = [(min_lon, 180.0), (-180.0, max_lon - 360)]
+
+        min_y, max_y = math.floor(min_lat / self.cell_size), math.floor(max_lat / self.cell_size)
+        for low, high in ranges:
+            min_x, max_x = math.floor(low / self.cell_size), math.floor(high / self.cell_size)
+            if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self.cells):
+                # Boxes covering more cells than are occupied are answered by scanning the occupied ones
+                cells = (ids for (x, y), ids in self.cells.items() if min_x <= x <= max_x and min_y <= y <= max_y)
+            else:
+                cells = (
+                    self.cells[x, y]
+                    for x in range(min_x, max_x + 1)
+                    for y in range(min_y, max_y + 1)
+                    if (x, y) in self.cells
+                )
+            for ids in cells:
+                yield from ids
+
+    def memory_bytes(self) -> int:
+        cells = sum(ids.itemsize * len(ids) for ids in self.cells.values())
+        return self.lats.itemsize * len(self.lats) * 2 + cells
+
+
+class BuildingSpatialIndex:
+    """
+    In-memory index of building locations on a uniform grid of `cell_size` degrees, answering point-radius and
+    polygon filters with the ids of the matching buildings. Building changes are notified through `notify_change`
+    and applied `refresh_interval` seconds later, taking in a burst of them at once: insertions and updates from
+    `buildings.updated_at`, while deletions rebuild the grid, off the event loop. Buildings without coordinates are
+    not indexed.
+    Memory is bounded by `max_building_id`: coordinates take 16 bytes per id up to the highest one, and a directory
+    outgrowing it disables the index. Until the index is loaded (or while it is disabled) it is not `ready`.
+    """
+
+    def __init__(
+        self,
+        *,
+        session_factory: async_sessionmaker[AsyncSession],
+        cell_size: float = 0.01,
+        refresh_interval: float = 30.0,
+        max_building_id: int = 2_000_000,
+        max_matches: int = 20_000,
+    ):
+        self._session_factory = session_factory
+        self._cell_size = cell_size
+        self._refresh_interval = refresh_interval
+        self._max_building_id = max_building_id
+        self._max_matches = max_matches
+        self._grid = _Grid(cell_size)
+        self._ready = False
+        self._watermark: datetime | None = None
+        self._changed = asyncio.Event()
+        self._reload_needed = False
+        self._refreshed_at: datetime | None = None
+        self._last_error: str | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def stats(self) -> SpatialIndexStats:
+        return SpatialIndexStats(
+            ready=self._ready,
+            buildings=self._grid.count,
+            cells=len(self._grid.cells),
+            memory_bytes=self._grid.memory_bytes(),
+            watermark=self._watermark,
+            refreshed_at=self._refreshed_at,
+            last_error=self._last_error,
+        )
+
+    def load(self, buildings: Iterable[tuple[int, float, float]]) -> None:
+        """Replace the indexed buildings with (id, lat, lon) rows."""
+        self._grid = self._build(buildings)
+        self._ready = True
+
+    def _build(self, buildings: Iterable[tuple[int, float, float]]) -> _Grid:
+        grid = _Grid(self._cell_size)
+        for building_id, lat, lon in buildings:
+            self._check_capacity(building_id)
+            grid.upsert(building_id, lat, lon)
+        return grid
+
+    def upsert(self, buildings: Iterable[tuple[int, float, float]]) -> None:
+        """Add or move buildings given as (id, lat, lon) rows."""
+        for building_id, lat, lon in buildings:
+            self._check_capacity(building_id)
+            self._grid.upsert(building_id, lat, lon)
+
+    def remove(self, building_ids: Iterable[int]) -> None:
+        """Remove buildings, e.g. ones whose coordinates were cleared."""
+        for building_id in building_ids:
+            self._grid.remove(building_id)
+
+    def _check_capacity(self, building_id: int) -> None:
+        if building_id > self._max_building_id:
+            raise OverflowError(f"Building id {building_id} is above the index capacity of {self._max_building_id}")
+
+    def within_radius(self, lat: float, lon: float, radius_m: float) -> list[int] | None:
+        """
+        Ids of the buildings within `radius_m` meters of the point, by great-circle distance.
+        None when more than `max_matches` buildings match, so that PostGIS filters them instead.
+        """
+        grid = self._grid
+        delta_lat = radius_m / _METERS_PER_DEGREE
+        delta_lon = min(radius_m / (_METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-9)), 180.0)
+        candidates = grid.in_box(lat - delta_lat, lat + delta_lat, lon - delta_lon, lon + delta_lon)
+        matches = [
+            building_id
+            for building_id in candidates
+            if distance_m(lat, lon, grid.lats[building_id], grid.lons[building_id]) <= radius_m
+        ]
+        return matches if len(matches) <= self._max_matches else None
+
+    def within_polygon(self, polygon: list[tuple[float, float]]) -> list[int] | None:
+        """
+        Ids of the buildings inside a polygon of (lat, lon) vertices, with edges as straight lines in lat/lon
+        like ST_Contains on geometry. None when more than `max_matches` buildings match.
+        """
+        grid = self._grid
+        lats = [lat for lat, _ in polygon]
+        lons = [lon for _, lon in polygon]
+        candidates = grid.in_box(min(lats), max(lats), min(lons), max(lons))
+        matches = [
+            building_id
+            for building_id in candidates
+            if polygon_contains(polygon, grid.lats[building_id], grid.lons[building_id])
+        ]
+        return matches if len(matches) <= self._max_matches else None
+
+    async def notify_change(self, change: DirectoryChange | None) -> None:
+        """Schedule an update for a change of buildings, or a reload for changes that may have been missed (None)."""
+        if change is not None and change.table != "buildings":
+            return
+        if change is None or change.operation not in ("INSERT", "UPDATE"):
+            # Deletions leave no trace in `updated_at`
+            self._reload_needed = True
+        self._changed.set()
+
+    async def refresh(self) -> None:
+        """Apply the buildings updated since the last refresh, or reload them all when needed."""
+        if not self._ready or self._reload_needed or self._watermark is None:
+            await self.reload()
+            return
+
+        async with self._session_factory() as session:
+            watermark = await change_watermark(session)
+            stmt = select(Building.id, Building.latitude, Building.longitude)
+            rows = (await session.execute(stmt.filter(Building.updated_at >= self._watermark))).all()
+
+        self.upsert((row.id, row.latitude, row.longitude) for row in rows if row.latitude is not None)
+        self.remove(row.id for row in rows if row.latitude is None)
+        self._watermark = watermark
+        self._refreshed_at = datetime.now(UTC)
+        self._last_error = None
+
+    async def reload(self) -> None:
+        """Load all buildings into a new grid, built in a thread, and swap it in."""
+        # Changes notified from now on are not necessarily read, and take another reload
+        self._reload_needed = False
+        try:
+            async with self._session_factory() as session:
+                watermark = await change_watermark(session)
+                rows = (
+                    await session.execute(
+                        select(Building.id, Building.latitude, Building.longitude).filter(
+                            Building.coordinates.is_not(None)
+                        )
+                    )
+                ).all()
+            grid = await asyncio.to_thread(self._build, ((row.id, row.latitude, row.longitude) for row in rows))
+        except BaseException:
+            self._reload_needed = True
+            raise
+
+        self._grid, self._ready = grid, True
+        self._watermark = watermark
+        self._refreshed_at = datetime.now(UTC)
+        self._last_error = None
+
+    async def start(self) -> None:
+        """Load the index, then keep applying notified changes in the background."""
+        loaded = await self._refresh_safely()
+        self._task = asyncio.create_task(self._run(retry=not loaded))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self, *, retry: bool) -> None:
+        while True:
+            if not retry:
+                await self._changed.wait()
+            # Changes notified meanwhile are applied together, and failed refreshes retried after a pause
+            await asyncio.sleep(self._refresh_interval)
+            self._changed.clear()
+            retry = not await self._refresh_safely()
+
+    async def _refresh_safely(self) -> bool:
+        """Refresh the index, and return whether it is up to date or disabled rather than to be retried."""
+        try:
+            await self.refresh()
+        except OverflowError as e:
+            logger.warning("Spatial index disabled, searches use PostGIS: %s", e)
+            self._ready, self._grid, self._last_error = False, _Grid(self._cell_size), str(e)
+        except Exception as e:
+            logger.warning("Spatial index refresh failed: %r", e)
+            self._last_error = repr(e)
+            return False
+        return True
+
+
+def distance_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance by the haversine formula."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (
+        math.sin((phi2 - phi1) / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def polygon_contains(polygon: list[tuple[float, float]], lat: float, lon: float) -> bool:
+    """Even-odd ray casting test of a point against a polygon of (lat, lon) vertices."""
+    inside = False
+    previous_lat, previous_lon = polygon[-1]
+    for vertex_lat, vertex_lon in polygon:
+        if (vertex_lat > lat) != (previous_lat > lat):
+            crossing_lon = vertex_lon + (lat - vertex_lat) * (previous_lon - vertex_lon) / (previous_lat - vertex_lat)
+            if lon < crossing_lon:
+                inside = not inside
+        previous_lat, previous_lon = vertex_lat, vertex_lon
+    return inside
@@ -1,14 +1,96 @@
-from fastapi import FastAPI
-from fastapi.responses import Response
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import exc
 from starlette.middleware.cors import CORSMiddleware
 import uvicorn
 
+from api.middleware import DbSessionMiddleware, TimingMiddleware
+from api.v1.admin_routes import router as v1_admin_router
 from api.v1.routes import router as v1_router
+from infrastructure.cache import CacheInvalidationListener
 from infrastructure.di.container import Container
+from infrastructure.observability import METRICS_CONTENT_TYPE, instrument_sql, render_metrics
+from infrastructure.persistence.db.notifications import DirectoryChange, DirectoryChangeListener
 from config.settings import settings
 
 
-app = FastAPI()
+async def _listen_for_index_changes(indexes: list) -> DirectoryChangeListener | None:
+    """Notify the in-memory indexes that are enabled of directory changes."""
+    indexes = [index for index in indexes if index is not None]
+    if not indexes:
+        return None
+
+    async def notify_indexes(change: DirectoryChange | None) -> None:
+        for index in indexes:
+            await index.notify_change(change)
+
+    listener = DirectoryChangeListener(db_url=settings.db_url.get_secret_value(), on_change=notify_indexes)
+    await listener.start()
+    return listener
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    replica_router = container.replica_router()
+    await replica_router.start()
+
+    spatial_index = container.spatial_index()
+    autocomplete_index = container.autocomplete_index()
+    # Started before the indexes load, so that changes made while they load are not missed
+    index_listener = await _listen_for_index_changes([spatial_index, autocomplete_index])
+    if spatial_index is not None:
+        await spatial_index.start()
+    if autocomplete_index is not None:
+        await autocomplete_index.start()
+
+    snapshot_store = container.snapshot_store()
+    snapshot_listener = None
+    if snapshot_store is not None:
+        await snapshot_store.start()
+        if settings.snapshot_listen_changes:
+            snapshot_listener = DirectoryChangeListener(
+                db_url=settings.db_url.get_secret_value(), on_change=snapshot_store.notify_change
+            )
+            await snapshot_listener.start()
+
+    cache_listener = None
+    response_cache = container.response_cache()
+    if response_cache is not None and settings.cache_invalidation_listen:
+        cache_listener = CacheInvalidationListener(db_url=settings.db_url.get_secret_value(), cache=response_cache)
+        await cache_listener.start()
+
+    yield
+
+    if cache_listener is not None:
+        await cache_listener.stop()
+    if response_cache is not None:
+        await response_cache.close()
+    if snapshot_listener is not None:
+        await snapshot_listener.stop()
+    if snapshot_store is not None:
+        await snapshot_store.stop()
+    if index_listener is not None:
+        await index_listener.stop()
+    if autocomplete_index is not None:
+        await autocomplete_index.stop()
+    if spatial_index is not None:
+        await spatial_index.stop()
+    await replica_router.stop()
+    await replica_router.dispose()
+    await container.db_engine().dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+
+container = Container()
+container.wire(modules=["api.v1.routes", "api.v1.admin_routes"])
+
+instrument_sql(slow_query_log=container.slow_query_log())
+
+app.add_middleware(DbSessionMiddleware, sessions=container.scoped_sessions())
+app.add_middleware(TimingMiddleware, server_timing=settings.server_timing_enabled)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,12 +98,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Server-Timing"],
 )
 
-container = Container()
-container.wire(modules=["api.v1.routes"])
-
 app.include_router(v1_router)
+app.include_router(v1_admin_router)
+
+
+@app.exception_handler(exc.TimeoutError)
+async def pool_timeout_handler(request: Request, e: exc.TimeoutError):
+    # No database connection became free within db_pool_timeout
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service is overloaded, try again later"},
+        headers={"Retry-After": "1"},
+    )
 
 
 @app.get("/")
@@ -29,5 +120,10 @@ def health():
     return Response(status_code=200, content="OK")
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=settings.port, reload=True)
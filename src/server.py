@@ -0,0 +1,46 @@
+"""
+Production server: a fixed number of uvicorn worker processes on uvloop and httptools.
+
+Workers are started before any application code is imported, and each of them imports the app, so that the
+container, its engines and their connection pools are created per worker. On SIGTERM every worker stops accepting
+connections, waits up to `shutdown_timeout` seconds for in-flight requests and disposes its pools on shutdown.
+"""
+
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+from config.settings import settings
+
+
+def main() -> None:
+    workers = settings.workers or os.cpu_count() or 1
+
+    metrics_dir = None
+    if workers > 1 and "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        # Workers write their metrics to files in a shared directory, so that /metrics reports all of them
+        metrics_dir = tempfile.mkdtemp(prefix="org-directory-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    try:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",  # noqa: S104
+            port=settings.port,
+            workers=workers,
+            loop="uvloop",
+            http="httptools",
+            lifespan="on",
+            timeout_graceful_shutdown=settings.shutdown_timeout,
+            proxy_headers=True,
+            server_header=False,
+        )
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+from pydantic import SecretStr
+
+from config.settings import settings
+
+
+def test_admin_endpoints_are_disabled_without_a_token(api_client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", None)
+
+    response = api_client.post("v1/admin/import", params={"format": "ndjson"}, content=b"")
+
+    assert response.status_code == 403
+
+
+def test_admin_endpoints_require_the_token(api_client, monkeypatch):
+    monkeypatch.setattr(settings, "admin_token", SecretStr("s3cret"))
+
+    missing = api_client.get("v1/admin/cache")
+    wrong = api_client.get("v1/admin/cache", headers={"Authorization": "Bearer guess"})
+    granted = api_client.get("v1/admin/cache", headers={"Authorization": "Bearer s3cret"})
+
+    assert (missing.status_code, wrong.status_code) == (401, 401)
+    assert missing.headers["WWW-Authenticate"] == "Bearer"
+    assert granted.status_code == 200
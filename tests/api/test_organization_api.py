@@ -1,6 +1,208 @@
-import pytest
+from types import SimpleNamespace
 
+from api.v1.dto import OrganizationDTO
+from infrastructure.autocomplete import AutocompleteIndex
+from infrastructure.cache import InMemoryResponseCache
+from infrastructure.persistence.db.schema import Building, Industry, Organization, Phone
+
+
+def _db_organization() -> Organization:
+    building = Building(id=2, address="456 Food St", latitude=40.740610, longitude=-73.945242)
+    return Organization(
+        id=1,
+        name="Sushi Master",
+        building=building,
+        phones=[Phone(id=3, phone_number="+1-555-0201")],
+        industries=[Industry(id=8, name="Sushi"), Industry(id=4, name="Restaurants")],
+    )
+
+
+def test_get_organization_by_id(api_client, organization_repository):
+    organization_repository.find_organization_by_id.return_value = _db_organization()
 
-@pytest.mark.asyncio
-async def test_get_organization_by_id():
     response = api_client.get("v1/organizations/1")
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": 1,
+        "name": "Sushi Master",
+        "phones": ["+1-555-0201"],
+        "building": {"id": 2, "address": "456 Food St", "coordinates": {"lat": 40.740610, "lon": -73.945242}},
+        "industries": ["Sushi", "Restaurants"],
+        "distance": None,
+    }
+    organization_repository.find_organization_by_id.assert_awaited_once_with(1, fields=None)
+
+
+def test_get_organization_by_id_not_found(api_client, organization_repository):
+    organization_repository.find_organization_by_id.return_value = None
+
+    response = api_client.get("v1/organizations/1")
+
+    assert response.status_code == 404
+
+
+def test_get_organization_by_id_not_modified(api_client, organization_repository):
+    organization_repository.find_organization_by_id.return_value = _db_organization()
+    etag = api_client.get("v1/organizations/1").headers["ETag"]
+
+    response = api_client.get("v1/organizations/1", headers={"If-None-Match": etag})
+    organization_repository.find_organization_by_id.return_value.name = "Sushi Master & Co"
+    changed = api_client.get("v1/organizations/1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_get_organization_by_id_not_modified_by_version(api_client, organization_repository):
+    organization_repository.find_organization_by_id.return_value = _db_organization()
+    organization_repository.get_organization_version.return_value = "1 2026-10-18 12:00:00+00"
+    etag = api_client.get("v1/organizations/1", headers={"If-None-Match": '"stale"'}).headers["ETag"]
+
+    response = api_client.get("v1/organizations/1", headers={"If-None-Match": etag})
+    organization_repository.get_organization_version.return_value = "1 2026-10-18 12:05:00+00"
+    changed = api_client.get("v1/organizations/1", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert organization_repository.find_organization_by_id.await_count == 2
+
+
+def test_find_organizations_with_sparse_fields(api_client, organization_repository):
+    organization = _db_organization()
+    organization_repository.find_organizations_with_filters.return_value = [organization]
+
+    response = api_client.get("v1/organizations", params={"organization_name": "sushi", "fields": "name,building"})
+
+    assert response.status_code == 200
+    assert response.json()["items"] == [
+        {
+            "id": 1,
+            "name": "Sushi Master",
+            "building": {"id": 2, "address": "456 Food St", "coordinates": {"lat": 40.740610, "lon": -73.945242}},
+        }
+    ]
+    call = organization_repository.find_organizations_with_filters.await_args
+    assert call.kwargs["fields"] == frozenset({"id", "name", "building"})
+
+
+def test_unknown_fields_are_rejected(api_client):
+    response = api_client.get("v1/organizations/1", params={"fields": "id,owner"})
+
+    assert response.status_code == 422
+
+
+def test_batch_get_organizations_marks_missing_ids(api_client, organization_repository):
+    organization_repository.find_organizations_by_ids.return_value = [_db_organization()]
+
+    response = api_client.post("v1/organizations:batchGet", json={"ids": [5, 1]})
+
+    assert response.status_code == 200
+    assert [(result["id"], result["found"]) for result in response.json()["results"]] == [(5, False), (1, True)]
+    assert response.json()["results"][0]["organization"] is None
+    OrganizationDTO.model_validate(response.json()["results"][1]["organization"])
+
+
+def test_autocomplete_suggests_organizations_and_industries(api_client):
+    from main import container
+
+    index = AutocompleteIndex(session_factory=None)
+    index.load(organizations=[(1, "Sushi Master", 2)], industries=[(8, "Sushi", 1), (4, "Restaurants", 9)])
+    with container.autocomplete_index.override(index):
+        response = api_client.get("v1/autocomplete", params={"q": "SU"})
+        unavailable = AutocompleteIndex(session_factory=None)
+        with container.autocomplete_index.override(unavailable):
+            loading = api_client.get("v1/autocomplete", params={"q": "su"})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "organizations": [{"id": 1, "name": "Sushi Master"}],
+        "industries": [{"id": 8, "name": "Sushi"}],
+    }
+    assert loading.status_code == 503
+
+
+def test_cluster_organizations(api_client, organization_repository):
+    organization_repository.cluster_organizations_with_filters.return_value = [
+        SimpleNamespace(lat=55.75, lon=37.61, count=12, organization_id=None),
+        SimpleNamespace(lat=55.03, lon=82.92, count=1, organization_id=3),
+    ]
+    bbox = {"min_lat": 50, "min_lon": 30, "max_lat": 60, "max_lon": 90}
+
+    response = api_client.get("v1/organizations/clusters", params={**bbox, "zoom": 4, "industry_id": 1})
+    too_fine = api_client.get("v1/organizations/clusters", params={**bbox, "cell_size": 0.001})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "cell_size": 5.625,
+        "total": 13,
+        "clusters": [
+            {"lat": 55.75, "lon": 37.61, "count": 12, "organization_id": None},
+            {"lat": 55.03, "lon": 82.92, "count": 1, "organization_id": 3},
+        ],
+    }
+    call = organization_repository.cluster_organizations_with_filters.call_args.kwargs
+    assert (call["cell_size"], call["industry_id"]) == (5.625, 1)
+    assert too_fine.status_code == 422
+
+
+def test_find_organizations_with_industry_facets(api_client, organization_repository):
+    from main import container
+
+    organization_repository.find_organizations_with_filters.return_value = [_db_organization()]
+    organization_repository.count_industry_facets_with_filters.return_value = [
+        SimpleNamespace(id=4, name="Restaurants", parent_id=None, count=7),
+        SimpleNamespace(id=8, name="Sushi", parent_id=4, count=3),
+    ]
+
+    with container.facet_repository.override(organization_repository):
+        response = api_client.get("v1/organizations", params={"organization_name": "sushi", "facets": "industry"})
+
+    assert response.status_code == 200
+    assert [item["id"] for item in response.json()["items"]] == [1]
+    assert response.json()["facets"] == {
+        "industry": [
+            {"id": 4, "name": "Restaurants", "parent_id": None, "count": 7},
+            {"id": 8, "name": "Sushi", "parent_id": 4, "count": 3},
+        ]
+    }
+    assert organization_repository.count_industry_facets_with_filters.await_args.kwargs["organization_name"] == "sushi"
+    assert "ETag" in response.headers
+
+
+def test_cached_search_is_tagged_without_querying(api_client, organization_repository):
+    from main import container
+
+    organization_repository.find_organizations_with_filters.return_value = [_db_organization()]
+    cache = InMemoryResponseCache(max_entries=10, ttl_seconds=30)
+
+    with container.response_cache.override(cache):
+        first = api_client.get("v1/organizations", params={"organization_name": "sushi"})
+        cached = api_client.get(
+            "v1/organizations", params={"organization_name": "sushi"}, headers={"If-None-Match": first.headers["ETag"]}
+        )
+
+    assert first.status_code == 200
+    assert cached.status_code == 304
+    organization_repository.find_organizations_with_filters.assert_awaited_once()
+
+
+def test_search_not_modified_by_version_without_searching(api_client, organization_repository):
+    organization_repository.find_organizations_with_filters.return_value = [_db_organization()]
+    organization_repository.get_organizations_version_with_filters.return_value = "1 2026-10-18 12:00:00+00"
+    params = {"organization_name": "sushi", "page": 2}
+    first = api_client.get("v1/organizations", params=params, headers={"If-None-Match": '"stale"'})
+
+    response = api_client.get("v1/organizations", params=params, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert response.status_code == 304
+    assert response.headers["ETag"] == first.headers["ETag"]
+    organization_repository.find_organizations_with_filters.assert_awaited_once()
+    call = organization_repository.get_organizations_version_with_filters.await_args
+    assert call.kwargs["organization_name"] == "sushi"
+    assert "limit" not in call.kwargs
@@ -0,0 +1,78 @@
+import pytest
+
+from core.entities import Building, Organization, Point
+from core.importing import InvalidImportRecordError, batched, iter_lines, parse_csv, parse_ndjson
+
+
+async def _chunks(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+async def _collect(items):
+    return [item async for item in items]
+
+
+EXPECTED = Organization(
+    id=1,
+    name='Sushi, "Master"',
+    phones=["1-111", "2-222"],
+    building=Building(id=2, address="456 Food St", coordinates=Point(lat=40.7406, lon=-73.9452)),
+    industries=["Sushi", "Restaurants"],
+)
+
+
+@pytest.mark.anyio
+async def test_iter_lines_joins_lines_split_across_chunks():
+    lines = await _collect(iter_lines(_chunks(b"first\nsec", b"o", b"", b"nd\r\n\n", b"th", b"ird")))
+
+    assert lines == [(1, "first"), (2, "second"), (4, "third")]
+
+
+@pytest.mark.anyio
+async def test_parse_ndjson():
+    line = (
+        '{"id": 1, "name": "Sushi, \\"Master\\"", "phones": ["1-111", "2-222"], '
+        '"building": {"id": 2, "address": "456 Food St", "coordinates": {"lat": 40.7406, "lon": -73.9452}}, '
+        '"industries": ["Sushi", "Restaurants"], "distance": null}\n'
+    )
+
+    organizations = await _collect(parse_ndjson(iter_lines(_chunks(line.encode()))))
+
+    assert organizations == [EXPECTED]
+
+
+@pytest.mark.anyio
+async def test_parse_csv():
+    data = (
+        b"id,name,phones,building_id,address,lat,lon,industries,distance\n"
+        b'1,"Sushi, ""Master""",1-111;2-222,2,456 Food St,40.7406,-73.9452,Sushi;Restaurants,\n'
+    )
+
+    organizations = await _collect(parse_csv(iter_lines(_chunks(data))))
+
+    assert organizations == [EXPECTED]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "parse, data, line",
+    [
+        (parse_ndjson, b'{"id": 1}\n', 1),
+        (parse_ndjson, b"\nnot json\n", 2),
+        (parse_csv, b"id,name\n1\n", 2),
+        (parse_csv, b"id,name,phones,building_id,address,lat,lon,industries\nx,a,,1,b,1,2,\n", 2),
+    ],
+)
+async def test_invalid_records_are_rejected_with_their_line(parse, data, line):
+    with pytest.raises(InvalidImportRecordError, match=f"^Line {line}:"):
+        await _collect(parse(iter_lines(_chunks(data))))
+
+
+@pytest.mark.anyio
+async def test_batched():
+    async def numbers():
+        for number in range(5):
+            yield number
+
+    assert await _collect(batched(numbers(), 2)) == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,41 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from core.services import OrganizationService
+from infrastructure.persistence.db.repositories import OrganizationRepository
+from infrastructure.spatial import BuildingSpatialIndex
+
+
+@pytest.mark.anyio
+async def test_geo_filters_are_answered_by_the_spatial_index():
+    repository = AsyncMock(spec=OrganizationRepository)
+    repository.find_organizations_with_filters.return_value = []
+    spatial_index = BuildingSpatialIndex(session_factory=None)
+    spatial_index.load([(1, 40.72, -73.94), (2, 41.87, -87.62)])
+    service = OrganizationService(organization_repository=repository, spatial_index=spatial_index)
+
+    await service.find_organizations(
+        polygon=[(40.70, -73.96), (40.74, -73.96), (40.74, -73.92), (40.70, -73.92)], page=1, items_per_page=10
+    )
+
+    filters = repository.find_organizations_with_filters.await_args.kwargs
+    assert filters["building_ids"] == [1]
+    assert filters["polygon_wkt"] is None
+
+
+@pytest.mark.anyio
+async def test_facets_are_counted_after_the_search_without_a_spare_repository():
+    calls = []
+    repository = AsyncMock(spec=OrganizationRepository)
+    repository.count_industry_facets_with_filters.side_effect = lambda **filters: calls.append("facets") or []
+    service = OrganizationService(organization_repository=repository, facet_repository_factory=lambda: None)
+
+    async def search():
+        calls.append("search")
+        return "page"
+
+    result, facets = await service.with_industry_facets(search(), organization_name="sushi")
+
+    assert (result, facets) == ("page", [])
+    assert calls == ["search", "facets"]
@@ -0,0 +1,14 @@
+import pytest
+
+from core.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(("Sushi Master", 2))
+    assert decode_cursor(cursor) == ("Sushi Master", 2)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_cursor(()), "eyJhIjoxfQ"])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
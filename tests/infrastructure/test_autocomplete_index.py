@@ -0,0 +1,99 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from infrastructure.autocomplete import AutocompleteIndex, fold
+from infrastructure.persistence.db.notifications import DirectoryChange
+
+
+def _index(organizations=(), industries=()) -> AutocompleteIndex:
+    index = AutocompleteIndex(session_factory=None)
+    index.load(organizations=organizations, industries=industries)
+    return index
+
+
+def _names(suggestions) -> list[str]:
+    return [suggestion.name for suggestion in suggestions]
+
+
+def test_fold_ignores_case_diacritics_and_punctuation():
+    assert fold("  Café «Ёлка»,  Ångström ") == "cafe елка angstrom"
+    assert fold("Horns & Hooves") == "horns hooves"
+
+
+def test_names_match_by_the_start_of_any_word():
+    index = _index([(1, "Horns & Hooves", 0), (2, "Hoofprint Café", 0), (3, "Shoe Horn", 0)])
+
+    assert _names(index.suggest_organizations("HOO")) == ["Hoofprint Café", "Horns & Hooves"]
+    assert _names(index.suggest_organizations("horn")) == ["Horns & Hooves", "Shoe Horn"]
+    assert _names(index.suggest_organizations("cafe")) == ["Hoofprint Café"]
+    assert _names(index.suggest_organizations("horns & h")) == ["Horns & Hooves"]
+    assert index.suggest_organizations("orn") == []
+
+
+def test_popular_names_come_first():
+    index = _index(industries=[(1, "Meat products", 3), (2, "Meals to go", 12), (3, "Dairy and meat", 40)])
+
+    assert _names(index.suggest_industries("mea")) == ["Meals to go", "Meat products", "Dairy and meat"]
+    assert _names(index.suggest_industries("mea", limit=1)) == ["Meals to go"]
+
+
+def test_upserted_names_update_cached_suggestions():
+    # Enough matches for the suggestions of "shop" to be cached
+    index = _index([(organization_id, f"Shop {organization_id:04}", 1) for organization_id in range(1, 1001)])
+    assert _names(index.suggest_organizations("shop", limit=2)) == ["Shop 0001", "Shop 0002"]
+
+    index.upsert(organizations=[(1, "Bakery 0001", None), (500, "Shop 0500", 5), (2000, "Shopping Mall", 9)])
+
+    assert _names(index.suggest_organizations("shop", limit=3)) == ["Shopping Mall", "Shop 0500", "Shop 0002"]
+    assert _names(index.suggest_organizations("bakery")) == ["Bakery 0001"]
+    assert index.stats().organizations == 1001
+
+
+class ScriptedSession:
+    """Session answering the watermark query and then each executed statement with the next scripted result."""
+
+    def __init__(self, *results):
+        self.info = {}
+        self._results = list(results)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def scalar(self, stmt):
+        return datetime(2026, 1, 1)
+
+    async def execute(self, stmt):
+        result = self._results.pop(0)
+        return SimpleNamespace(all=lambda: result, one=lambda: result)
+
+
+def _rows(*rows) -> list[SimpleNamespace]:
+    return [SimpleNamespace(id=id, name=name, popularity=popularity) for id, name, popularity in rows]
+
+
+@pytest.mark.anyio
+async def test_notified_changes_are_applied_or_reload_the_index():
+    industries = _rows((5, "Restaurants", 2))
+    sessions = [
+        ScriptedSession(_rows((1, "Pizza Express", 1), (2, "Pizza Hut", 1)), industries),
+        ScriptedSession(_rows((2, "Pizza Palace", 1))),
+        ScriptedSession(_rows((1, "Pizza Express", 1), (2, "Pizza Palace", 2)), industries),
+    ]
+    index = AutocompleteIndex(session_factory=lambda: sessions.pop(0))
+    await index.refresh()
+
+    await index.notify_change(DirectoryChange(table="buildings", operation="DELETE"))
+    await index.notify_change(DirectoryChange(table="organizations", operation="UPDATE"))
+    await index.refresh()
+    assert _names(index.suggest_organizations("pizza")) == ["Pizza Express", "Pizza Palace"]
+
+    # Organization 2 got a second industry, which left its updated_at as it was
+    await index.notify_change(DirectoryChange(table="organization_industries", operation="INSERT"))
+    await index.refresh()
+    assert sessions == []
+    assert _names(index.suggest_organizations("pizza")) == ["Pizza Palace", "Pizza Express"]
@@ -0,0 +1,8 @@
+from infrastructure.persistence.db.notifications import DirectoryChange
+
+
+def test_directory_change_payloads_are_parsed():
+    assert DirectoryChange.parse("organizations:DELETE:731") == DirectoryChange(
+        table="organizations", operation="DELETE", transaction_id="731"
+    )
+    assert DirectoryChange.parse("organizations") == DirectoryChange(table="organizations")
@@ -0,0 +1,27 @@
+from sqlalchemy.dialects import postgresql
+
+from infrastructure.persistence.db.repositories import OrganizationRepositoryImpl
+
+
+def _sql(**filters) -> str:
+    stmt = OrganizationRepositoryImpl(session=None)._organizations_statement(**filters)
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_industry_filters_are_semi_joins_without_distinct():
+    sql = _sql(industry_id=2, include_subindustries=True, industry_name="Food")
+
+    assert "DISTINCT" not in sql
+    assert "FROM organizations \nWHERE organizations.id IN (SELECT organization_industries.organization_id" in sql
+
+
+def test_building_filters_join_buildings_once():
+    sql = _sql(address="Main St", organization_name="harbor")
+
+    assert sql.count("JOIN buildings") == 1
+    assert "DISTINCT" not in sql
+
+
+def test_results_have_a_unique_order():
+    assert _sql(building_id=1).endswith("ORDER BY organizations.name, organizations.id")
+    assert _sql(organization_name="harbor", order_by="relevance").endswith("DESC, organizations.id")
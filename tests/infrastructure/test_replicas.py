@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from infrastructure.persistence.db.replicas import ReplicaRouter, RoutingSession, use_primary
+from infrastructure.persistence.db.schema import Organization
+
+
+def _engine(host: str):
+    # Engines connect lazily, nothing is connected in these tests
+    return create_async_engine(f"postgresql+asyncpg://org:org@{host}/postgres")
+
+
+@pytest.fixture
+def primary():
+    return _engine("primary")
+
+
+@pytest.fixture
+def replicas():
+    return [_engine("replica-1"), _engine("replica-2")]
+
+
+def _healthy_router(primary, replicas, **kwargs) -> ReplicaRouter:
+    router = ReplicaRouter(primary=primary, replicas=replicas, **kwargs)
+    for replica in router._replicas:
+        replica.healthy = True
+    return router
+
+
+def test_reads_are_spread_over_replicas_one_per_session(primary, replicas):
+    router = _healthy_router(primary, replicas)
+    sessions = [RoutingSession(router=router, bind=primary.sync_engine) for _ in range(4)]
+
+    binds = [session.get_bind(clause=select(Organization)) for session in sessions]
+
+    assert binds == [replica.sync_engine for replica in replicas * 2]
+    assert sessions[0].get_bind(clause=select(Organization.id)) is binds[0]
+
+
+def test_writes_and_later_reads_go_to_the_primary(primary, replicas):
+    session = RoutingSession(router=_healthy_router(primary, replicas), bind=primary.sync_engine)
+
+    assert session.get_bind(clause=update(Organization).values(name="x")) is primary.sync_engine
+    assert session.get_bind(clause=select(Organization)) is primary.sync_engine
+
+
+@pytest.mark.parametrize("clause", [None, select(Organization).with_for_update()])
+def test_non_plain_selects_go_to_the_primary(primary, replicas, clause):
+    session = RoutingSession(router=_healthy_router(primary, replicas), bind=primary.sync_engine)
+
+    assert session.get_bind(clause=clause) is primary.sync_engine
+
+
+def test_use_primary(primary, replicas):
+    session = RoutingSession(router=_healthy_router(primary, replicas), bind=primary.sync_engine)
+
+    use_primary(session)
+
+    assert session.get_bind(clause=select(Organization)) is primary.sync_engine
+
+
+def test_falls_back_to_the_primary_without_healthy_replicas(primary, replicas):
+    router = _healthy_router(primary, replicas)
+    for replica in router._replicas:
+        replica.healthy = False
+
+    assert router.choose() is primary
+
+
+def test_least_connections_prefers_the_idle_replica(primary, replicas, monkeypatch):
+    router = _healthy_router(primary, replicas, strategy="least_connections")
+    monkeypatch.setattr(replicas[0].pool, "checkedout", lambda: 3)
+    monkeypatch.setattr(replicas[1].pool, "checkedout", lambda: 1)
+
+    assert router.choose() is replicas[1]
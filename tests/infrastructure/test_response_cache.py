@@ -0,0 +1,75 @@
+import pytest
+
+from infrastructure.cache import InMemoryResponseCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.anyio
+async def test_in_memory_cache_expires_entries():
+    clock = FakeClock()
+    cache = InMemoryResponseCache(max_entries=10, ttl_seconds=30, clock=clock)
+
+    await cache.set("a", b"1")
+    assert await cache.get("a") == b"1"
+
+    clock.now = 31
+    assert await cache.get("a") is None
+    assert (cache.stats().hits, cache.stats().misses) == (1, 1)
+
+
+@pytest.mark.anyio
+async def test_in_memory_cache_evicts_least_recently_used():
+    cache = InMemoryResponseCache(max_entries=2, ttl_seconds=30)
+
+    await cache.set("a", b"1")
+    await cache.set("b", b"2")
+    await cache.get("a")
+    await cache.set("c", b"3")
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == b"1"
+    assert cache.stats().evictions == 1
+
+
+@pytest.mark.anyio
+async def test_in_memory_cache_clear():
+    cache = InMemoryResponseCache(max_entries=2, ttl_seconds=30)
+
+    await cache.set("a", b"1")
+    await cache.clear()
+
+    assert len(cache) == 0
+    assert cache.stats().invalidations == 1
+
+
+@pytest.mark.anyio
+async def test_in_memory_cache_drops_values_of_a_past_generation():
+    cache = InMemoryResponseCache(max_entries=2, ttl_seconds=30)
+
+    generation = await cache.generation()
+    await cache.clear()
+    await cache.set("a", b"stale", generation=generation)
+    await cache.set("b", b"fresh", generation=await cache.generation())
+
+    assert await cache.get("a") is None
+    assert await cache.get("b") == b"fresh"
+
+
+@pytest.mark.anyio
+async def test_in_memory_cache_is_cleared_once_per_change():
+    cache = InMemoryResponseCache(max_entries=2, ttl_seconds=30)
+
+    await cache.clear(change="731")
+    await cache.set("a", b"1")
+    await cache.clear(change="731")
+
+    assert await cache.get("a") == b"1"
+    await cache.clear(change="732")
+    assert await cache.get("a") is None
@@ -0,0 +1,81 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from infrastructure.persistence.db.session import ScopedSessions
+
+
+class FakeSession:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.anyio
+async def test_scope_shares_one_session_and_closes_it():
+    sessions = ScopedSessions(FakeSession)
+
+    async with sessions.scope():
+        session = sessions.get()
+        assert sessions.get() is session
+        assert await asyncio.create_task(asyncio.sleep(0, sessions.get())) is session
+        assert not session.closed
+
+    assert session.closed
+    assert sessions.get() is not session
+
+
+@pytest.mark.anyio
+async def test_session_created_by_a_task_is_closed_with_the_scope():
+    sessions = ScopedSessions(FakeSession)
+
+    async with sessions.scope():
+        session = await asyncio.create_task(asyncio.sleep(0, sessions.get()))
+
+    assert session.closed
+
+
+@pytest.mark.anyio
+async def test_scopes_do_not_share_sessions():
+    sessions = ScopedSessions(FakeSession)
+
+    async def in_scope():
+        async with sessions.scope():
+            session = sessions.get()
+            await asyncio.sleep(0)
+            return session
+
+    first, second = await asyncio.gather(in_scope(), in_scope())
+
+    assert first is not second
+    assert first.closed and second.closed
+
+
+@pytest.mark.anyio
+async def test_opened_sessions_are_separate_and_closed_with_the_scope():
+    sessions = ScopedSessions(FakeSession)
+
+    async with sessions.scope():
+        opened = sessions.open()
+        shared = sessions.get()
+        assert opened is not shared
+        assert sessions.open() is not opened
+        assert sessions.get() is shared
+
+    assert opened.closed and shared.closed
+
+
+@pytest.mark.anyio
+async def test_scope_closes_every_session_when_one_close_fails():
+    sessions = ScopedSessions(FakeSession)
+
+    async with sessions.scope():
+        failing = sessions.get()
+        failing.close = AsyncMock(side_effect=OSError("connection reset"))
+        opened = sessions.open()
+
+    failing.close.assert_awaited_once()
+    assert opened.closed
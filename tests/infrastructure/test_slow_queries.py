@@ -0,0 +1,68 @@
+from sqlalchemy import create_engine, text
+
+from infrastructure.observability import SlowQueryLog, collect_timings, instrument_sql
+
+
+def test_statements_over_the_threshold_are_logged_with_their_filters():
+    slow_query_log = SlowQueryLog(threshold_ms=0, max_entries=2, explain=False, log_parameters=True)
+    instrument_sql(slow_query_log=slow_query_log)
+    engine = create_engine("sqlite://")
+
+    try:
+        with engine.connect() as connection, collect_timings(path="/v1/organizations", filters="industry_id,name"):
+            for value in range(3):
+                connection.execute(text("SELECT :value"), {"value": value})
+    finally:
+        instrument_sql()
+
+    entries = slow_query_log.entries()
+    assert [entry.parameters for entry in entries] == ["(2,)", "(1,)"]
+    assert entries[0].statement == "SELECT ?"
+    assert entries[0].path == "/v1/organizations"
+    assert entries[0].filters == "industry_id,name"
+
+
+def test_fast_statements_are_not_logged():
+    slow_query_log = SlowQueryLog(threshold_ms=60_000, explain=False)
+    instrument_sql(slow_query_log=slow_query_log)
+    engine = create_engine("sqlite://")
+
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    finally:
+        instrument_sql()
+
+    assert slow_query_log.entries() == []
+
+
+def test_parameters_are_redacted_by_default():
+    slow_query_log = SlowQueryLog(threshold_ms=0, explain=False)
+    instrument_sql(slow_query_log=slow_query_log)
+    engine = create_engine("sqlite://")
+
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT :name"), {"name": "%sushi%"})
+    finally:
+        instrument_sql()
+
+    assert slow_query_log.entries()[0].parameters is None
+
+
+def test_only_selects_of_read_requests_are_explained():
+    slow_query_log = SlowQueryLog(threshold_ms=0)
+    instrument_sql(slow_query_log=slow_query_log)
+    engine = create_engine("sqlite://")
+
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            with collect_timings(path="/v1/admin/import"):
+                connection.execute(text("SELECT 2"))
+    finally:
+        instrument_sql()
+
+    assert [entry.plan_error for entry in slow_query_log.entries()] == [
+        "Only SELECT statements of read requests are explained"
+    ] * 2
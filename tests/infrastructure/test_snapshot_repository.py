@@ -0,0 +1,232 @@
+"""
+The same searches against the SQL repository and the snapshot one.
+SQL cases run when TEST_DB_URL points at a migrated database; its directory is replaced within a transaction that
+is rolled back afterwards.
+"""
+
+import os
+
+import orjson
+import pytest
+from geoalchemy2.elements import WKTElement
+
+from core.mappers import map_db_organization_to_entity, map_point_to_db_point, map_polygon_to_db_polygon
+from infrastructure.persistence.snapshot import DirectorySnapshot, SnapshotOrganizationRepositoryImpl, SnapshotStore
+
+BUILDINGS = [
+    (1, "Lenina 1, Moscow", 55.7558, 37.6173),
+    (2, "Tverskaya 7, Moscow", 55.7600, 37.6100),
+    (3, "Krasny prospekt 10, Novosibirsk", 55.0302, 82.9204),
+]
+INDUSTRIES = [
+    (1, "Food", None),
+    (2, "Meat products", 1),
+    (3, "Dairy", 1),
+    (4, "Cars", None),
+    (5, "Trucks", 4),
+    (6, "Spare parts", 5),
+]
+ORGANIZATIONS = [
+    (1, "Horns & Hooves", 1),
+    (2, "Milk Farm", 2),
+    (3, "Auto Parts Plus", 3),
+    (4, "Big Trucks", 1),
+    (5, "Food Court", 2),
+]
+PHONES = [
+    (1, "2-222-222"),
+    (1, "3-333-333"),
+    (2, "8-923-666-13-13"),
+]
+ORGANIZATION_INDUSTRIES = [
+    (1, 2),
+    (2, 3),
+    (3, 6),
+    (4, 5),
+    (4, 2),
+    (5, 1),
+]
+
+MOSCOW_CENTER = [(55.74, 37.59), (55.74, 37.64), (55.78, 37.64), (55.78, 37.59), (55.74, 37.59)]
+
+
+async def _sql_repository():
+    from sqlalchemy import delete, insert
+    from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+    from infrastructure.persistence.db.repositories import OrganizationRepositoryImpl
+    from infrastructure.persistence.db.schema import Building, Industry, Organization, Phone, organization_industries
+
+    engine = create_async_engine(os.environ["TEST_DB_URL"])
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        for table in (organization_industries, Phone.__table__, Organization.__table__, Industry.__table__):
+            await connection.execute(delete(table))
+        await connection.execute(delete(Building.__table__))
+        await connection.execute(
+            insert(Building.__table__),
+            [
+                {"id": id, "address": address, "coordinates": WKTElement(f"POINT({lon} {lat})", srid=4326)}
+                for id, address, lat, lon in BUILDINGS
+            ],
+        )
+        for id, name, parent_id in INDUSTRIES:
+            # One by one, the closure trigger expects parents to exist
+            await connection.execute(insert(Industry.__table__).values(id=id, name=name, parent_id=parent_id))
+        await connection.execute(
+            insert(Organization.__table__),
+            [{"id": id, "name": name, "building_id": building_id} for id, name, building_id in ORGANIZATIONS],
+        )
+        await connection.execute(
+            insert(Phone.__table__),
+            [{"organization_id": organization_id, "phone_number": number} for organization_id, number in PHONES],
+        )
+        await connection.execute(
+            insert(organization_industries),
+            [{"organization_id": org, "industry_id": industry} for org, industry in ORGANIZATION_INDUSTRIES],
+        )
+        async with AsyncSession(bind=connection, join_transaction_mode="create_savepoint") as session:
+            yield OrganizationRepositoryImpl(session)
+        await transaction.rollback()
+    await engine.dispose()
+
+
+async def _snapshot_repository():
+    store = SnapshotStore(session_factory=None)
+    store.swap(
+        DirectorySnapshot(
+            organizations=ORGANIZATIONS,
+            buildings=BUILDINGS,
+            phones=PHONES,
+            industries=INDUSTRIES,
+            organization_industries=ORGANIZATION_INDUSTRIES,
+        )
+    )
+    yield SnapshotOrganizationRepositoryImpl(store)
+
+
+@pytest.fixture(
+    params=[
+        pytest.param("sql", marks=pytest.mark.skipif("TEST_DB_URL" not in os.environ, reason="TEST_DB_URL is not set")),
+        "snapshot",
+    ]
+)
+async def repository(request):
+    repositories = _sql_repository() if request.param == "sql" else _snapshot_repository()
+    yield await anext(repositories)
+    await repositories.aclose()
+
+
+async def _search(repository, **filters) -> list[int]:
+    organizations = await repository.find_organizations_with_filters(**filters, limit=100, offset=0)
+    return [organization.id for organization in organizations]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("filters", "expected"),
+    [
+        ({"building_id": 1}, [4, 1]),
+        ({"industry_id": 1}, [5]),
+        ({"industry_id": 1, "include_subindustries": True}, [4, 5, 1, 2]),
+        ({"industry_name": "truck"}, [3, 4]),
+        ({"industry_id": 4, "include_subindustries": True, "industry_name": "parts"}, [3]),
+        ({"organization_name": "FARM"}, [2]),
+        ({"organization_name": "o_"}, [3, 5, 1]),
+        ({"address": "moscow"}, [4, 5, 1, 2]),
+        ({"address": "moscow", "industry_name": "food", "organization_name": "o"}, [5, 1]),
+        ({"point_wkt": map_point_to_db_point(lat=55.7558, lon=37.6173), "radius_m": 300}, [4, 1]),
+        ({"polygon_wkt": map_polygon_to_db_polygon(MOSCOW_CENTER)}, [4, 5, 1, 2]),
+        ({"building_ids": [2, 3]}, [3, 5, 2]),
+    ],
+)
+async def test_filters(repository, filters, expected):
+    assert await _search(repository, **filters) == expected
+
+
+@pytest.mark.anyio
+async def test_order_by_distance(repository):
+    point = map_point_to_db_point(lat=55.7558, lon=37.6173)
+    organizations = await repository.find_organizations_with_filters(
+        point_wkt=point, radius_m=1000, order_by="distance", limit=3, offset=0
+    )
+
+    assert [organization.id for organization in organizations] == [1, 4, 2]
+    assert organizations[0].distance < 1
+    assert 500 < organizations[2].distance < 1000
+
+    last = organizations[1]
+    rest = await repository.find_organizations_with_filters(
+        point_wkt=point, radius_m=1000, order_by="distance", limit=10, offset=0, after=(last.distance, last.id)
+    )
+    assert [organization.id for organization in rest] == [2, 5]
+
+
+@pytest.mark.anyio
+async def test_pagination_by_name(repository):
+    page = await repository.get_all_organizations(limit=2, offset=1)
+    after = await repository.get_all_organizations(limit=2, offset=0, after=("Big Trucks", 4))
+
+    assert [organization.id for organization in page] == [4, 5]
+    assert [organization.id for organization in after] == [5, 1]
+
+
+@pytest.mark.anyio
+async def test_find_organization_by_id(repository):
+    organization = map_db_organization_to_entity(await repository.find_organization_by_id(4))
+
+    assert organization.name == "Big Trucks"
+    assert organization.building.address == "Lenina 1, Moscow"
+    assert sorted(organization.industries) == ["Meat products", "Trucks"]
+    assert await repository.find_organization_by_id(404) is None
+
+
+@pytest.mark.anyio
+async def test_documents(repository):
+    rows = await repository.find_organization_documents_with_filters(building_id=1, limit=10, offset=0)
+
+    assert [row.id for row in rows] == [4, 1]
+    assert orjson.loads(rows[1].document) == {
+        "id": 1,
+        "name": "Horns & Hooves",
+        "phones": ["2-222-222", "3-333-333"],
+        "building": {"id": 1, "address": "Lenina 1, Moscow", "coordinates": {"lat": 55.7558, "lon": 37.6173}},
+        "industries": ["Meat products"],
+        "distance": None,
+    }
+
+
+@pytest.mark.anyio
+async def test_clusters(repository):
+    polygon = map_polygon_to_db_polygon([(50, 30), (50, 90), (60, 90), (60, 30), (50, 30)])
+    clusters = await repository.cluster_organizations_with_filters(polygon_wkt=polygon, cell_size=1)
+    trucks = await repository.cluster_organizations_with_filters(
+        polygon_wkt=polygon, industry_id=4, include_subindustries=True, cell_size=0.001
+    )
+
+    assert [(cluster.count, cluster.organization_id) for cluster in clusters] == [(1, 3), (4, None)]
+    assert clusters[1].lat == pytest.approx((55.7558 * 2 + 55.76 * 2) / 4)
+    assert clusters[1].lon == pytest.approx((37.6173 * 2 + 37.61 * 2) / 4)
+    assert [(cluster.count, cluster.organization_id) for cluster in trucks] == [(1, 3), (1, 4)]
+
+
+@pytest.mark.anyio
+async def test_industry_facets(repository):
+    everything = await repository.count_industry_facets_with_filters()
+    moscow = await repository.count_industry_facets_with_filters(address="moscow")
+
+    assert [(facet.name, facet.count) for facet in everything] == [
+        ("Food", 4),
+        ("Cars", 2),
+        ("Meat products", 2),
+        ("Trucks", 2),
+        ("Dairy", 1),
+        ("Spare parts", 1),
+    ]
+    assert [(facet.id, facet.parent_id, facet.count) for facet in moscow] == [
+        (1, None, 4),
+        (2, 1, 2),
+        (4, None, 1),
+        (3, 1, 1),
+        (5, 4, 1),
+    ]
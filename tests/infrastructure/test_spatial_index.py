@@ -0,0 +1,134 @@
+import random
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from infrastructure.persistence.db.notifications import DirectoryChange
+from infrastructure.spatial import BuildingSpatialIndex
+from infrastructure.spatial import distance_m
+
+
+def _index(**kwargs) -> BuildingSpatialIndex:
+    return BuildingSpatialIndex(session_factory=None, **kwargs)
+
+
+def _buildings(count: int) -> list[tuple[int, float, float]]:
+    rng = random.Random(7)
+    return [
+        (building_id, 40.73 + rng.uniform(-0.1, 0.1), -73.93 + rng.uniform(-0.1, 0.1)) for building_id in range(count)
+    ]
+
+
+def test_radius_matches_brute_force():
+    buildings = _buildings(2000)
+    index = _index()
+    index.load(buildings)
+
+    matches = index.within_radius(40.73, -73.93, 3000)
+
+    expected = [building_id for building_id, lat, lon in buildings if distance_m(40.73, -73.93, lat, lon) <= 3000]
+    assert sorted(matches) == expected
+    assert 0 < len(matches) < len(buildings)
+
+
+def test_polygon_matches_buildings_inside():
+    index = _index()
+    index.load([(1, 40.71, -73.95), (2, 40.75, -73.94), (3, 40.725, -73.925)])
+
+    # Triangle with vertices as (lat, lon)
+    matches = index.within_polygon([(40.70, -73.96), (40.74, -73.96), (40.70, -73.92)])
+
+    assert matches == [1]
+
+
+def test_moved_buildings_are_found_at_their_new_location():
+    index = _index()
+    index.load([(1, 40.73, -73.93)])
+
+    index.upsert([(1, 41.87, -87.62)])
+
+    assert index.within_radius(40.73, -73.93, 1000) == []
+    assert index.within_radius(41.87, -87.62, 1000) == [1]
+    assert index.stats().buildings == 1
+
+
+def test_too_many_matches_are_left_to_postgis():
+    index = _index(max_matches=10)
+    index.load(_buildings(100))
+
+    assert index.within_radius(40.73, -73.93, 50_000) is None
+
+
+def test_building_ids_beyond_capacity_are_rejected():
+    index = _index(max_building_id=10)
+
+    with pytest.raises(OverflowError):
+        index.load([(11, 40.73, -73.93)])
+    assert not index.ready
+
+
+class ScriptedSession:
+    """Session answering the watermark query and then each executed statement with the next scripted result."""
+
+    def __init__(self, watermark: datetime, *results):
+        self.info = {}
+        self._watermark = watermark
+        self._results = list(results)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def scalar(self, stmt):
+        return self._watermark
+
+    async def execute(self, stmt):
+        result = self._results.pop(0)
+        return SimpleNamespace(all=lambda: result, one=lambda: result)
+
+
+def _row(building_id: int, lat: float | None, lon: float | None) -> SimpleNamespace:
+    return SimpleNamespace(id=building_id, latitude=lat, longitude=lon)
+
+
+@pytest.mark.anyio
+async def test_refresh_applies_changes_without_reloading():
+    scripted = [
+        ScriptedSession(datetime(2026, 1, 1), [_row(1, 40.73, -73.93), _row(4, 40.75, -73.95)]),
+        # Building 3 added, building 1 lost its coordinates
+        ScriptedSession(datetime(2026, 1, 2), [_row(3, 41.87, -87.62), _row(1, None, None)]),
+    ]
+    sessions = list(scripted)
+    index = BuildingSpatialIndex(session_factory=lambda: sessions.pop(0))
+
+    await index.refresh()
+    await index.notify_change(DirectoryChange(table="buildings", operation="UPDATE"))
+    await index.refresh()
+
+    assert sessions == []
+    assert all(session.info == {"primary": True} for session in scripted)
+    assert index.within_radius(40.73, -73.93, 1000) == []
+    assert index.within_radius(41.87, -87.62, 1000) == [3]
+    assert (index.stats().buildings, index.stats().watermark) == (2, datetime(2026, 1, 2))
+
+
+@pytest.mark.anyio
+async def test_refresh_reloads_after_deletions():
+    sessions = [
+        ScriptedSession(datetime(2026, 1, 1), [_row(1, 40.73, -73.93), _row(2, 40.74, -73.94)]),
+        ScriptedSession(datetime(2026, 1, 2), [_row(1, 40.73, -73.93)]),
+    ]
+    index = BuildingSpatialIndex(session_factory=lambda: sessions.pop(0))
+
+    await index.refresh()
+    await index.notify_change(DirectoryChange(table="organizations", operation="DELETE"))
+    await index.notify_change(DirectoryChange(table="buildings", operation="DELETE"))
+    await index.refresh()
+
+    assert sessions == []
+    assert index.ready
+    assert index.within_radius(40.74, -73.94, 10) == []
+    assert index.stats().buildings == 1
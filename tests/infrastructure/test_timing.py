@@ -0,0 +1,37 @@
+from sqlalchemy import create_engine, text
+
+from infrastructure.observability import collect_timings, instrument_sql, stage_durations, timed
+
+
+def test_sql_statements_are_counted_into_the_current_request():
+    instrument_sql()
+    engine = create_engine("sqlite://")
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with collect_timings() as timings:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+
+    assert timings.db_queries == 2
+    assert timings.db_seconds > 0
+
+
+def test_sql_time_is_taken_out_of_the_repository_stage():
+    with collect_timings() as timings:
+        with timed("repository"):
+            pass
+        with timed("serialize"):
+            pass
+    timings.stages["repository"] = 0.5
+    timings.db_seconds = 0.2
+
+    stages = stage_durations(timings)
+
+    assert set(stages) == {"orm", "serialize"}
+    assert round(stages["orm"], 6) == 0.3
+
+
+def test_timed_without_collected_timings_does_nothing():
+    with timed("serialize"):
+        pass